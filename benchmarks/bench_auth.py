@@ -0,0 +1,95 @@
+"""Benchmark request throughput through the auth middleware.
+
+A minimal app (one authenticated JSON route plus the real /static mount) is driven in-process
+through httpx's ASGI transport, so the numbers isolate middleware + routing overhead.
+
+Profiles:
+	legacy   BaseHTTPMiddleware + prefix scan over the exempt paths + HMAC on every request
+	asgi     pure ASGI AuthMiddleware, verified-token cache disabled
+	cached   pure ASGI AuthMiddleware with the verified-token LRU (the current default)
+
+Usage:
+	uv run python benchmarks/bench_auth.py [--requests 5000] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import RedirectResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from web import auth
+
+LEGACY_EXEMPT_PATHS = {'/login', '/static'}
+TARGETS = {'api': '/api/ping', 'static': '/static/app.js'}
+
+
+async def _legacy_auth_middleware(request: Request, call_next):
+	path = request.url.path
+	if any(path.startswith(p) for p in LEGACY_EXEMPT_PATHS):
+		return await call_next(request)
+	if not auth.verify_token(request.cookies.get('auth_token')):
+		return RedirectResponse(url='/login', status_code=302)
+	return await call_next(request)
+
+
+def _build_app(profile: str) -> FastAPI:
+	app = FastAPI()
+	if profile == 'legacy':
+		app.add_middleware(BaseHTTPMiddleware, dispatch=_legacy_auth_middleware)
+	else:
+		app.add_middleware(auth.AuthMiddleware)
+	app.mount('/static', StaticFiles(directory=os.path.join(project_root, 'web', 'static')), name='static')
+
+	@app.get('/api/ping')
+	async def ping():
+		return {'ok': True}
+
+	return app
+
+
+async def _run(profile: str, path: str, args) -> float:
+	auth._verified_tokens.clear()
+	auth.TOKEN_CACHE_SIZE = 0 if profile in ('legacy', 'asgi') else 128
+	transport = httpx.ASGITransport(app=_build_app(profile))
+	cookies = {'auth_token': auth.create_token()}
+	async with httpx.AsyncClient(transport=transport, base_url='http://bench', cookies=cookies) as client:
+		per_worker = args.requests // args.concurrency
+
+		async def _worker():
+			for _ in range(per_worker):
+				response = await client.get(path)
+				assert response.status_code == 200, response.status_code
+
+		await _worker()  # warm up
+		started = time.perf_counter()
+		await asyncio.gather(*(_worker() for _ in range(args.concurrency)))
+		elapsed = time.perf_counter() - started
+	return per_worker * args.concurrency / elapsed
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--requests', type=int, default=5000)
+	parser.add_argument('--concurrency', type=int, default=8)
+	args = parser.parse_args()
+
+	profiles = ('legacy', 'asgi', 'cached')
+	print(f'{"target (req/s)":<16}' + ''.join(f'{name:>12}' for name in profiles))
+	for label, path in TARGETS.items():
+		rates = [asyncio.run(_run(profile, path, args)) for profile in profiles]
+		print(f'{label:<16}' + ''.join(f'{rate:>12.0f}' for rate in rates))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,130 @@
+"""Benchmark checkin_logs listing/counting queries with and without secondary indexes.
+
+Builds a synthetic checkin_logs table (1M rows by default) in a temporary SQLite file,
+times the query shapes used by web/database.py, then creates CHECKIN_LOG_INDEXES and
+times them again.
+
+Usage:
+	uv run python benchmarks/bench_checkin_logs_indexes.py [--rows 1000000] [--accounts 200]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web.database import CHECKIN_LOG_INDEXES
+
+STATUSES = ('success', 'already_checked_in', 'failed')
+PAGE_SIZE = 30
+
+QUERIES = [
+	('first page', 'SELECT * FROM checkin_logs ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?', (PAGE_SIZE, 0)),
+	('page 1000', 'SELECT * FROM checkin_logs ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?',
+	 (PAGE_SIZE, PAGE_SIZE * 999)),
+	('by account', 'SELECT * FROM checkin_logs WHERE account_id = ? ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?',
+	 (7, PAGE_SIZE, 0)),
+	('by status', 'SELECT * FROM checkin_logs WHERE status = ? ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?',
+	 ('failed', PAGE_SIZE, 0)),
+	('account+status', 'SELECT * FROM checkin_logs WHERE account_id = ? AND status = ? '
+	 'ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?', (7, 'failed', PAGE_SIZE, 0)),
+	('count all', 'SELECT COUNT(*) FROM checkin_logs', ()),
+	('count account', 'SELECT COUNT(*) FROM checkin_logs WHERE account_id = ?', (7,)),
+	('count status', 'SELECT COUNT(*) FROM checkin_logs WHERE status = ?', ('failed',)),
+]
+
+
+def _populate(conn: sqlite3.Connection, rows: int, accounts: int):
+	conn.execute('''
+		CREATE TABLE checkin_logs (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			account_id INTEGER,
+			account_name TEXT NOT NULL,
+			provider TEXT NOT NULL,
+			status TEXT NOT NULL,
+			balance REAL,
+			used_quota REAL,
+			message TEXT,
+			triggered_by TEXT NOT NULL DEFAULT 'schedule',
+			created_at TEXT NOT NULL
+		)
+	''')
+	rng = random.Random(42)
+	start = datetime.now() - timedelta(days=365)
+	step = timedelta(days=365) / rows
+
+	def _gen():
+		for i in range(rows):
+			account_id = rng.randint(1, accounts)
+			status = rng.choices(STATUSES, weights=(70, 20, 10))[0]
+			yield (
+				account_id, f'account-{account_id}', 'anyrouter', status,
+				round(rng.uniform(0, 500), 2), round(rng.uniform(0, 100), 2),
+				'Balance: $1.0, Used: $0.5' if status != 'failed' else 'connection timed out',
+				'schedule', (start + step * i).isoformat(),
+			)
+
+	conn.executemany(
+		'''INSERT INTO checkin_logs (account_id, account_name, provider, status,
+		   balance, used_quota, message, triggered_by, created_at)
+		   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+		_gen(),
+	)
+	conn.commit()
+
+
+def _time_queries(conn: sqlite3.Connection, repeat: int) -> dict[str, float]:
+	results = {}
+	for label, sql, params in QUERIES:
+		best = float('inf')
+		for _ in range(repeat):
+			started = time.perf_counter()
+			conn.execute(sql, params).fetchall()
+			best = min(best, time.perf_counter() - started)
+		results[label] = best * 1000
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--rows', type=int, default=1_000_000)
+	parser.add_argument('--accounts', type=int, default=200)
+	parser.add_argument('--repeat', type=int, default=3)
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as temp_dir:
+		conn = sqlite3.connect(os.path.join(temp_dir, 'bench.db'))
+		conn.execute('PRAGMA journal_mode=WAL')
+
+		started = time.perf_counter()
+		_populate(conn, args.rows, args.accounts)
+		print(f'Populated {args.rows} rows in {time.perf_counter() - started:.1f}s')
+
+		before = _time_queries(conn, args.repeat)
+
+		started = time.perf_counter()
+		for sql in CHECKIN_LOG_INDEXES:
+			conn.execute(sql)
+		conn.execute('ANALYZE checkin_logs')
+		conn.commit()
+		print(f'Built indexes in {time.perf_counter() - started:.1f}s')
+
+		after = _time_queries(conn, args.repeat)
+		conn.close()
+
+	print(f'\n{"query":<16}{"no index (ms)":>16}{"indexed (ms)":>16}{"speedup":>10}')
+	for label, _, _ in QUERIES:
+		speedup = before[label] / after[label] if after[label] else float('inf')
+		print(f'{label:<16}{before[label]:>16.2f}{after[label]:>16.2f}{speedup:>9.1f}x')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,99 @@
+"""Benchmark check-in result classification over a synthetic log corpus.
+
+The corpus mixes realistic provider messages (most of them repeated many times, as in real
+logs) with random unique messages, and every profile must agree on every row.
+
+Profiles:
+	legacy   one `in` test per keyword per table, in priority order (the former failure_reason)
+	single   utils.classifier.classify_result per row (one compiled trie regex pass)
+	batch    utils.classifier.classify_results over the whole corpus (repeated rows matched once)
+
+Usage:
+	uv run python benchmarks/bench_classifier.py [--rows 200000] [--unique 0.1] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.classifier import CATEGORY_KEYWORDS, classify_result, classify_results
+
+MESSAGES = (
+	('success', '签到成功，余额 $25.00'),
+	('already_checked_in', '今日已签到'),
+	('failed', 'HTTP 401: Unauthorized'),
+	('failed', 'Failed to get WAF cookies: challenge page did not resolve'),
+	('failed', 'httpx.ConnectTimeout: timed out while connecting to anyrouter.top'),
+	('failed', 'HTTP 502 Bad Gateway from upstream'),
+	('failed', 'Provider not found in providers config'),
+	('failed', 'Expecting value: line 1 column 1 (char 0)'),
+	('failed', '签到失败：未知错误，请稍后再试'),
+)
+WORDS = ('error', 'request', 'account', 'provider', 'response', 'retry', 'failed', '签到', '余额', 'token')
+
+
+def _legacy_classify(status, message) -> str:
+	status_value = (status or '').strip().lower()
+	if status_value in ('success', 'already_checked_in'):
+		return status_value
+	text = str(message or '').strip().lower()
+	for category, keywords in CATEGORY_KEYWORDS:
+		if any(keyword in text for keyword in keywords):
+			return category
+	return 'unknown_error'
+
+
+def _corpus(rows: int, unique: float) -> list[tuple[str, str]]:
+	rng = random.Random(42)
+	keywords = [keyword for _, table in CATEGORY_KEYWORDS for keyword in table]
+	corpus = []
+	for _ in range(rows):
+		if rng.random() >= unique:
+			corpus.append(rng.choice(MESSAGES))
+			continue
+		words = rng.choices(WORDS, k=rng.randint(4, 16))
+		if rng.random() < 0.5:
+			words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+		corpus.append(('failed', ' '.join(words) + f' #{rng.randrange(10 ** 6)}'))
+	return corpus
+
+
+def _time(fn, repeat: int) -> tuple[float, list[str]]:
+	best = float('inf')
+	for _ in range(repeat):
+		started = time.perf_counter()
+		result = fn()
+		best = min(best, time.perf_counter() - started)
+	return best, result
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--rows', type=int, default=200000)
+	parser.add_argument('--unique', type=float, default=0.1, help='share of rows with a unique message')
+	parser.add_argument('--repeat', type=int, default=3)
+	args = parser.parse_args()
+
+	corpus = _corpus(args.rows, args.unique)
+	profiles = {
+		'legacy': lambda: [_legacy_classify(*row) for row in corpus],
+		'single': lambda: [classify_result(*row) for row in corpus],
+		'batch': lambda: classify_results(corpus),
+	}
+	expected = None
+	print(f'{"profile":<10}{"seconds":>10}{"rows/s":>14}')
+	for name, fn in profiles.items():
+		elapsed, result = _time(fn, args.repeat)
+		if expected is None:
+			expected = result
+		assert result == expected, f'{name} disagrees with legacy'
+		print(f'{name:<10}{elapsed:>10.3f}{len(corpus) / elapsed:>14.0f}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,160 @@
+"""Benchmark web/database.py insert and query throughput under different connection profiles.
+
+Each profile gets its own temporary database. Check-in logs are first written through
+add_checkin_log (one transaction per log, with account stats and balance points, just like
+a real check-in run). Then the table is bulk-filled to --rows. After that the read paths
+used by the dashboard, logs page and stats API are timed.
+
+Profiles (reads; writes always go through the single writer connection):
+	legacy  new connection per call, journal_mode=WAL only (the old get_db behaviour)
+	pooled  pooled connections, journal_mode=WAL only
+	tuned   pooled connections with SQLITE_PRAGMAS (the current defaults / env overrides)
+
+Usage:
+	uv run python benchmarks/bench_database.py [--rows 200000] [--inserts 2000] [--accounts 50]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+STATUSES = ('success', 'already_checked_in', 'failed')
+
+
+@asynccontextmanager
+async def _unpooled_connection():
+	db = await database._open_connection(database.DB_PATH)
+	try:
+		yield db
+	finally:
+		await db.close()
+
+
+PROFILES = {
+	'legacy': (_unpooled_connection, (('journal_mode', 'WAL'),)),
+	'pooled': (database.connection, (('journal_mode', 'WAL'),)),
+	'tuned': (database.connection, database.SQLITE_PRAGMAS),
+}
+
+
+def _bulk_fill(path: str, rows: int, accounts: int):
+	"""Backdate `rows` extra logs so read queries run against a realistically sized table."""
+	rng = random.Random(42)
+	start = datetime.now() - timedelta(days=90)
+	step = timedelta(days=89) / max(rows, 1)
+	conn = sqlite3.connect(path)
+	conn.executemany(
+		'''INSERT INTO checkin_logs (account_id, account_name, provider, status,
+		   balance, used_quota, message, triggered_by, created_at)
+		   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+		(
+			(
+				account_id, f'account-{account_id}', 'anyrouter', status,
+				round(rng.uniform(0, 500), 2), round(rng.uniform(0, 100), 2),
+				'Balance: $1.0, Used: $0.5' if status != 'failed' else 'connection timed out',
+				'schedule', (start + step * i).isoformat(),
+			)
+			for i in range(rows)
+			for account_id, status in [(rng.randint(1, accounts), rng.choices(STATUSES, weights=(70, 20, 10))[0])]
+		),
+	)
+	conn.execute('ANALYZE')
+	conn.commit()
+	conn.close()
+
+
+async def _timed(label: str, repeat: int, fn) -> tuple[str, float]:
+	started = time.perf_counter()
+	for _ in range(repeat):
+		await fn()
+	elapsed = time.perf_counter() - started
+	return label, repeat / elapsed if elapsed else float('inf')
+
+
+async def _run_profile(args) -> list[tuple[str, float]]:
+	await database.init_db()
+	account_ids = [
+		await database.create_account(f'account-{i}', 'anyrouter', cookies='{}', api_user=str(i))
+		for i in range(1, args.accounts + 1)
+	]
+	rng = random.Random(7)
+
+	async def _insert():
+		account_id = rng.choice(account_ids)
+		status = rng.choices(STATUSES, weights=(70, 20, 10))[0]
+		await database.add_checkin_log(
+			account_id, f'account-{account_id}', 'anyrouter', status,
+			balance=round(rng.uniform(0, 500), 2), used_quota=round(rng.uniform(0, 100), 2),
+			message='connection timed out' if status == 'failed' else 'ok', duration_ms=rng.randint(200, 5000),
+		)
+
+	results = [await _timed('add_checkin_log', args.inserts, _insert)]
+
+	async def _concurrent_insert():
+		await asyncio.gather(*(_insert() for _ in range(8)))
+
+	label, rate = await _timed('add_checkin_log x8 concurrent', args.inserts // 8, _concurrent_insert)
+	results.append((label, rate * 8))
+
+	_bulk_fill(database.DB_PATH, args.rows, args.accounts)
+	now = int(time.time())
+	reads = [
+		('get_all_accounts', database.get_all_accounts),
+		('logs first page', lambda: database.get_checkin_logs_keyset(limit=31)),
+		('logs by account', lambda: database.get_checkin_logs_keyset(limit=31, account_id=account_ids[0])),
+		('get_log_count', database.get_log_count),
+		('get_account_stats', database.get_account_stats),
+		('balance series x10', lambda: database.get_balance_series(account_ids[:10], now - 30 * 86400, now)),
+	]
+	for label, fn in reads:
+		results.append(await _timed(label, args.repeat, fn))
+
+	async def _concurrent_reads():
+		await asyncio.gather(*(database.get_checkin_logs_keyset(limit=31, account_id=i) for i in account_ids[:8]))
+
+	label, rate = await _timed('logs page x8 concurrent', args.repeat, _concurrent_reads)
+	results.append((label, rate * 8))
+	await database.close_db()
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--rows', type=int, default=200_000)
+	parser.add_argument('--inserts', type=int, default=2000)
+	parser.add_argument('--accounts', type=int, default=50)
+	parser.add_argument('--repeat', type=int, default=200)
+	parser.add_argument('--profiles', default=','.join(PROFILES))
+	args = parser.parse_args()
+
+	profiles = [name for name in args.profiles.split(',') if name in PROFILES]
+	table: dict[str, dict[str, float]] = {}
+	with tempfile.TemporaryDirectory() as temp_dir:
+		for name in profiles:
+			database.connection, database.SQLITE_PRAGMAS = PROFILES[name]
+			database.DB_PATH = os.path.join(temp_dir, f'{name}.db')
+			started = time.perf_counter()
+			for label, rate in asyncio.run(_run_profile(args)):
+				table.setdefault(label, {})[name] = rate
+			print(f'{name}: done in {time.perf_counter() - started:.1f}s')
+
+	print(f'\n{"operation (ops/s)":<32}' + ''.join(f'{name:>12}' for name in profiles))
+	for label, rates in table.items():
+		print(f'{label:<32}' + ''.join(f'{rates[name]:>12.0f}' for name in profiles))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,114 @@
+"""Benchmark full-text log search (search_checkin_logs) against a LIKE scan.
+
+Creates a fresh database with init_db (so the FTS table and its triggers exist), bulk-inserts
+synthetic check-in logs (1M by default, FTS kept in sync by the triggers) and times a few
+typical troubleshooting queries through web/database.py. The LIKE column is a newest-first scan
+for the first term: cheap for common messages, a full table scan for rare ones.
+
+Usage:
+	uv run python benchmarks/bench_log_search.py [--rows 1000000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+MESSAGES = (
+	('success', 'Balance: $12.5, Used: $3.1'),
+	('already_checked_in', '今日已签到'),
+	('failed', 'HTTP 401: cookie expired, please login again'),
+	('failed', 'connection timed out after 30s'),
+	('failed', 'WAF challenge page returned (acw_sc__v2)'),
+	('failed', '签到失败：Cookie 已过期'),
+	('failed', 'upstream error: 502 Bad Gateway from new-api'),
+	('failed', 'TLS handshake failed: certificate has expired'),
+)
+QUERIES = ('certificate', 'cookie expired', '"502 Bad Gateway"', '已过期', 'acw_sc__v2', 'timed out', 'account-7 WAF')
+
+
+def _populate(path: str, rows: int):
+	rng = random.Random(42)
+	start = datetime.now() - timedelta(days=365)
+	step = timedelta(days=365) / rows
+	conn = sqlite3.connect(path)
+
+	def _gen():
+		for i in range(rows):
+			status, message = rng.choices(MESSAGES, weights=(60, 20, 5, 5, 4, 3, 3, 0.01))[0]
+			account_id = rng.randint(1, 200)
+			yield (
+				account_id, f'account-{account_id}', rng.choice(('anyrouter', 'agentrouter', 'newapi')),
+				status, message, 'schedule', (start + step * i).isoformat(),
+			)
+
+	conn.executemany(
+		'''INSERT INTO checkin_logs (account_id, account_name, provider, status, message, triggered_by, created_at)
+		   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+		_gen(),
+	)
+	conn.commit()
+	conn.close()
+
+
+def _like_scan(path: str, term: str) -> float:
+	conn = sqlite3.connect(path)
+	started = time.perf_counter()
+	conn.execute(
+		'SELECT * FROM checkin_logs WHERE message LIKE ? ORDER BY created_at DESC LIMIT 30', (f'%{term}%',)
+	).fetchall()
+	elapsed = time.perf_counter() - started
+	conn.close()
+	return elapsed * 1000
+
+
+async def _time_search(query: str, repeat: int) -> tuple[float, int]:
+	best = float('inf')
+	found = 0
+	for _ in range(repeat):
+		started = time.perf_counter()
+		found = len(await database.search_checkin_logs(query, limit=31))
+		best = min(best, time.perf_counter() - started)
+	return best * 1000, found
+
+
+async def _run(queries, repeat):
+	results = [(query, *await _time_search(query, repeat)) for query in queries]
+	await database.close_db()
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--rows', type=int, default=1_000_000)
+	parser.add_argument('--repeat', type=int, default=5)
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as temp_dir:
+		database.DB_PATH = os.path.join(temp_dir, 'bench.db')
+		asyncio.run(database.init_db())
+
+		started = time.perf_counter()
+		_populate(database.DB_PATH, args.rows)
+		print(f'Inserted {args.rows} rows (with FTS triggers) in {time.perf_counter() - started:.1f}s')
+
+		results = asyncio.run(_run(QUERIES, args.repeat))
+		print(f'\n{"query":<22}{"fts page (ms)":>16}{"rows":>6}{"LIKE scan (ms)":>16}')
+		for query, elapsed, found in results:
+			like = _like_scan(database.DB_PATH, query.strip('"').split()[0])
+			print(f'{query:<22}{elapsed:>16.2f}{found:>6}{like:>16.2f}')
+
+
+if __name__ == '__main__':
+	main()
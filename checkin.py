@@ -14,6 +14,7 @@ import httpx
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
 
+from utils.classifier import is_already_checked_in_message
 from utils.config import AccountConfig, AppConfig, load_accounts_config
 from utils.notify import notify
 
@@ -67,24 +68,6 @@ def parse_cookies(cookies_data):
 	return {}
 
 
-def is_already_checked_in_message(message: str | None) -> bool:
-	"""判断消息是否表示“已签到”"""
-	if not message:
-		return False
-
-	text = str(message).strip().lower()
-	keywords = [
-		'already checked in',
-		'already check in',
-		'already signed in',
-		'already_checked_in',
-		'已经签到',
-		'已签到',
-		'重复签到',
-	]
-	return any(keyword in text for keyword in keywords)
-
-
 def is_cloudflare_h2_challenge(response) -> bool:
 	"""检测 Cloudflare 针对 HTTP/2 的 challenge（403 + cf-mitigated header）"""
 	if response.status_code != 403:
@@ -584,7 +567,7 @@ async def main():
 		notify_content = '\n\n'.join([time_info, '\n'.join(notification_content), '\n'.join(summary)])
 
 		print(notify_content)
-		notify.push_message('AnyRouter Check-in Alert', notify_content, msg_type='text')
+		await notify.apush_message('AnyRouter Check-in Alert', notify_content, msg_type='text')
 		print('[NOTIFY] Notification sent due to failures or balance changes')
 	else:
 		print('[INFO] All accounts successful and no balance changes detected, notification skipped')
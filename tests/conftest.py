@@ -0,0 +1,31 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from web import database
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+	"""Point the database at a fresh file under tmp_path, without creating the schema.
+
+	Connections left open by the test are closed afterwards: their worker threads would otherwise
+	keep the interpreter from exiting.
+	"""
+	path = str(tmp_path / 'checkin.db')
+	monkeypatch.setattr(database, 'DB_PATH', path)
+	yield path
+	asyncio.run(database.close_db())
+
+
+@pytest.fixture
+def db_path(db_file):
+	"""A migrated database file; test modules override this to add their own setup on top."""
+	asyncio.run(database.init_db())
+	return db_file
@@ -0,0 +1,174 @@
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+
+def _log(status, message='', balance=None, duration_ms=None, account_id=1):
+	asyncio.run(database.add_checkin_log(
+		account_id=account_id, account_name='acc', provider='p', status=status,
+		balance=balance, message=message, duration_ms=duration_ms,
+	))
+
+
+def test_add_checkin_log_maintains_streak_and_failure_category(db_path):
+	_log('success', balance=10.0, duration_ms=100)
+	_log('failed', message='cookie expired', duration_ms=300)
+	_log('success', balance=11.0, duration_ms=200)
+	_log('already_checked_in', balance=11.0)
+
+	stats = asyncio.run(database.get_account_stats(1))[1]
+
+	assert stats['current_streak'] == 2
+	assert stats['last_status'] == 'already_checked_in'
+	assert stats['last_failure_category'] == 'auth_failed'
+	assert stats['total_7d'] == 4
+	assert stats['success_rate_7d'] == 0.75
+	assert stats['success_rate_30d'] == 0.75
+	assert stats['avg_latency_ms'] == 200
+	assert stats['last_balance'] == 11.0
+
+
+def test_balance_delta_uses_previous_day_balance(db_path):
+	_log('success', balance=10.0)
+	conn = sqlite3.connect(db_path)
+	yesterday = (datetime.now() - timedelta(days=1)).date().isoformat()
+	conn.execute('UPDATE account_stats SET balance_day = ?', (yesterday,))
+	conn.commit()
+	conn.close()
+
+	_log('success', balance=12.5)
+	_log('success', balance=13.0)
+
+	stats = asyncio.run(database.get_account_stats(1))[1]
+	assert stats['prev_day_balance'] == 10.0
+	assert stats['balance_delta'] == 3.0
+
+
+def test_migration_backfills_stats_from_existing_logs(db_path):
+	conn = sqlite3.connect(db_path)
+	now = datetime.now()
+	conn.executemany(
+		'INSERT INTO checkin_logs (account_id, account_name, provider, status, balance, message, created_at) '
+		'VALUES (?, ?, ?, ?, ?, ?, ?)',
+		[
+			(3, 'acc', 'p', 'success', 5.0, 'ok', (now - timedelta(days=2)).isoformat()),
+			(3, 'acc', 'p', 'failed', None, 'Missing WAF cookies', (now - timedelta(hours=3)).isoformat()),
+			(3, 'acc', 'p', 'success', 6.0, 'ok', (now - timedelta(hours=2)).isoformat()),
+		],
+	)
+	conn.execute('DELETE FROM account_stats')
+	conn.commit()
+	conn.close()
+
+	async def _backfill():
+		db = await database.get_db()
+		try:
+			await database._backfill_account_stats(db)
+			await db.commit()
+		finally:
+			await db.close()
+
+	asyncio.run(_backfill())
+	stats = asyncio.run(database.get_account_stats())[3]
+
+	assert stats['current_streak'] == 1
+	assert stats['last_failure_category'] == 'waf_blocked'
+	assert stats['last_balance'] == 6.0
+	assert stats['balance_delta'] == 1.0
+	assert stats['total_30d'] == 3
+
+
+def test_window_counts_are_bumped_in_place_and_recounted_on_a_new_day(db_path, monkeypatch):
+	_log('success')
+	recounts = []
+	window_counts = database._window_counts
+
+	async def _counting(db, account_id, now):
+		recounts.append(account_id)
+		return await window_counts(db, account_id, now)
+
+	monkeypatch.setattr(database, '_window_counts', _counting)
+	_log('failed', message='timeout')
+	_log('success')
+	assert recounts == []
+	stats = asyncio.run(database.get_account_stats(1))[1]
+	assert (stats['success_7d'], stats['total_7d'], stats['success_30d'], stats['total_30d']) == (2, 3, 2, 3)
+
+	# a log rolled out of the 7-day window overnight; the first log of the new day recounts
+	conn = sqlite3.connect(db_path)
+	old = (datetime.now() - timedelta(days=9)).isoformat()
+	conn.execute('UPDATE checkin_logs SET created_at = ? WHERE id = 1', (old,))
+	conn.execute("UPDATE account_stats SET window_day = '2000-01-01'")
+	conn.commit()
+	conn.close()
+	_log('success')
+	assert recounts == [1]
+	stats = asyncio.run(database.get_account_stats(1))[1]
+	assert (stats['success_7d'], stats['total_7d'], stats['success_30d'], stats['total_30d']) == (2, 3, 3, 4)
+
+
+def test_refresh_recounts_only_accounts_without_a_log_today(db_path):
+	_log('success', account_id=1)
+	_log('success', account_id=2)
+	conn = sqlite3.connect(db_path)
+	old = (datetime.now() - timedelta(days=9)).isoformat()
+	conn.execute('UPDATE checkin_logs SET created_at = ? WHERE account_id = 1', (old,))
+	conn.execute("UPDATE account_stats SET window_day = '2000-01-01' WHERE account_id = 1")
+	conn.commit()
+	conn.close()
+
+	assert asyncio.run(database.refresh_account_window_counts()) == 1
+	assert asyncio.run(database.refresh_account_window_counts()) == 0
+	stats = asyncio.run(database.get_account_stats())
+	assert (stats[1]['total_7d'], stats[1]['total_30d']) == (0, 1)
+	assert stats[2]['total_7d'] == 1
+
+
+def test_refresh_bumps_the_logs_version_only_when_counters_change(db_path):
+	_log('success')
+	conn = sqlite3.connect(db_path)
+	old = (datetime.now() - timedelta(days=9)).isoformat()
+	conn.execute('UPDATE checkin_logs SET created_at = ?', (old,))
+	conn.execute("UPDATE account_stats SET window_day = '2000-01-01'")
+	conn.commit()
+	conn.close()
+
+	before = database.get_versions('logs')
+	assert asyncio.run(database.refresh_account_window_counts()) == 1
+	after = database.get_versions('logs')
+	assert after != before
+
+	conn = sqlite3.connect(db_path)
+	conn.execute("UPDATE account_stats SET window_day = '2000-01-01'")
+	conn.commit()
+	conn.close()
+	assert asyncio.run(database.refresh_account_window_counts()) == 0
+	assert database.get_versions('logs') == after
+
+
+def test_windows_count_only_success_statuses_over_calendar_days(db_path):
+	_log('success')
+	_log('error', message='odd status')
+	stats = asyncio.run(database.get_account_stats(1))[1]
+	assert (stats['success_7d'], stats['total_7d']) == (1, 2)
+
+	conn = sqlite3.connect(db_path)
+	today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+	conn.execute('UPDATE checkin_logs SET created_at = ? WHERE id = 1', ((today - timedelta(days=6)).isoformat(),))
+	conn.execute('UPDATE checkin_logs SET created_at = ? WHERE id = 2', ((today - timedelta(days=7)).isoformat(),))
+	conn.execute("UPDATE account_stats SET window_day = '2000-01-01'")
+	conn.commit()
+	conn.close()
+	asyncio.run(database.refresh_account_window_counts())
+
+	stats = asyncio.run(database.get_account_stats(1))[1]
+	# 7 calendar days: today and the 6 days before it
+	assert (stats['success_7d'], stats['total_7d'], stats['success_30d'], stats['total_30d']) == (1, 1, 1, 2)
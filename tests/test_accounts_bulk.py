@@ -0,0 +1,80 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+from web.routes.accounts import _export_record, _iter_ndjson, _validate_account
+
+PROVIDERS = {
+	'anyrouter': {'name': 'anyrouter', 'domain': 'https://anyrouter.top'},
+	'newapi': {'name': 'newapi', 'domain': ''},
+}
+
+
+def test_validate_account_accepts_env_format():
+	fields, error = _validate_account(
+		{'cookies': {'session': 'abc'}, 'api_user': 12345}, PROVIDERS, default_name='Account 3'
+	)
+	assert error is None
+	assert fields == {
+		'name': 'Account 3', 'provider': 'anyrouter', 'domain': '', 'auth_method': 'cookie',
+		'cookies': json.dumps({'session': 'abc'}), 'api_user': '12345',
+	}
+
+
+def test_validate_account_applies_form_rules():
+	assert _validate_account({'cookies': 'abc', 'api_user': '1'}, PROVIDERS)[1] == '请填写账号名称'
+	assert _validate_account({'name': 'a', 'provider': 'newapi', 'cookies': 'abc', 'api_user': '1'},
+							 PROVIDERS)[1] == '该 Provider 为模板，请填写域名'
+	assert _validate_account({'name': 'a', 'cookies': '{bad', 'api_user': '1'}, PROVIDERS)[1] == 'Cookies JSON 格式不正确'
+	assert _validate_account({'name': 'a', 'auth_method': 'browser_login', 'username': 'u'},
+							 PROVIDERS)[1] == '请填写用户名和密码'
+
+	fields, error = _validate_account({'name': 'a', 'cookies': 'plain', 'api_user': '1'}, PROVIDERS)
+	assert error is None
+	assert fields['cookies'] == json.dumps({'session': 'plain'})
+
+
+def test_iter_ndjson_handles_split_chunks_blank_lines_and_bad_rows():
+	async def _chunks():
+		yield b'{"name": "a"}\n\n{"na'
+		yield b'me": "b"}\nnot json\n{"name": "c"}'
+
+	async def _collect():
+		return [item async for item in _iter_ndjson(_chunks())]
+
+	assert asyncio.run(_collect()) == [
+		(1, {'name': 'a'}, None),
+		(3, {'name': 'b'}, None),
+		(4, None, 'JSON 格式不正确'),
+		(5, {'name': 'c'}, None),
+	]
+
+
+def test_bulk_insert_and_keyset_export_round_trip(db_path):
+	accounts = [
+		{'name': f'acc-{i}', 'provider': 'anyrouter', 'auth_method': 'cookie',
+		 'cookies': json.dumps({'session': str(i)}), 'api_user': str(i), 'enabled': i % 2}
+		for i in range(7)
+	]
+
+	async def _run():
+		inserted = await database.create_accounts_bulk(accounts)
+		exported = [acc async for acc in database.iter_accounts(batch_size=3)]
+		return inserted, exported
+
+	inserted, exported = asyncio.run(_run())
+	assert inserted == 7
+	assert [acc['name'] for acc in exported] == [f'acc-{i}' for i in range(7)]
+
+	record = _export_record(exported[1])
+	assert record['cookies'] == {'session': '1'}
+	assert record['enabled'] is True
+	assert _export_record(exported[0])['enabled'] is False
+	fields, error = _validate_account(record, PROVIDERS)
+	assert error is None and fields['api_user'] == '1'
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from web import auth
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache(monkeypatch):
+	monkeypatch.setattr(auth, '_verified_tokens', auth.OrderedDict())
+
+
+def _client() -> TestClient:
+	app = FastAPI()
+	app.add_middleware(auth.AuthMiddleware)
+
+	@app.get('/api/ping')
+	async def ping():
+		return {'ok': True}
+
+	@app.get('/login')
+	async def login():
+		return {'page': 'login'}
+
+	@app.get('/loginx')
+	async def not_login():
+		return {'page': 'other'}
+
+	@app.get('/stream')
+	async def stream():
+		async def _chunks():
+			yield 'data: 1\n\n'
+			yield 'data: 2\n\n'
+		return StreamingResponse(_chunks(), media_type='text/event-stream')
+
+	return TestClient(app, follow_redirects=False)
+
+
+def test_requests_without_valid_token_are_redirected_to_login():
+	client = _client()
+	assert client.get('/api/ping').headers['location'] == '/login'
+	client.cookies.set('auth_token', '123:forged')
+	assert client.get('/api/ping').status_code == 302
+	client.cookies.set('auth_token', auth.create_token())
+	assert client.get('/api/ping').json() == {'ok': True}
+
+
+def test_exemptions_match_whole_first_segment():
+	client = _client()
+	assert client.get('/login').status_code == 200
+	assert client.get('/static/app.js').status_code == 404  # passed through, no such route here
+	assert client.get('/loginx').status_code == 302
+	assert auth.is_exempt_path('/static/css/x.css')
+	assert not auth.is_exempt_path('/staticfiles')
+	assert not auth.is_exempt_path('/')
+
+
+def test_streaming_responses_pass_through():
+	client = _client()
+	client.cookies.set('auth_token', auth.create_token())
+	with client.stream('GET', '/stream') as response:
+		assert response.status_code == 200
+		assert ''.join(response.iter_text()) == 'data: 1\n\ndata: 2\n\n'
+
+
+def test_verified_tokens_are_cached_without_outliving_max_age(monkeypatch):
+	signed = []
+	original = auth._sign_token
+	monkeypatch.setattr(auth, '_sign_token', lambda ts: signed.append(ts) or original(ts))
+	monkeypatch.setattr(auth.time, 'time', lambda: 1_000_000)
+	token = auth.create_token()
+	signed.clear()
+
+	assert auth.verify_token(token)
+	assert auth.verify_token(token)
+	assert len(signed) == 1
+
+	monkeypatch.setattr(auth.time, 'time', lambda: 1_000_000 + auth.TOKEN_MAX_AGE + 1)
+	assert not auth.verify_token(token)
+	assert token not in auth._verified_tokens
+
+
+def test_token_cache_is_bounded(monkeypatch):
+	monkeypatch.setattr(auth, 'TOKEN_CACHE_SIZE', 2)
+	now = int(auth.time.time())
+	tokens = [f'{ts}:{auth._sign_token(str(ts))}' for ts in (now - 3, now - 2, now - 1)]
+	for token in tokens:
+		assert auth.verify_token(token)
+	assert list(auth._verified_tokens) == tokens[1:]
+	assert not auth.verify_token('')
+	assert not auth.verify_token(f'{now}:{"0" * 32}')
+	assert len(auth._verified_tokens) == 2
@@ -0,0 +1,74 @@
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+
+def _insert_points(db_path, points):
+	conn = sqlite3.connect(db_path)
+	conn.executemany('INSERT INTO balance_series (account_id, ts, quota, used) VALUES (?, ?, ?, ?)', points)
+	conn.commit()
+	conn.close()
+
+
+def test_downsampling_keeps_last_min_and_max_per_bucket(db_path):
+	# 100 readings over [0, 99], quota dips in the middle of every 10-second bucket
+	_insert_points(db_path, [(1, ts, 50.0 if ts % 10 == 5 else float(ts), None) for ts in range(100)])
+
+	last = asyncio.run(database.get_balance_series([1], 0, 99, points=10, agg='last'))[1]
+	low = asyncio.run(database.get_balance_series([1], 0, 99, points=10, agg='min'))[1]
+	high = asyncio.run(database.get_balance_series([1], 0, 99, points=10, agg='max'))[1]
+
+	assert last['ts'] == [9, 19, 29, 39, 49, 59, 69, 79, 89, 99]
+	assert last['quota'] == [float(ts) for ts in last['ts']]
+	assert low['quota'][:6] == [0.0, 10.0, 20.0, 30.0, 40.0, 50.0]
+	assert high['quota'][:6] == [50.0, 50.0, 50.0, 50.0, 50.0, 59.0]
+	assert len(last['ts']) == len(low['ts']) == len(high['ts']) == 10
+
+
+def test_series_range_excludes_other_accounts_and_outside_points(db_path):
+	_insert_points(db_path, [(1, 10, 1.0, 0.1), (1, 20, 2.0, 0.2), (1, 30, 3.0, 0.3), (2, 20, 9.0, 0.9)])
+
+	series = asyncio.run(database.get_balance_series([1, 2], 15, 25, points=5))
+
+	assert series[1] == {'ts': [20], 'quota': [2.0], 'used': [0.2]}
+	assert series[2] == {'ts': [20], 'quota': [9.0], 'used': [0.9]}
+
+
+def test_add_checkin_log_appends_balance_point(db_path):
+	asyncio.run(database.add_checkin_log(
+		account_id=1, account_name='acc', provider='p', status='success', balance=12.5, used_quota=1.5,
+	))
+	asyncio.run(database.add_checkin_log(account_id=1, account_name='acc', provider='p', status='failed'))
+
+	conn = sqlite3.connect(db_path)
+	rows = conn.execute('SELECT account_id, quota, used FROM balance_series').fetchall()
+	conn.close()
+	assert rows == [(1, 12.5, 1.5)]
+
+
+def test_delete_account_drops_its_stats_and_balance_series(db_path):
+	async def _run():
+		account_id = await database.create_account('acc', 'anyrouter', cookies='{}', api_user='1')
+		other_id = await database.create_account('other', 'anyrouter', cookies='{}', api_user='2')
+		for target in (account_id, other_id):
+			await database.add_checkin_log(
+				account_id=target, account_name='acc', provider='p', status='success', balance=3.0,
+			)
+		await database.delete_account(account_id)
+		await database.close_db()
+		return account_id, other_id
+
+	account_id, other_id = asyncio.run(_run())
+	conn = sqlite3.connect(db_path)
+	series = [row[0] for row in conn.execute('SELECT account_id FROM balance_series')]
+	stats = [row[0] for row in conn.execute('SELECT account_id FROM account_stats')]
+	conn.close()
+	assert series == [other_id]
+	assert stats == [other_id]
@@ -0,0 +1,91 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from web import database, scheduler
+from web.routes import checkin as checkin_routes
+
+
+@pytest.fixture(autouse=True)
+def empty_inflight(monkeypatch):
+	monkeypatch.setattr(scheduler, '_inflight', {})
+
+
+def test_concurrent_requests_for_one_account_share_a_single_run(monkeypatch):
+	calls = []
+
+	async def _fake_single(acc, triggered_by='manual'):
+		calls.append((acc['id'], triggered_by))
+		await asyncio.sleep(0.01)
+		return {'success': True, 'status': 'success', 'message': acc['name']}
+
+	monkeypatch.setattr(scheduler, 'run_checkin_single', _fake_single)
+
+	async def _run():
+		a, b = {'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}
+		results = await asyncio.gather(
+			scheduler.run_checkin_shared(a, 'schedule'),
+			scheduler.run_checkin_shared(a, 'manual'),
+			scheduler.run_checkin_shared(b, 'manual'),
+		)
+		inflight_after = dict(scheduler._inflight)
+		again = await scheduler.run_checkin_shared(a, 'manual')
+		return results, inflight_after, again
+
+	results, inflight_after, again = asyncio.run(_run())
+	assert calls == [(1, 'schedule'), (2, 'manual'), (1, 'manual')]
+	assert [shared for _, shared in results] == [False, True, False]
+	assert results[0][0] is results[1][0]
+	assert inflight_after == {}
+	assert again[1] is False
+
+
+def test_shared_run_survives_a_cancelled_caller_and_propagates_errors(monkeypatch):
+	async def _run():
+		gate = asyncio.Event()
+
+		async def _fake_single(acc, triggered_by='manual'):
+			await gate.wait()
+			raise RuntimeError('login failed')
+
+		monkeypatch.setattr(scheduler, 'run_checkin_single', _fake_single)
+		acc = {'id': 7, 'name': 'x'}
+		first = asyncio.create_task(scheduler.run_checkin_shared(acc))
+		await asyncio.sleep(0)
+		second = asyncio.create_task(scheduler.run_checkin_shared(acc))
+		await asyncio.sleep(0)
+		first.cancel()
+		gate.set()
+		with pytest.raises(RuntimeError, match='login failed'):
+			await second
+		return first.cancelled()
+
+	assert asyncio.run(_run()) is True
+	assert scheduler._inflight == {}
+
+
+def test_single_checkin_route_reports_shared(db_path, monkeypatch):
+	async def _create():
+		account_id = await database.create_account('acc', 'anyrouter', cookies='{}', api_user='1')
+		await database.close_db()
+		return account_id
+
+	account_id = asyncio.run(_create())
+
+	async def _fake_shared(account, triggered_by='manual'):
+		return {'success': True, 'status': 'already_checked_in', 'message': 'done'}, True
+
+	monkeypatch.setattr(scheduler, 'run_checkin_shared', _fake_shared)
+	app = FastAPI()
+	app.include_router(checkin_routes.router)
+	body = TestClient(app).post(f'/api/checkin/{account_id}').json()
+	asyncio.run(database.close_db())
+	assert body == {'success': True, 'status': 'already_checked_in', 'message': 'done', 'shared': True}
@@ -0,0 +1,175 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from web import database, jobs, scheduler
+
+
+@pytest.fixture
+def db_path(db_path, monkeypatch):
+	monkeypatch.setattr(jobs, '_jobs', {})
+	return db_path
+
+
+def test_job_reports_progress_and_is_persisted(db_path, monkeypatch):
+	statuses = {'a': 'success', 'b': 'already_checked_in', 'c': 'failed'}
+	seen_progress = []
+
+	async def _fake_single(acc, triggered_by='schedule'):
+		job = next(iter(jobs._jobs.values()))
+		seen_progress.append((job.status, list(job.current), job.done))
+		return {'success': statuses[acc['name']] != 'failed', 'status': statuses[acc['name']]}
+
+	monkeypatch.setattr(scheduler, 'run_checkin_single', _fake_single)
+	from web import outbox
+
+	async def _no_enqueue(*args, **kwargs):
+		return 0
+
+	monkeypatch.setattr(outbox, 'enqueue_notification', _no_enqueue)
+
+	async def _run():
+		for name in statuses:
+			await database.create_account(name, 'anyrouter', cookies='{}', api_user='1')
+		job = await jobs.start_checkin_job('manual')
+		queued = job.to_dict()
+		await asyncio.gather(*jobs._tasks)
+		live = await jobs.get_job_status(job.id)
+		jobs._jobs.clear()
+		persisted = await jobs.get_job_status(job.id)
+		await database.close_db()
+		return queued, live, persisted
+
+	queued, live, persisted = asyncio.run(_run())
+	assert queued['status'] == 'queued'
+	assert seen_progress == [('running', ['a'], 0), ('running', ['b'], 1), ('running', ['c'], 2)]
+	assert live['status'] == 'completed'
+	assert live['done'] == live['total'] == 3
+	assert live['counts'] == {'success': 1, 'already_checked_in': 1, 'failed': 1}
+	assert live['current'] == []
+	assert persisted['status'] == 'completed'
+	assert persisted['counts'] == live['counts']
+	assert persisted['finished_at'] == live['finished_at']
+
+
+def test_crashing_run_marks_job_failed(db_path, monkeypatch):
+	async def _boom(triggered_by='schedule', job=None):
+		raise RuntimeError('scheduler exploded')
+
+	monkeypatch.setattr(scheduler, 'run_checkin_task', _boom)
+
+	async def _run():
+		job = await jobs.start_checkin_job('manual')
+		await asyncio.gather(*jobs._tasks)
+		jobs._jobs.clear()
+		status = await jobs.get_job_status(job.id)
+		await database.close_db()
+		return status
+
+	status = asyncio.run(_run())
+	assert status['status'] == 'failed'
+	assert status['error'] == 'scheduler exploded'
+
+
+def test_recover_jobs_fails_jobs_left_running_by_previous_process(db_path):
+	async def _run():
+		job = jobs.CheckinJob(id='stale', triggered_by='manual')
+		job.start(5)
+		job.begin_account('a')
+		await jobs.persist_job(job)
+		recovered = await jobs.recover_jobs()
+		status = await jobs.get_job_status('stale')
+		await database.close_db()
+		return recovered, status
+
+	recovered, status = asyncio.run(_run())
+	assert recovered == 1
+	assert status['status'] == 'failed'
+	assert status['current'] == []
+
+
+def test_eta_extrapolates_from_finished_accounts(monkeypatch):
+	job = jobs.CheckinJob(id='x', triggered_by='manual')
+	assert job.eta_seconds() is None
+	monkeypatch.setattr(jobs.time, 'monotonic', lambda: 100.0)
+	job.start(4)
+	job.finish_account('a', 'success')
+	monkeypatch.setattr(jobs.time, 'monotonic', lambda: 110.0)
+	assert job.eta_seconds() == 30.0
+
+
+def test_overlapping_run_requests_are_merged_into_the_active_job(db_path, monkeypatch):
+	calls = []
+	merges = []
+
+	async def _fake_single(acc, triggered_by='schedule'):
+		calls.append(acc['name'])
+		if acc['name'] == 'a' and not merges:
+			# 运行中：新启用一个账号并再次请求全部签到
+			await database.create_account('c', 'anyrouter', cookies='{}', api_user='1')
+			merges.append(await jobs.request_checkin_run('manual'))
+		return {'success': True, 'status': 'success'}
+
+	monkeypatch.setattr(scheduler, 'run_checkin_single', _fake_single)
+
+	async def _run():
+		for name in ('a', 'b'):
+			await database.create_account(name, 'anyrouter', cookies='{}', api_user='1')
+		job, merged = await jobs.request_checkin_run('schedule')
+		await asyncio.gather(*jobs._tasks)
+		forced, forced_merged = await jobs.request_checkin_run('manual', force=True)
+		await asyncio.gather(*jobs._tasks)
+		row = await database.get_checkin_job(job.id)
+		await database.close_db()
+		return job, merged, forced, forced_merged, row
+
+	job, merged, forced, forced_merged, row = asyncio.run(_run())
+	assert merged is False
+	assert merges == [(job, True)]
+	assert calls == ['a', 'b', 'c', 'a', 'b', 'c']
+	assert (job.status, job.total, job.done, job.merged) == ('completed', 3, 3, 1)
+	assert job.merged_triggers == ['manual']
+	assert (row['triggered_by'], row['merged_triggers']) == ('schedule', ['manual'])
+	assert forced is not job and forced_merged is False
+	assert jobs.get_active_job() is None
+
+
+def test_request_after_the_last_rescan_check_starts_a_new_job(db_path, monkeypatch):
+	from web import outbox
+
+	calls = []
+	requests = []
+
+	async def _fake_single(acc, triggered_by='schedule'):
+		calls.append(acc['name'])
+		return {'success': False, 'status': 'failed'}
+
+	async def _request_while_notifying(title, content, msg_type='text'):
+		# the run has checked every account and is wrapping up
+		if not requests:
+			requests.append(await jobs.request_checkin_run('manual'))
+		return 0
+
+	monkeypatch.setattr(scheduler, 'run_checkin_single', _fake_single)
+	monkeypatch.setattr(outbox, 'enqueue_notification', _request_while_notifying)
+
+	async def _run():
+		await database.create_account('a', 'anyrouter', cookies='{}', api_user='1')
+		job, _ = await jobs.request_checkin_run('schedule')
+		await asyncio.gather(*jobs._tasks)
+		await asyncio.gather(*jobs._tasks)
+		await database.close_db()
+		return job
+
+	job = asyncio.run(_run())
+	(late, late_merged), = requests
+	assert late_merged is False and late is not job
+	assert (job.status, job.merged) == ('completed', 0)
+	assert late.status == 'completed'
+	assert calls == ['a', 'a']
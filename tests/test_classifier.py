@@ -0,0 +1,70 @@
+import random
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.classifier import (
+	CATEGORY_KEYWORDS,
+	KeywordClassifier,
+	classify_result,
+	classify_results,
+	is_already_checked_in_message,
+)
+
+
+def _scan_in_order(status, message):
+	status_value = (status or '').strip().lower()
+	if status_value in ('success', 'already_checked_in'):
+		return status_value
+	text = str(message or '').strip().lower()
+	for category, keywords in CATEGORY_KEYWORDS:
+		if any(keyword in text for keyword in keywords):
+			return category
+	return 'unknown_error'
+
+
+def test_matches_in_order_scan_on_random_messages():
+	rng = random.Random(7)
+	keywords = [keyword for _, table in CATEGORY_KEYWORDS for keyword in table]
+	pieces = keywords + [keyword[:-2] for keyword in keywords] + ['ns', 'http', ' ', 'x', '签到']
+	for _ in range(5000):
+		message = ''.join(rng.choices(pieces, k=rng.randint(0, 5)))
+		message = message.upper() if rng.random() < 0.2 else message
+		assert classify_result('failed', message) == _scan_in_order('failed', message), message
+
+
+def test_priority_and_overlapping_keywords():
+	assert classify_result('failed', 'WAF challenge timed out') == 'waf_blocked'
+	assert classify_result('failed', 'invalid token, upstream 502') == 'auth_failed'
+	# 'provider not found' + 'ns' contains 'dns' across the keyword boundary
+	assert classify_result('failed', 'Provider not foundns') == 'network_error'
+	assert classify_result('failed', 'bad json from upstream') == 'config_error'
+	assert classify_result('failed', 'something odd') == 'unknown_error'
+	assert classify_result('failed', None) == 'unknown_error'
+	assert classify_result(' SUCCESS ', 'timeout') == 'success'
+	assert classify_result('already_checked_in', '') == 'already_checked_in'
+
+
+def test_longer_keyword_does_not_hide_its_prefix():
+	classifier = KeywordClassifier([('short', ('abc',)), ('long', ('abcdef',))])
+	assert classifier.classify('xabcdefx') == 'short'
+	assert classifier.classify('xab') is None
+
+
+def test_batch_matches_single_calls():
+	rows = [('failed', 'HTTP 503 Service Unavailable'), ('success', None), ('failed', 'HTTP 503 Service Unavailable'),
+		(None, 'cookie expired'), ('failed', '')]
+	assert classify_results(rows) == [classify_result(*row) for row in rows]
+	assert classify_results(iter(rows[:2])) == ['upstream_error', 'success']
+	assert classify_results([]) == []
+
+
+def test_already_checked_in_message():
+	assert is_already_checked_in_message('You have Already signed in today')
+	assert is_already_checked_in_message('今日已签到')
+	assert is_already_checked_in_message('already_check_in')
+	assert not is_already_checked_in_message('签到成功')
+	assert not is_already_checked_in_message(None)
@@ -0,0 +1,105 @@
+import asyncio
+import sys
+from email.utils import formatdate
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from web import conditional as conditional_module
+from web import database
+from web.conditional import conditional, etag_matches
+
+
+def _client(calls: list) -> TestClient:
+	app = FastAPI()
+
+	@app.get('/items')
+	@conditional('logs')
+	async def items(request: Request, page: int = 1):
+		calls.append(page)
+		return {'page': page}
+
+	return TestClient(app)
+
+
+def test_matching_etag_skips_the_handler_until_the_resource_changes():
+	calls = []
+	client = _client(calls)
+	first = client.get('/items?page=2')
+	assert first.status_code == 200
+	assert first.json() == {'page': 2}
+	assert first.headers['cache-control'] == 'no-cache'
+	etag = first.headers['etag']
+
+	cached = client.get('/items?page=2', headers={'If-None-Match': etag})
+	assert cached.status_code == 304
+	assert cached.content == b''
+	assert cached.headers['etag'] == etag
+	assert calls == [2]
+
+	database.bump_version('providers')
+	assert client.get('/items?page=2', headers={'If-None-Match': etag}).status_code == 304
+	database.bump_version('logs')
+	changed = client.get('/items?page=2', headers={'If-None-Match': etag})
+	assert changed.status_code == 200
+	assert changed.headers['etag'] != etag
+	assert calls == [2, 2]
+
+
+def test_last_modified_is_withheld_for_the_current_second(monkeypatch):
+	calls = []
+	client = _client(calls)
+	monkeypatch.setattr(database, '_changed_at', {**database._changed_at, 'logs': 1_000_000.5})
+
+	monkeypatch.setattr(conditional_module.time, 'time', lambda: 1_000_000.9)
+	assert 'last-modified' not in client.get('/items').headers
+
+	monkeypatch.setattr(conditional_module.time, 'time', lambda: 1_000_002.0)
+	last_modified = client.get('/items').headers['last-modified']
+	assert last_modified == formatdate(1_000_000, usegmt=True)
+	assert client.get('/items', headers={'If-Modified-Since': last_modified}).status_code == 304
+	earlier = formatdate(999_999, usegmt=True)
+	assert client.get('/items', headers={'If-Modified-Since': earlier}).status_code == 200
+	# If-None-Match wins over If-Modified-Since
+	assert client.get('/items', headers={'If-Modified-Since': last_modified, 'If-None-Match': '"x"'}).status_code == 200
+
+
+def test_etag_matching_handles_lists_weak_tags_and_wildcard():
+	assert etag_matches('"a", W/"b"', 'W/"b"')
+	assert etag_matches('"b"', 'W/"b"')
+	assert etag_matches('*', 'W/"b"')
+	assert not etag_matches('W/"c"', 'W/"b"')
+
+
+def test_writes_bump_only_their_resource(db_path):
+	async def _run():
+		changes = {}
+		before = database.get_versions(*database.RESOURCES)
+		account_id = await database.create_account('acc', 'anyrouter', cookies='{}', api_user='1')
+		changes['account'] = database.get_versions(*database.RESOURCES)
+		await database.add_checkin_log(account_id, 'acc', 'anyrouter', 'success', message='ok')
+		changes['log'] = database.get_versions(*database.RESOURCES)
+		await database.create_provider('custom', 'https://example.com')
+		changes['provider'] = database.get_versions(*database.RESOURCES)
+		await database.set_setting('cron_expression', '0 * * * *')
+		changes['setting'] = database.get_versions(*database.RESOURCES)
+		await database.close_db()
+		return before, changes
+
+	before, changes = asyncio.run(_run())
+	deltas = {}
+	previous = before
+	for name, versions in changes.items():
+		deltas[name] = [resource for resource, a, b in zip(database.RESOURCES, previous, versions) if a != b]
+		previous = versions
+	assert deltas == {
+		'account': ['accounts'],
+		'log': ['logs'],
+		'provider': ['providers'],
+		'setting': ['settings'],
+	}
@@ -0,0 +1,97 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from web import app as web_app
+from web import database
+
+
+@pytest.fixture
+def db_path(db_path, monkeypatch):
+	monkeypatch.setattr(web_app, '_dashboard_snapshot', None)
+	return db_path
+
+
+async def _seed():
+	ids = [
+		await database.create_account(name, 'anyrouter', cookies='{"session": "secret"}', api_user='1')
+		for name in ('a', 'b', 'c', 'd')
+	]
+	await database.update_account(ids[0], last_status='success', last_balance=10.25)
+	await database.update_account(ids[1], last_status='already_checked_in', last_balance=5.5)
+	await database.update_account(ids[2], last_status='failed')
+	await database.toggle_account(ids[3])
+	return ids
+
+
+def test_summary_is_aggregated_in_sql(db_path):
+	async def _run():
+		empty = await database.get_dashboard_summary()
+		await _seed()
+		summary = await database.get_dashboard_summary()
+		accounts = await database.get_dashboard_accounts()
+		await database.close_db()
+		return empty, summary, accounts
+
+	empty, summary, accounts = asyncio.run(_run())
+	assert empty == {'total': 0, 'enabled': 0, 'success': 0, 'failed': 0, 'total_balance': 0}
+	assert summary == {'total': 4, 'enabled': 3, 'success': 2, 'failed': 1, 'total_balance': 15.75}
+	assert [acc['name'] for acc in accounts] == ['a', 'b', 'c', 'd']
+	assert 'cookies' not in accounts[0] and 'password' not in accounts[0]
+
+
+def test_snapshot_is_reused_until_accounts_or_logs_change(db_path, monkeypatch):
+	builds = []
+	original = database.get_dashboard_summary
+
+	async def _counting_summary():
+		builds.append(1)
+		return await original()
+
+	monkeypatch.setattr(database, 'get_dashboard_summary', _counting_summary)
+
+	async def _run():
+		ids = await _seed()
+		first = await web_app._load_dashboard_snapshot()
+		again = await web_app._load_dashboard_snapshot()
+		await database.add_checkin_log(ids[2], 'c', 'anyrouter', 'success', balance=1.0, message='ok')
+		await database.update_account(ids[2], last_status='success', last_balance=1.0)
+		after_run = await web_app._load_dashboard_snapshot()
+		await database.close_db()
+		return first, again, after_run
+
+	first, again, after_run = asyncio.run(_run())
+	assert again is first
+	assert len(builds) == 2
+	assert first['summary']['failed'] == 1
+	assert after_run['summary'] == {'total': 4, 'enabled': 3, 'success': 3, 'failed': 0, 'total_balance': 16.75}
+	assert 'id="card-3"' in after_run['account_cards']
+	assert [log['account_name'] for log in after_run['recent_logs']] == ['c']
+	assert after_run['recent_logs'][0]['error_category'] == 'success'
+
+
+def test_write_during_build_does_not_pin_a_stale_snapshot(db_path, monkeypatch):
+	original = database.get_dashboard_summary
+
+	async def _summary_racing_a_write():
+		summary = await original()
+		database.bump_version('logs')
+		return summary
+
+	async def _run():
+		await _seed()
+		monkeypatch.setattr(database, 'get_dashboard_summary', _summary_racing_a_write)
+		first = await web_app._load_dashboard_snapshot()
+		monkeypatch.setattr(database, 'get_dashboard_summary', original)
+		second = await web_app._load_dashboard_snapshot()
+		await database.close_db()
+		return first, second
+
+	first, second = asyncio.run(_run())
+	assert second is not first
@@ -0,0 +1,54 @@
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+
+def test_init_db_records_every_migration_once(db_file):
+	asyncio.run(database.init_db())
+	asyncio.run(database.init_db())
+
+	conn = sqlite3.connect(db_file)
+	versions = [row[0] for row in conn.execute('SELECT version FROM schema_version ORDER BY version')]
+	conn.close()
+	assert versions == [version for version, _ in database.MIGRATIONS]
+
+
+def test_init_db_skips_applied_migrations(db_file, monkeypatch):
+	asyncio.run(database.init_db())
+
+	async def _fail(db):
+		raise AssertionError('migration re-applied')
+
+	monkeypatch.setattr(database, 'MIGRATIONS', [(version, _fail) for version, _ in database.MIGRATIONS])
+	asyncio.run(database.init_db())
+
+
+def test_log_queries_use_secondary_indexes(db_file):
+	asyncio.run(database.init_db())
+
+	conn = sqlite3.connect(db_file)
+	plans = {
+		'list': conn.execute(
+			'EXPLAIN QUERY PLAN SELECT * FROM checkin_logs ORDER BY created_at DESC, id DESC LIMIT 30'
+		).fetchall(),
+		'by_account': conn.execute(
+			'EXPLAIN QUERY PLAN SELECT * FROM checkin_logs WHERE account_id = ? '
+			'ORDER BY created_at DESC, id DESC LIMIT 30', (1,)
+		).fetchall(),
+		'count_status': conn.execute(
+			'EXPLAIN QUERY PLAN SELECT COUNT(*) FROM checkin_logs WHERE status = ?', ('failed',)
+		).fetchall(),
+	}
+	conn.close()
+
+	for name, plan in plans.items():
+		detail = ' '.join(row[3] for row in plan)
+		assert 'USING' in detail and 'INDEX' in detail, name
+		assert 'TEMP B-TREE' not in detail, name
@@ -0,0 +1,71 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+
+def test_pooled_connection_has_profile_applied(db_path):
+	async def _pragmas():
+		async with database.connection() as db:
+			values = {}
+			for name in ('journal_mode', 'synchronous', 'busy_timeout', 'temp_store', 'cache_size'):
+				cursor = await db.execute(f'PRAGMA {name}')
+				values[name] = (await cursor.fetchone())[0]
+		await database.close_db_pool()
+		return values
+
+	values = asyncio.run(_pragmas())
+	assert values['journal_mode'] == 'wal'
+	assert values['synchronous'] == 1  # NORMAL
+	assert values['busy_timeout'] == 5000
+	assert values['temp_store'] == 2  # MEMORY
+	assert values['cache_size'] < 0
+
+
+def test_connections_are_reused_and_opened_once(db_path, monkeypatch):
+	opened = []
+	original = database._open_connection
+
+	async def _counting_open(path):
+		opened.append(path)
+		return await original(path)
+
+	monkeypatch.setattr(database, '_open_connection', _counting_open)
+
+	async def _run():
+		for _ in range(5):
+			await database.get_all_accounts()
+		await asyncio.gather(*(database.get_all_accounts() for _ in range(10)))
+		await database.close_db_pool()
+
+	asyncio.run(_run())
+	assert 1 <= len(opened) <= database.SQLITE_POOL_SIZE
+	assert set(opened) == {db_path}
+
+
+def test_uncommitted_transaction_is_rolled_back_on_release(db_path):
+	async def _run():
+		async with database.connection() as db:
+			await db.execute("INSERT INTO settings (key, value) VALUES ('leak', '1')")
+		async with database.connection() as db:
+			cursor = await db.execute("SELECT COUNT(*) FROM settings WHERE key = 'leak'")
+			count = (await cursor.fetchone())[0]
+		await database.close_db_pool()
+		return count
+
+	assert asyncio.run(_run()) == 0
+
+
+def test_new_event_loop_gets_a_fresh_pool(db_path):
+	asyncio.run(database.get_all_accounts())
+	first = database._pool
+	asyncio.run(database.get_all_accounts())
+	assert database._pool is not first
+	assert database._pool.path == db_path
+	asyncio.run(database.close_db_pool())
+	assert database._pool is None
@@ -0,0 +1,115 @@
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+
+def _count(path: str, table: str) -> int:
+	conn = sqlite3.connect(path)
+	try:
+		return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+	finally:
+		conn.close()
+
+
+def test_concurrent_writes_are_grouped_into_few_transactions(db_path, monkeypatch):
+	batches = []
+	original = database._Writer._apply
+
+	async def _recording_apply(self, batch):
+		batches.append(len(batch))
+		await original(self, batch)
+
+	monkeypatch.setattr(database._Writer, '_apply', _recording_apply)
+
+	async def _run():
+		await asyncio.gather(*(
+			database.add_checkin_log(None, f'acc-{i}', 'anyrouter', 'success', message='ok') for i in range(50)
+		))
+		await database.close_db()
+
+	asyncio.run(_run())
+	assert _count(db_path, 'checkin_logs') == 50
+	assert sum(batches) == 50
+	assert len(batches) < 50
+
+
+def test_failing_write_only_rolls_back_itself(db_path):
+	async def _bad(db):
+		await db.execute("INSERT INTO settings (key, value) VALUES ('bad', '1')")
+		raise ValueError('boom')
+
+	async def _run():
+		results = await asyncio.gather(
+			database.set_setting('good', '1'),
+			database._write(_bad),
+			database.create_account('acc', 'anyrouter', cookies='{}', api_user='1'),
+			return_exceptions=True,
+		)
+		await database.close_db()
+		return results
+
+	results = asyncio.run(_run())
+	assert results[0] is None
+	assert isinstance(results[1], ValueError)
+	assert results[2] == 1
+
+	conn = sqlite3.connect(db_path)
+	keys = {row[0] for row in conn.execute('SELECT key FROM settings')}
+	conn.close()
+	assert 'good' in keys and 'bad' not in keys
+	assert _count(db_path, 'accounts') == 1
+
+
+def test_full_queue_applies_back_pressure_without_losing_writes(db_path, monkeypatch):
+	monkeypatch.setattr(database, 'WRITE_QUEUE_SIZE', 2)
+	monkeypatch.setattr(database, 'WRITE_BATCH_SIZE', 3)
+
+	async def _run():
+		await asyncio.gather(*(database.set_setting(f'k{i}', str(i)) for i in range(20)))
+		assert database._writer.queue.maxsize == 2
+		await database.close_db()
+
+	asyncio.run(_run())
+	assert _count(db_path, 'settings') >= 20
+
+
+def test_writes_are_visible_to_readers_once_awaited(db_path):
+	async def _run():
+		account_id = await database.create_account('acc', 'anyrouter', cookies='{}', api_user='1')
+		await database.toggle_account(account_id)
+		account = await database.get_account(account_id)
+		await database.close_db()
+		return account
+
+	assert asyncio.run(_run())['enabled'] == 0
+
+
+def test_write_alone_runs_between_batches_outside_a_transaction(db_path):
+	seen = []
+
+	async def _alone(db):
+		cursor = await db.execute("SELECT COUNT(*) FROM settings WHERE key LIKE 'k%'")
+		seen.append(((await cursor.fetchone())[0], db.in_transaction))
+		return 'done'
+
+	async def _run():
+		results = await asyncio.gather(
+			database.set_setting('k1', '1'),
+			database.set_setting('k2', '1'),
+			database._write_alone(_alone),
+			database.set_setting('k3', '1'),
+		)
+		await database.close_db()
+		return results
+
+	results = asyncio.run(_run())
+	assert results[2] == 'done'
+	assert seen == [(2, False)]
+	assert _count(db_path, 'settings') >= 3
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database, scheduler
+from web.events import EventBroker, format_sse
+
+
+def _drain(sub) -> list:
+	items = []
+	while not sub.queue.empty():
+		items.append(sub.queue.get_nowait())
+	return items
+
+
+def test_publish_fans_out_to_every_subscriber():
+	async def _run():
+		broker = EventBroker()
+		with broker.subscribe() as a, broker.subscribe() as b:
+			assert broker.subscriber_count == 2
+			broker.publish('run_started', {'total': 2})
+			return _drain(a), _drain(b)
+
+	a, b = asyncio.run(_run())
+	assert a == b == [('run_started', {'total': 2})]
+
+
+def test_slow_subscriber_drops_events_without_blocking_others():
+	async def _run():
+		broker = EventBroker(queue_size=2)
+		with broker.subscribe() as slow, broker.subscribe() as fast:
+			for i in range(5):
+				if i == 4:
+					_drain(fast)
+				broker.publish('account_result', {'i': i})
+			return _drain(slow), slow.take_dropped(), slow.take_dropped(), _drain(fast)
+
+	slow_events, dropped, dropped_again, fast_events = asyncio.run(_run())
+	assert [data['i'] for _, data in slow_events] == [0, 1]
+	assert dropped == 3
+	assert dropped_again == 0
+	assert fast_events == [('account_result', {'i': 4})]
+
+
+def test_unsubscribed_clients_receive_nothing():
+	async def _run():
+		broker = EventBroker()
+		with broker.subscribe() as sub:
+			pass
+		broker.publish('run_finished', {})
+		return broker.subscriber_count, _drain(sub)
+
+	assert asyncio.run(_run()) == (0, [])
+
+
+def test_format_sse_frames_event_as_single_json_line():
+	frame = format_sse('account_result', {'account_name': '账号\n1', 'balance': 1.5})
+	assert frame.startswith('event: account_result\ndata: ')
+	assert frame.endswith('\n\n')
+	data_line = frame.splitlines()[1]
+	assert json.loads(data_line[len('data: '):]) == {'account_name': '账号\n1', 'balance': 1.5}
+
+
+def test_checkin_run_publishes_start_results_and_finish(db_path, monkeypatch):
+	broker = EventBroker()
+	monkeypatch.setattr(scheduler, 'broker', broker)
+
+	async def _fake_single(acc, triggered_by='schedule'):
+		status = 'failed' if acc['name'] == 'bad' else 'success'
+		await scheduler._record_checkin(
+			account_id=acc['id'], account_name=acc['name'], provider=acc['provider'], status=status,
+			balance=12.5 if status == 'success' else None, message='connection timed out' if status == 'failed' else 'ok',
+			triggered_by=triggered_by, duration_ms=120,
+		)
+		return {'success': status == 'success', 'status': status}
+
+	monkeypatch.setattr(scheduler, 'run_checkin_single', _fake_single)
+	from web import outbox
+
+	async def _no_enqueue(*args, **kwargs):
+		return 0
+
+	monkeypatch.setattr(outbox, 'enqueue_notification', _no_enqueue)
+
+	async def _run():
+		for name in ('good', 'bad'):
+			await database.create_account(name, 'anyrouter', cookies='{}', api_user='1')
+		with broker.subscribe() as sub:
+			await scheduler.run_checkin_task(triggered_by='schedule')
+			events = _drain(sub)
+		await database.close_db()
+		return events
+
+	events = asyncio.run(_run())
+	assert [name for name, _ in events] == ['run_started', 'account_result', 'account_result', 'run_finished']
+	assert events[0][1]['total'] == 2
+	good, bad = events[1][1], events[2][1]
+	assert (good['account_name'], good['status'], good['balance'], good['latency_ms']) == ('good', 'success', 12.5, 120)
+	assert (bad['status'], bad['category']) == ('failed', 'network_error')
+	assert events[3][1] == {
+		'triggered_by': 'schedule', 'merged_triggers': [], 'success_count': 1, 'failed_count': 1, 'total_count': 2,
+	}
@@ -0,0 +1,128 @@
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+
+def test_add_checkin_log_stores_and_returns_category(db_path):
+	async def _run():
+		category = await database.add_checkin_log(1, 'acc', 'p', 'failed', message='WAF challenge page returned')
+		logs = await database.get_checkin_logs(limit=1)
+		await database.close_db()
+		return category, logs
+
+	category, logs = asyncio.run(_run())
+	assert category == 'waf_blocked'
+	assert logs[0]['error_category'] == 'waf_blocked'
+
+
+def test_migration_backfills_existing_rows(db_path):
+	conn = sqlite3.connect(db_path)
+	conn.executemany(
+		'INSERT INTO checkin_logs (account_id, account_name, provider, status, message, created_at) '
+		'VALUES (1, ?, ?, ?, ?, ?)',
+		[
+			('acc', 'p', 'failed', 'cookie expired', '2026-01-01T01:00:00'),
+			('acc', 'p', 'failed', 'connection timed out', '2026-01-01T02:00:00'),
+			('acc', 'p', 'success', 'ok', '2026-01-01T03:00:00'),
+		],
+	)
+	conn.commit()
+	conn.close()
+
+	async def _run():
+		db = await database.get_db()
+		try:
+			await database._migrate_checkin_logs_error_category(db)
+			await db.commit()
+		finally:
+			await db.close()
+
+	asyncio.run(_run())
+	conn = sqlite3.connect(db_path)
+	categories = [row[0] for row in conn.execute('SELECT error_category FROM checkin_logs ORDER BY id')]
+	conn.close()
+	assert categories == ['auth_failed', 'network_error', 'success']
+
+
+def test_filter_and_count_by_category_in_sql(db_path):
+	async def _run():
+		for message in ('WAF challenge', 'cloudflare blocked', 'timed out'):
+			await database.add_checkin_log(1, 'acc', 'p', 'failed', message=message)
+		await database.add_checkin_log(2, 'other', 'p', 'failed', message='WAF challenge')
+		conn = sqlite3.connect(database.DB_PATH)
+		conn.execute("UPDATE checkin_logs SET created_at = '2020-01-01T00:00:00' WHERE message = 'cloudflare blocked'")
+		conn.commit()
+		conn.close()
+
+		waf = await database.get_checkin_logs_keyset(category='waf_blocked')
+		recent_waf = await database.get_log_count(category='waf_blocked', since='2026-01-01')
+		counts = await database.get_log_category_counts()
+		account_counts = await database.get_log_category_counts(account_id=1, since='2026-01-01')
+		await database.close_db()
+		return waf, recent_waf, counts, account_counts
+
+	waf, recent_waf, counts, account_counts = asyncio.run(_run())
+	assert len(waf) == 3
+	assert recent_waf == 2
+	assert counts == {'waf_blocked': 3, 'network_error': 1}
+	assert account_counts == {'waf_blocked': 1, 'network_error': 1}
+
+
+def test_cached_category_counts_are_reused_until_a_log_is_written(db_path, monkeypatch):
+	monkeypatch.setattr(database, '_category_counts_cache', {})
+	queries = []
+	count = database.get_log_category_counts
+
+	async def _counting(**filters):
+		queries.append(filters)
+		return await count(**filters)
+
+	monkeypatch.setattr(database, 'get_log_category_counts', _counting)
+
+	async def _run():
+		await database.add_checkin_log(1, 'acc', 'p', 'failed', message='WAF challenge')
+		first = await database.get_log_category_counts_cached()
+		again = await database.get_log_category_counts_cached()
+		other = await database.get_log_category_counts_cached(account_id=2)
+		await database.add_checkin_log(1, 'acc', 'p', 'failed', message='timed out')
+		after_write = await database.get_log_category_counts_cached()
+		await database.close_db()
+		return first, again, other, after_write
+
+	first, again, other, after_write = asyncio.run(_run())
+	assert first == again == {'waf_blocked': 1}
+	assert other == {}
+	assert after_write == {'waf_blocked': 1, 'network_error': 1}
+	assert len(queries) == 3
+
+
+def test_cached_log_count_changes_after_a_log_is_written(db_path, monkeypatch):
+	monkeypatch.setattr(database, '_log_count_cache', {})
+
+	async def _run():
+		before = await database.get_log_count_cached()
+		await database.add_checkin_log(1, 'acc', 'p', 'failed', message='timed out')
+		after = await database.get_log_count_cached()
+		await database.close_db()
+		return before, after
+
+	assert asyncio.run(_run()) == (0, 1)
+
+
+def test_category_filter_uses_index(db_path):
+	conn = sqlite3.connect(db_path)
+	plan = ' '.join(
+		row[3] for row in conn.execute(
+			'EXPLAIN QUERY PLAN SELECT COUNT(*) FROM checkin_logs WHERE error_category = ? AND created_at >= ?',
+			('waf_blocked', '2026-01-01'),
+		)
+	)
+	conn.close()
+	assert 'idx_checkin_logs_category_created' in plan
@@ -0,0 +1,102 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from web import database
+from web.routes import logs as logs_routes
+
+
+@pytest.fixture
+def db_path(db_path):
+	conn = sqlite3.connect(db_path)
+	conn.executemany(
+		'''INSERT INTO checkin_logs (account_id, account_name, provider, status, balance, message,
+		   error_category, created_at) VALUES (?, ?, 'p', ?, ?, ?, ?, ?)''',
+		[
+			(1, 'acc-1', 'success', 10.5, 'ok', 'success', '2026-03-01T08:00:00'),
+			(2, 'acc-2', 'failed', None, 'WAF "challenge", retry', 'waf_blocked', '2026-03-02T08:00:00'),
+			(1, 'acc-1', 'failed', None, '签到失败：Cookie 已过期', 'auth_failed', '2026-03-03T08:00:00'),
+			(1, 'acc-1', 'success', 12.0, 'ok', 'success', '2026-03-04T08:00:00'),
+		],
+	)
+	conn.commit()
+	conn.close()
+	return db_path
+
+
+def _client() -> TestClient:
+	app = FastAPI()
+	app.include_router(logs_routes.router)
+	return TestClient(app)
+
+
+def test_batches_are_keyset_paged_oldest_first(db_path):
+	async def _run():
+		batches = [
+			batch async for batch in database.iter_checkin_log_batches(batch_size=3, account_id=1)
+		]
+		await database.close_db()
+		return batches
+
+	batches = asyncio.run(_run())
+	assert [len(batch) for batch in batches] == [3]
+	assert [row[1][:10] for row in batches[0]] == ['2026-03-01', '2026-03-03', '2026-03-04']
+
+	async def _small_batches():
+		sizes = [len(b) async for b in database.iter_checkin_log_batches(batch_size=1)]
+		await database.close_db()
+		return sizes
+
+	assert asyncio.run(_small_batches()) == [1, 1, 1, 1]
+
+
+def test_csv_export_is_gzipped_and_honours_filters_and_date_range(db_path, monkeypatch):
+	monkeypatch.setattr(logs_routes, 'EXPORT_BATCH_SIZE', 1)
+	response = _client().get(
+		'/api/logs/export?status=failed&since=2026-03-02&until=2026-03-03',
+		headers={'Accept-Encoding': 'gzip'},
+	)
+	assert response.status_code == 200
+	assert response.headers['content-encoding'] == 'gzip'
+	assert response.headers['content-disposition'].endswith('.csv"')
+	text = response.content.decode('utf-8-sig')
+	rows = list(csv.reader(io.StringIO(text)))
+	assert rows[0] == list(database.LOG_EXPORT_COLUMNS)
+	assert [(row[3], row[6], row[11]) for row in rows[1:]] == [
+		('acc-2', 'waf_blocked', 'WAF "challenge", retry'),
+		('acc-1', 'auth_failed', '签到失败：Cookie 已过期'),
+	]
+
+
+def test_ndjson_export_without_gzip(db_path):
+	response = _client().get(
+		'/api/logs/export?format=ndjson&category=success', headers={'Accept-Encoding': 'identity'}
+	)
+	assert 'content-encoding' not in response.headers
+	assert response.headers['content-type'] == 'application/x-ndjson'
+	records = [json.loads(line) for line in response.text.splitlines()]
+	assert [(r['created_at'][:10], r['balance']) for r in records] == [('2026-03-01', 10.5), ('2026-03-04', 12.0)]
+
+
+def test_gzip_stream_round_trips():
+	async def _chunks():
+		for chunk in ('a,b\n', '中文\n', ''):
+			yield chunk
+
+	async def _collect():
+		return b''.join([part async for part in logs_routes._gzip_stream(_chunks())])
+
+	assert gzip.decompress(asyncio.run(_collect())).decode() == 'a,b\n中文\n'
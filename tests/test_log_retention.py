@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database, scheduler
+
+
+def _insert_logs(db_path, rows):
+	conn = sqlite3.connect(db_path)
+	conn.executemany(
+		'''INSERT INTO checkin_logs (account_id, account_name, provider, status, balance, used_quota,
+		   message, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+		rows,
+	)
+	conn.commit()
+	conn.close()
+
+
+def test_prune_rolls_old_logs_into_daily_stats(db_path):
+	old_day = datetime.now() - timedelta(days=40)
+	recent = datetime.now().isoformat()
+	_insert_logs(db_path, [
+		(1, 'acc', 'p', 'success', 10.0, 1.0, 'ok', old_day.replace(hour=1).isoformat()),
+		(1, 'acc', 'p', 'failed', None, None, 'cookie expired', old_day.replace(hour=2).isoformat()),
+		(1, 'acc', 'p', 'failed', None, None, 'connection timed out', old_day.replace(hour=3).isoformat()),
+		(1, 'acc', 'p', 'already_checked_in', 12.5, 2.0, 'already checked in', old_day.replace(hour=4).isoformat()),
+		(2, 'other', 'p', 'success', 5.0, 0.5, 'ok', old_day.replace(hour=5).isoformat()),
+		(1, 'acc', 'p', 'success', 20.0, 3.0, 'ok', recent),
+	])
+
+	result = asyncio.run(database.prune_checkin_logs(30, chunk_size=2))
+
+	assert result['rolled_up'] == 5
+	stats = {row['account_id']: row for row in asyncio.run(database.get_daily_stats())}
+	assert stats[1]['day'] == old_day.date().isoformat()
+	assert stats[1]['total_count'] == 4
+	assert stats[1]['success_count'] == 1
+	assert stats[1]['already_checked_in_count'] == 1
+	assert stats[1]['failed_count'] == 2
+	assert stats[1]['category_counts'] == {'auth_failed': 1, 'network_error': 1}
+	assert stats[1]['last_balance'] == 12.5
+	assert stats[2]['total_count'] == 1
+
+	remaining = asyncio.run(database.get_checkin_logs())
+	assert [log['created_at'] for log in remaining] == [recent]
+
+
+def test_database_uses_incremental_auto_vacuum(db_path):
+	conn = sqlite3.connect(db_path)
+	assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+	conn.close()
+
+
+def test_prune_releases_freed_pages(db_path):
+	old_day = datetime.now() - timedelta(days=40)
+	_insert_logs(db_path, [
+		(1, 'acc', 'p', 'failed', None, None, 'x' * 2000, old_day.replace(hour=1).isoformat())
+		for _ in range(500)
+	])
+
+	def _pages():
+		conn = sqlite3.connect(db_path)
+		pages = conn.execute('PRAGMA page_count').fetchone()[0], conn.execute('PRAGMA freelist_count').fetchone()[0]
+		conn.close()
+		return pages
+
+	pages_before, _ = _pages()
+	result = asyncio.run(database.prune_checkin_logs(30))
+	pages_after, free_after = _pages()
+
+	assert result['rolled_up'] == 500
+	assert free_after == 0
+	assert pages_after < pages_before / 2
+
+
+def test_log_retention_days_setting_is_clamped(db_path):
+	asyncio.run(database.set_setting('log_retention_days', '3'))
+	assert scheduler.get_log_retention_days() == scheduler.MIN_LOG_RETENTION_DAYS
+
+	asyncio.run(database.set_setting('log_retention_days', '0'))
+	assert scheduler.get_log_retention_days() == 0
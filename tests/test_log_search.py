@@ -0,0 +1,90 @@
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+
+def _seed(path: str, rows: list[tuple]):
+	conn = sqlite3.connect(path)
+	conn.executemany(
+		'INSERT INTO checkin_logs (account_id, account_name, provider, status, message, created_at) '
+		'VALUES (?, ?, ?, ?, ?, ?)',
+		rows,
+	)
+	conn.commit()
+	conn.close()
+
+
+def _messages(logs: list[dict]) -> list[str]:
+	return [log['message'] for log in logs]
+
+
+def test_search_matches_message_account_and_provider(db_path):
+	_seed(db_path, [
+		(1, 'alice', 'anyrouter', 'failed', 'HTTP 401: cookie expired', '2026-01-01T00:00:00'),
+		(2, 'bob', 'agentrouter', 'failed', 'connection timed out', '2026-01-01T00:01:00'),
+		(2, 'bob', 'agentrouter', 'failed', '签到失败：Cookie 已过期', '2026-01-01T00:02:00'),
+	])
+
+	assert _messages(asyncio.run(database.search_checkin_logs('cookie expired'))) == ['HTTP 401: cookie expired']
+	assert _messages(asyncio.run(database.search_checkin_logs('已过期'))) == ['签到失败：Cookie 已过期']
+	assert len(asyncio.run(database.search_checkin_logs('agentrouter'))) == 2
+	assert _messages(asyncio.run(database.search_checkin_logs('bob timed'))) == ['connection timed out']
+	assert asyncio.run(database.search_checkin_logs('cookie', account_id=1))[0]['account_name'] == 'alice'
+	assert asyncio.run(database.search_checkin_logs('cookie', status='success')) == []
+
+
+def test_short_terms_fall_back_to_like(db_path):
+	_seed(db_path, [
+		(1, 'alice', 'anyrouter', 'failed', '请求超时', '2026-01-01T00:00:00'),
+		(1, 'alice', 'anyrouter', 'failed', 'Cookie 已过期', '2026-01-01T00:01:00'),
+		(1, 'alice', 'anyrouter', 'failed', 'cookie 50% used', '2026-01-01T00:02:00'),
+	])
+
+	assert _messages(asyncio.run(database.search_checkin_logs('超时'))) == ['请求超时']
+	assert _messages(asyncio.run(database.search_checkin_logs('cookie 过期'))) == ['Cookie 已过期']
+	assert _messages(asyncio.run(database.search_checkin_logs('0%'))) == ['cookie 50% used']
+
+
+def test_query_syntax_in_user_input_is_quoted(db_path):
+	_seed(db_path, [(1, 'a', 'p', 'failed', 'error: "NEAR(x)" AND OR *', '2026-01-01T00:00:00')])
+
+	for query in ('NEAR(x)', 'AND OR', '"NEAR(', 'col:abc', '***', '"'):
+		asyncio.run(database.search_checkin_logs(query))
+	assert len(asyncio.run(database.search_checkin_logs('"NEAR(x)" AND'))) == 1
+
+
+def test_fts_index_follows_updates_and_deletes(db_path):
+	_seed(db_path, [(1, 'a', 'p', 'failed', 'upstream 502 bad gateway', '2026-01-01T00:00:00')])
+	conn = sqlite3.connect(db_path)
+	conn.execute("UPDATE checkin_logs SET message = 'certificate has expired'")
+	conn.commit()
+
+	assert asyncio.run(database.search_checkin_logs('gateway')) == []
+	assert len(asyncio.run(database.search_checkin_logs('certificate'))) == 1
+
+	conn.execute('DELETE FROM checkin_logs')
+	conn.commit()
+	conn.close()
+	assert asyncio.run(database.search_checkin_logs('certificate')) == []
+
+
+def test_ranking_is_limited_to_newest_matches_and_pages(db_path, monkeypatch):
+	monkeypatch.setattr(database, 'SEARCH_RANK_WINDOW', 5)
+	_seed(db_path, [
+		(1, 'a', 'p', 'failed', f'timeout #{i:02d}', f'2026-01-01T00:{i:02d}:00') for i in range(12)
+	])
+
+	first = asyncio.run(database.search_checkin_logs('timeout', limit=3))
+	second = asyncio.run(database.search_checkin_logs('timeout', limit=3, offset=3))
+	ids = [log['id'] for log in first + second]
+	assert len(set(ids)) == 6
+	# equal bm25 scores fall back to newest first
+	assert ids == sorted(ids, reverse=True)
+	assert ids[0] == 12
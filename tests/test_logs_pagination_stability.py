@@ -24,3 +24,48 @@ def test_logs_query_uses_stable_desc_order():
 def test_logs_template_keeps_filters_in_pagination_links():
 	template = (project_root / 'web' / 'templates' / 'logs.html').read_text(encoding='utf-8')
 	assert 'status={{ filter_status or \'\' }}&account_id={{ filter_account or \'\' }}' in template
+
+
+def test_cursor_round_trip_and_invalid_values():
+	from web.routes.logs import _decode_cursor, _encode_cursor
+
+	cursor = _encode_cursor({'created_at': '2026-01-01T00:00:00', 'id': 42})
+	assert _decode_cursor(cursor) == ('2026-01-01T00:00:00', 42)
+	assert _decode_cursor('') is None
+	assert _decode_cursor('not-a-cursor') is None
+
+
+def test_keyset_pages_are_stable_with_timestamp_ties(db_path):
+	import asyncio
+	import sqlite3
+
+	from web import database
+
+	conn = sqlite3.connect(db_path)
+	conn.executemany(
+		'INSERT INTO checkin_logs (account_id, account_name, provider, status, created_at) VALUES (?, ?, ?, ?, ?)',
+		[(1, 'acc', 'p', 'success', f'2026-01-01T00:00:0{i // 4}') for i in range(25)],
+	)
+	conn.commit()
+	expected = [row[0] for row in conn.execute('SELECT id FROM checkin_logs ORDER BY created_at DESC, id DESC')]
+	conn.close()
+
+	pages = []
+	before = None
+	while True:
+		page = asyncio.run(database.get_checkin_logs_keyset(limit=7, before=before))
+		if not page:
+			break
+		pages.append([row['id'] for row in page])
+		before = (page[-1]['created_at'], page[-1]['id'])
+
+	assert [log_id for page in pages for log_id in page] == expected
+
+	first_of_second = asyncio.run(database.get_checkin_logs_keyset(limit=7, before=None))[-1]
+	second = asyncio.run(database.get_checkin_logs_keyset(
+		limit=7, before=(first_of_second['created_at'], first_of_second['id'])
+	))
+	back = asyncio.run(database.get_checkin_logs_keyset(
+		limit=7, after=(second[0]['created_at'], second[0]['id'])
+	))
+	assert [row['id'] for row in back] == pages[0]
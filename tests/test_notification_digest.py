@@ -0,0 +1,138 @@
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from web import database, digest, outbox
+
+
+@pytest.fixture
+def db_path(db_path, monkeypatch):
+	monkeypatch.setattr(digest, '_last_flush', {})
+	return db_path
+
+
+def test_rate_limiter_uses_a_sliding_window():
+	limiter = digest.ChannelRateLimiter({'DingTalk': (2, 60)})
+	assert limiter.acquire('DingTalk', 100.0) == 0
+	assert limiter.acquire('DingTalk', 110.0) == 0
+	assert limiter.acquire('DingTalk', 120.0) == 40.0
+	assert limiter.acquire('DingTalk', 160.0) == 0  # the send at 100 has left the window
+	assert limiter.acquire('Bark', 160.0) == 0  # no known limit
+
+
+def test_rows_over_the_channel_limit_are_postponed_without_using_attempts(db_path, monkeypatch):
+	sent = []
+
+	async def _fake_send(name, title, content, msg_type='text', timeout=None):
+		sent.append(content)
+		return {'status': 'sent', 'error': None, 'elapsed_ms': 1}
+
+	monkeypatch.setattr(outbox.notify, 'asend_channel', _fake_send)
+	monkeypatch.setattr(outbox, 'rate_limiter', digest.ChannelRateLimiter({'DingTalk': (3, 60)}))
+
+	async def _run():
+		now = datetime(2026, 3, 1, 8, 0, 0)
+		for i in range(5):
+			await database.enqueue_notifications(['DingTalk'], 't', str(i))
+		await database._write(lambda db: db.execute(
+			'UPDATE notification_outbox SET next_attempt_at = ?', (now.isoformat(),)
+		))
+		first = await outbox.deliver_due(now)
+		pending = await database.get_notifications(status='pending')
+		second = await outbox.deliver_due(now + timedelta(seconds=60))
+		await database.close_db()
+		return first, pending, second
+
+	first, pending, second = asyncio.run(_run())
+	assert first == {'sent': 3, 'retry': 0, 'dead': 0, 'deferred': 2}
+	assert {(row['attempts'], row['next_attempt_at']) for row in pending} == {(0, '2026-03-01T08:01:00')}
+	assert second['sent'] == 2
+	assert sent == ['0', '1', '2', '3', '4']
+
+
+def test_digest_channels_get_one_merged_message_per_window(db_path, monkeypatch):
+	monkeypatch.setattr(outbox.notify, 'channels', ['DingTalk', 'Bark'])
+	monkeypatch.setattr(outbox.notify, 'digest_windows', {'DingTalk': 3600})
+	start = datetime(2026, 3, 1, 8, 0, 0)
+
+	async def _run():
+		assert await digest.flush_due_digests(start) == 0  # opens the first window
+		immediate = await outbox.enqueue_notification('AnyRouter Check-in', '签到完成: 1/3 成功')
+
+		conn = sqlite3.connect(database.DB_PATH)
+		conn.executemany(
+			'''INSERT INTO checkin_logs (account_id, account_name, provider, status, message, error_category,
+			   created_at) VALUES (?, ?, 'p', ?, '', ?, ?)''',
+			[
+				(1, 'acc-1', 'failed', 'waf_blocked', '2026-03-01T08:10:00'),
+				(1, 'acc-1', 'failed', 'waf_blocked', '2026-03-01T08:20:00'),
+				(2, 'acc-2', 'failed', 'auth_failed', '2026-03-01T08:30:00'),
+				(3, 'acc-3', 'success', 'success', '2026-03-01T08:30:00'),
+				(2, 'acc-2', 'failed', 'auth_failed', '2026-03-01T07:59:00'),  # previous window
+			],
+		)
+		conn.commit()
+		conn.close()
+
+		early = await digest.flush_due_digests(start + timedelta(minutes=59))
+		due = await digest.flush_due_digests(start + timedelta(minutes=60))
+		again = await digest.flush_due_digests(start + timedelta(minutes=61))
+		rows = await database.get_notifications()
+		await database.close_db()
+		return immediate, early, due, again, rows
+
+	immediate, early, due, again, rows = asyncio.run(_run())
+	assert immediate == 1
+	assert (early, due, again) == (0, 1, 0)
+	assert [(row['channel'], row['title']) for row in rows] == [
+		('DingTalk', digest.DIGEST_TITLE), ('Bark', 'AnyRouter Check-in'),
+	]
+	content = rows[0]['content']
+	assert content.splitlines()[0] == '03-01 08:00 至 03-01 09:00 签到失败 3 次，涉及 2 个账号'
+	assert 'acc-1：2 次' in content
+	assert content.index('acc-1') < content.index('acc-2')
+
+
+def test_format_digest_mentions_accounts_beyond_the_top_list():
+	text = digest.format_digest({
+		'total': 9, 'accounts': 7, 'categories': {'network_error': 9},
+		'worst': [{'account_name': 'a', 'failures': 3}],
+	}, datetime(2026, 3, 1, 8, 0), datetime(2026, 3, 1, 8, 30))
+	assert '另有 6 个账号' in text
+	assert text.startswith('03-01 08:00 至 03-01 08:30')
+
+
+def test_first_digest_after_restart_covers_at_most_one_window(db_path, monkeypatch):
+	monkeypatch.setattr(outbox.notify, 'channels', ['DingTalk'])
+	monkeypatch.setattr(outbox.notify, 'digest_windows', {'DingTalk': 3600})
+	now = datetime(2026, 3, 10, 8, 0, 0)
+
+	async def _run():
+		# the channel's last notification is days old: the windows since then had no failures
+		(old_id,) = await database.enqueue_notifications(['DingTalk'], digest.DIGEST_TITLE, '旧汇总')
+		await database.mark_notification_sent(old_id)
+		await database._write(lambda db: db.execute(
+			'UPDATE notification_outbox SET created_at = ?, sent_at = ?', ('2026-03-01T08:00:00',) * 2
+		))
+		await database.add_checkin_log(1, 'acc-1', 'p', 'failed', message='timed out')
+		await database._write(lambda db: db.execute(
+			"UPDATE checkin_logs SET created_at = '2026-03-02T08:00:00'"
+		))
+		queued = await digest.flush_due_digests(now)
+		wait = await digest.seconds_until_next_digest(now)
+		rows = await database.get_notifications(status='pending')
+		await database.close_db()
+		return queued, wait, rows
+
+	queued, wait, rows = asyncio.run(_run())
+	assert queued == 0  # the failure a week ago is outside the window the digest covers
+	assert rows == []
+	assert wait == 3600
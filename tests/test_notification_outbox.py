@@ -0,0 +1,142 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from web import database, digest, outbox
+from web.routes import notifications as notifications_routes
+
+
+@pytest.fixture
+def sent(monkeypatch):
+	"""Fake channels: DingTalk always works, Bark is down."""
+	calls = []
+
+	async def _fake_send(name, title, content, msg_type='text', timeout=None):
+		calls.append((name, title))
+		if name == 'Bark':
+			return {'status': 'failed', 'error': 'HTTP 502', 'elapsed_ms': 1}
+		return {'status': 'sent', 'error': None, 'elapsed_ms': 1}
+
+	monkeypatch.setattr(outbox.notify, 'channels', ['DingTalk', 'Bark'])
+	monkeypatch.setattr(outbox.notify, 'digest_windows', {})
+	monkeypatch.setattr(outbox.notify, 'asend_channel', _fake_send)
+	monkeypatch.setattr(outbox, 'rate_limiter', digest.ChannelRateLimiter({}))
+	return calls
+
+
+def test_backoff_doubles_up_to_the_cap():
+	assert [outbox.backoff_seconds(n) for n in (1, 2, 3, 4)] == [30, 60, 120, 240]
+	assert outbox.backoff_seconds(20) == outbox.BACKOFF_MAX_SECONDS
+
+
+def test_failed_channel_backs_off_then_is_dead_lettered_and_can_be_retried(db_path, sent):
+	async def _run():
+		now = datetime(2026, 3, 1, 8, 0, 0)
+		queued = await outbox.enqueue_notification('签到', '1/2 成功')
+		await database._write(lambda db: db.execute(
+			'UPDATE notification_outbox SET next_attempt_at = ?', (now.isoformat(),)
+		))
+		first = await outbox.deliver_due(now)
+		bark = (await database.get_notifications(status='pending'))[0]
+		too_early = await outbox.deliver_due(now + timedelta(seconds=29))
+
+		rounds = [first]
+		when = now
+		for attempt in range(1, outbox.MAX_ATTEMPTS):
+			when += timedelta(seconds=outbox.backoff_seconds(attempt))
+			rounds.append(await outbox.deliver_due(when))
+		counts = await database.get_notification_counts()
+		dead = (await database.get_notifications(status='dead'))[0]
+
+		retried = await database.retry_notification(dead['id'])
+		again = await database.retry_notification(dead['id'])
+		pending = (await database.get_notifications(status='pending'))[0]
+		await database.close_db()
+		return queued, bark, too_early, rounds, counts, dead, retried, again, pending
+
+	queued, bark, too_early, rounds, counts, dead, retried, again, pending = asyncio.run(_run())
+	assert queued == 2
+	assert rounds[0] == {'sent': 1, 'retry': 1, 'dead': 0, 'deferred': 0}
+	assert (bark['channel'], bark['attempts'], bark['last_error']) == ('Bark', 1, 'HTTP 502')
+	assert bark['next_attempt_at'] == '2026-03-01T08:00:30'
+	assert too_early == {'sent': 0, 'retry': 0, 'dead': 0, 'deferred': 0}
+	assert rounds[-1] == {'sent': 0, 'retry': 0, 'dead': 1, 'deferred': 0}
+	assert counts == {'sent': 1, 'dead': 1}
+	assert dead['attempts'] == outbox.MAX_ATTEMPTS
+	assert (retried, again) == (True, False)
+	assert (pending['id'], pending['attempts']) == (dead['id'], 0)
+
+
+def test_worker_delivers_enqueued_messages_in_the_background(db_path, sent):
+	async def _run():
+		outbox.start_outbox_worker()
+		try:
+			await outbox.enqueue_notification('签到', '内容')
+			for _ in range(100):
+				if ('DingTalk', '签到') in sent:
+					break
+				await asyncio.sleep(0.01)
+			counts = await database.get_notification_counts()
+		finally:
+			await outbox.stop_outbox_worker()
+			await database.close_db()
+		return counts
+
+	counts = asyncio.run(_run())
+	assert ('DingTalk', '签到') in sent
+	assert counts == {'sent': 1, 'pending': 1}
+
+
+def test_outbox_api_lists_and_retries(db_path, sent):
+	async def _seed():
+		await outbox.enqueue_notification('签到', '内容')
+		for row in await database.get_notifications():
+			await database.mark_notification_failed(row['id'], 'boom', None)
+		await database.close_db()
+
+	asyncio.run(_seed())
+	app = FastAPI()
+	app.include_router(notifications_routes.router)
+	client = TestClient(app)
+
+	body = client.get('/api/notifications?status=dead').json()
+	assert body['counts'] == {'dead': 2}
+	assert {item['channel'] for item in body['items']} == {'DingTalk', 'Bark'}
+	assert client.get('/api/notifications?status=bogus').json()['items'] == body['items']
+
+	target = body['items'][0]['id']
+	assert client.post(f'/api/notifications/{target}/retry').json() == {'success': True}
+	assert client.post(f'/api/notifications/{target}/retry').json()['success'] is False
+	page = client.get('/notifications?status=pending')
+	assert page.status_code == 200
+	assert '通知队列' in page.text
+	assert 'DingTalk' in page.text or 'Bark' in page.text
+	asyncio.run(database.close_db())
+
+
+def test_sent_history_is_pruned_without_dropping_dead_letters(db_path, monkeypatch):
+	monkeypatch.setattr(database, 'OUTBOX_HISTORY', 3)
+
+	async def _run():
+		await database.enqueue_notifications(['Bark'], '签到', '失败')
+		dead = (await database.get_notifications())[0]
+		await database.mark_notification_failed(dead['id'], 'HTTP 502', None)
+		for i in range(database.OUTBOX_HISTORY + 2):
+			(notification_id,) = await database.enqueue_notifications(['DingTalk'], '签到', str(i))
+			await database.mark_notification_sent(notification_id)
+		counts = await database.get_notification_counts()
+		dead_rows = await database.get_notifications(status='dead')
+		return dead, counts, dead_rows
+
+	dead, counts, dead_rows = asyncio.run(_run())
+	assert counts == {'sent': 3, 'dead': 1}
+	assert [row['id'] for row in dead_rows] == [dead['id']]
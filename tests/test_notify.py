@@ -1,9 +1,12 @@
+import asyncio
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 from dotenv import load_dotenv
 
@@ -66,6 +69,17 @@ def gotify_kit(monkeypatch):
 	return NotificationKit()
 
 
+def _isolated_kit(monkeypatch, **env) -> NotificationKit:
+	for name in (
+		'NOTIFY_DIGEST_MINUTES', 'NOTIFY_DIGEST_MINUTES_DINGTALK', 'EMAIL_USER', 'EMAIL_PASS', 'EMAIL_TO', 'PUSHPLUS_TOKEN', 'SERVERPUSHKEY', 'DINGDING_WEBHOOK',
+		'FEISHU_WEBHOOK', 'WEIXIN_WEBHOOK', 'GOTIFY_URL', 'GOTIFY_TOKEN', 'TELEGRAM_BOT_TOKEN', 'BARK_KEY',
+	):
+		monkeypatch.delenv(name, raising=False)
+	for name, value in env.items():
+		monkeypatch.setenv(name, value)
+	return NotificationKit()
+
+
 def test_real_notification(notification_kit):
 	"""真实接口测试，需要配置.env.local文件"""
 	if os.getenv('ENABLE_REAL_TEST') != 'true':
@@ -89,8 +103,7 @@ def test_send_email(mock_smtp, email_kit):
 
 @patch('utils.notify.httpx.Client')
 def test_send_pushplus(mock_client_class, pushplus_kit):
-	mock_client_instance = MagicMock()
-	mock_client_class.return_value.__enter__.return_value = mock_client_instance
+	mock_client_instance = mock_client_class.return_value
 
 	pushplus_kit.send_pushplus('测试标题', '测试内容')
 
@@ -101,8 +114,7 @@ def test_send_pushplus(mock_client_class, pushplus_kit):
 
 @patch('utils.notify.httpx.Client')
 def test_send_dingtalk(mock_client_class, dingtalk_kit):
-	mock_client_instance = MagicMock()
-	mock_client_class.return_value.__enter__.return_value = mock_client_instance
+	mock_client_instance = mock_client_class.return_value
 
 	dingtalk_kit.send_dingtalk('测试标题', '测试内容')
 
@@ -114,8 +126,7 @@ def test_send_dingtalk(mock_client_class, dingtalk_kit):
 
 @patch('utils.notify.httpx.Client')
 def test_send_feishu(mock_client_class, feishu_kit):
-	mock_client_instance = MagicMock()
-	mock_client_class.return_value.__enter__.return_value = mock_client_instance
+	mock_client_instance = mock_client_class.return_value
 
 	feishu_kit.send_feishu('测试标题', '测试内容')
 
@@ -126,8 +137,7 @@ def test_send_feishu(mock_client_class, feishu_kit):
 
 @patch('utils.notify.httpx.Client')
 def test_send_wecom(mock_client_class, wecom_kit):
-	mock_client_instance = MagicMock()
-	mock_client_class.return_value.__enter__.return_value = mock_client_instance
+	mock_client_instance = mock_client_class.return_value
 
 	wecom_kit.send_wecom('测试标题', '测试内容')
 
@@ -138,8 +148,7 @@ def test_send_wecom(mock_client_class, wecom_kit):
 
 @patch('utils.notify.httpx.Client')
 def test_send_gotify(mock_client_class, gotify_kit):
-	mock_client_instance = MagicMock()
-	mock_client_class.return_value.__enter__.return_value = mock_client_instance
+	mock_client_instance = mock_client_class.return_value
 
 	gotify_kit.send_gotify('测试标题', '测试内容')
 
@@ -169,8 +178,14 @@ def test_missing_config(monkeypatch):
 @patch('utils.notify.NotificationKit.send_pushplus')
 @patch('utils.notify.NotificationKit.send_feishu')
 @patch('utils.notify.NotificationKit.send_gotify')
-def test_push_message(mock_gotify, mock_feishu, mock_pushplus, mock_wecom, mock_dingtalk, mock_email, notification_kit):
-	notification_kit.push_message('测试标题', '测试内容')
+def test_push_message(mock_gotify, mock_feishu, mock_pushplus, mock_wecom, mock_dingtalk, mock_email, monkeypatch):
+	kit = _isolated_kit(
+		monkeypatch,
+		EMAIL_USER='test@example.com', EMAIL_PASS='password', EMAIL_TO='to@example.com', PUSHPLUS_TOKEN='t',
+		DINGDING_WEBHOOK='https://ding.example.com', FEISHU_WEBHOOK='https://feishu.example.com',
+		WEIXIN_WEBHOOK='https://weixin.example.com', GOTIFY_URL='https://gotify.example.com', GOTIFY_TOKEN='t',
+	)
+	kit.push_message('测试标题', '测试内容')
 
 	assert mock_email.called
 	assert mock_dingtalk.called
@@ -178,3 +193,116 @@ def test_push_message(mock_gotify, mock_feishu, mock_pushplus, mock_wecom, mock_
 	assert mock_pushplus.called
 	assert mock_feishu.called
 	assert mock_gotify.called
+
+
+def _mock_async_client(monkeypatch, handler):
+	real_client = httpx.AsyncClient
+	monkeypatch.setattr(
+		'utils.notify.httpx.AsyncClient', lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+	)
+
+
+@patch('smtplib.SMTP_SSL')
+def test_apush_message_sends_concurrently_with_per_channel_timeouts(mock_smtp, monkeypatch):
+	kit = _isolated_kit(
+		monkeypatch,
+		EMAIL_USER='test@example.com', EMAIL_PASS='password', EMAIL_TO='to@example.com',
+		DINGDING_WEBHOOK='https://ding.example.com/send', GOTIFY_URL='https://gotify.example.com/message',
+		GOTIFY_TOKEN='t', BARK_KEY='k', BARK_SERVER='https://bark.example.com',
+	)
+	mock_server = MagicMock()
+	mock_smtp.return_value.__enter__.return_value = mock_server
+	mock_server.login.side_effect = lambda *args: time.sleep(0.2)  # 阻塞的 SMTP 放在线程池里
+
+	async def handler(request):
+		if request.url.host == 'gotify.example.com':
+			await asyncio.sleep(5)
+		if request.url.host == 'bark.example.com':
+			return httpx.Response(500)
+		return httpx.Response(200, json={})
+
+	_mock_async_client(monkeypatch, handler)
+
+	async def _run():
+		ticks = []
+
+		async def _ticker():
+			while True:
+				ticks.append(time.monotonic())
+				await asyncio.sleep(0.02)
+
+		ticker = asyncio.create_task(_ticker())
+		started = time.monotonic()
+		results = await kit.apush_message('标题', '内容', timeout=0.5)
+		elapsed = time.monotonic() - started
+		ticker.cancel()
+		return results, elapsed, ticks
+
+	results, elapsed, ticks = asyncio.run(_run())
+	statuses = {name: result['status'] for name, result in results.items()}
+	assert statuses == {'Email': 'sent', 'DingTalk': 'sent', 'Gotify': 'timeout', 'Bark': 'failed'}
+	assert '500' in results['Bark']['error']
+	assert mock_server.send_message.called
+	assert elapsed < 1.0
+	# 事件循环在 SMTP 阻塞期间仍在运行
+	assert len(ticks) >= 10
+
+
+def test_webhook_error_codes_in_a_200_response_count_as_failures(monkeypatch):
+	kit = _isolated_kit(
+		monkeypatch,
+		DINGDING_WEBHOOK='https://ding.example.com/send', FEISHU_WEBHOOK='https://feishu.example.com/hook',
+		WEIXIN_WEBHOOK='https://wecom.example.com/send',
+	)
+
+	async def handler(request):
+		if request.url.host == 'ding.example.com':
+			return httpx.Response(200, json={'errcode': 45009, 'errmsg': 'send too fast'})
+		if request.url.host == 'feishu.example.com':
+			return httpx.Response(200, json={'code': 19021, 'msg': 'sign match fail'})
+		return httpx.Response(200, json={'errcode': 0, 'errmsg': 'ok'})
+
+	_mock_async_client(monkeypatch, handler)
+	results = asyncio.run(kit.apush_message('标题', '内容'))
+
+	assert results['DingTalk']['status'] == 'failed'
+	assert results['DingTalk']['error'] == 'errcode 45009: send too fast'
+	assert results['Feishu']['status'] == 'failed'
+	assert '19021' in results['Feishu']['error']
+	assert results['WeChat Work']['status'] == 'sent'
+
+
+@patch('utils.notify.httpx.Client')
+def test_enabled_channels_are_resolved_once_and_share_one_client(mock_client_class, monkeypatch):
+	kit = _isolated_kit(monkeypatch, DINGDING_WEBHOOK='https://ding.example.com', TELEGRAM_BOT_TOKEN='bot')
+	assert kit.channels == ['DingTalk']  # Telegram 缺少 chat id，不算启用
+
+	monkeypatch.setenv('BARK_KEY', 'k')
+	with patch('utils.notify.NotificationKit.send_bark') as mock_bark:
+		kit.push_message('标题', '内容')
+		kit.push_message('标题', '内容')
+	assert not mock_bark.called
+
+	assert mock_client_class.call_count == 1
+	assert mock_client_class.return_value.post.call_count == 2
+	kit.close()
+	mock_client_class.return_value.close.assert_called_once()
+
+
+def test_digest_windows_default_and_per_channel_override(monkeypatch):
+	kit = _isolated_kit(
+		monkeypatch,
+		DINGDING_WEBHOOK='https://ding.example.com', BARK_KEY='k', GOTIFY_URL='https://g.example.com', GOTIFY_TOKEN='t',
+		NOTIFY_DIGEST_MINUTES='30', NOTIFY_DIGEST_MINUTES_DINGTALK='60', NOTIFY_DIGEST_MINUTES_BARK='0',
+	)
+	assert kit.digest_windows == {'DingTalk': 3600, 'Gotify': 1800}
+
+
+def test_malformed_notify_timeout_falls_back_to_the_default(monkeypatch, capsys):
+	kit = _isolated_kit(monkeypatch, NOTIFY_TIMEOUT='30s', NOTIFY_DIGEST_MINUTES='soon')
+	assert kit.timeout == 30.0
+	assert kit.digest_windows == {}
+	assert "Invalid NOTIFY_TIMEOUT='30s'" in capsys.readouterr().out
+
+	assert _isolated_kit(monkeypatch, NOTIFY_TIMEOUT='0').timeout == 30.0
+	assert _isolated_kit(monkeypatch, NOTIFY_TIMEOUT='2.5').timeout == 2.5
@@ -8,7 +8,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from utils.config import AppConfig
-from web import database, scheduler
+from web import database, provider_registry, scheduler
 
 
 def test_default_providers_include_newapi(monkeypatch):
@@ -82,7 +82,8 @@ def test_scheduler_build_provider_config_uses_provider_specific_fields(monkeypat
 			},
 		]
 
-	monkeypatch.setattr(scheduler, 'get_all_providers', _fake_get_all_providers)
+	monkeypatch.setattr(provider_registry, 'get_all_providers', _fake_get_all_providers)
+	provider_registry.invalidate_provider_registry()
 
 	provider_a = asyncio.run(scheduler._build_provider_config('new-api-a'))
 	provider_b = asyncio.run(scheduler._build_provider_config('new-api-b'))
@@ -95,3 +96,62 @@ def test_scheduler_build_provider_config_uses_provider_specific_fields(monkeypat
 	assert provider_b.sign_in_path == '/checkin-b'
 	assert provider_a.api_user_key == 'x-user-a'
 	assert provider_b.api_user_key == 'x-user-b'
+
+
+def test_provider_registry_loads_once_until_invalidated(monkeypatch):
+	calls = []
+
+	async def _fake_get_all_providers():
+		calls.append(1)
+		return [{
+			'name': 'tpl',
+			'domain': '',
+			'login_path': '/login',
+			'sign_in_path': '/api/user/checkin',
+			'user_info_path': '/api/user/self',
+			'api_user_key': 'new-api-user',
+			'bypass_method': None,
+			'waf_cookie_names': None,
+		}]
+
+	monkeypatch.setattr(provider_registry, 'get_all_providers', _fake_get_all_providers)
+	provider_registry.invalidate_provider_registry()
+
+	template = asyncio.run(scheduler._build_provider_config('tpl'))
+	assert asyncio.run(scheduler._build_provider_config('tpl')) is template
+	assert asyncio.run(scheduler._build_provider_config('missing')) is None
+	assert len(calls) == 1
+
+	resolved = scheduler._resolve_domain(template, {'domain': 'https://site.example.com/'})
+	assert resolved.domain == 'https://site.example.com'
+	assert template.domain == ''
+	assert scheduler._resolve_domain(template, {'domain': ''}) is None
+
+	provider_registry.invalidate_provider_registry()
+	asyncio.run(scheduler._build_provider_config('tpl'))
+	assert len(calls) == 2
+	provider_registry.invalidate_provider_registry()
+
+
+def test_provider_registry_does_not_cache_a_load_that_raced_an_invalidation(monkeypatch):
+	domains = ['https://old.example.com']
+
+	async def _fake_get_all_providers():
+		rows = [{
+			'name': 'tpl', 'domain': domains[0], 'login_path': '/login', 'sign_in_path': None,
+			'user_info_path': '/api/user/self', 'api_user_key': 'new-api-user',
+			'bypass_method': None, 'waf_cookie_names': None,
+		}]
+		# a provider write lands while this read is in flight
+		domains[0] = 'https://new.example.com'
+		provider_registry.invalidate_provider_registry()
+		return rows
+
+	monkeypatch.setattr(provider_registry, 'get_all_providers', _fake_get_all_providers)
+	provider_registry.invalidate_provider_registry()
+
+	stale = asyncio.run(provider_registry.get_provider_template('tpl'))
+	fresh = asyncio.run(provider_registry.get_provider_template('tpl'))
+	assert stale.domain == 'https://old.example.com'
+	assert fresh.domain == 'https://new.example.com'
+	provider_registry.invalidate_provider_registry()
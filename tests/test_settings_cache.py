@@ -0,0 +1,40 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to import path.
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web import database
+
+
+def test_settings_are_served_from_cache_after_init(db_path, monkeypatch):
+	asyncio.run(database.set_setting('cron_expression', '0 */4 * * *'))
+
+	async def _no_db(path):
+		raise AssertionError('settings read should not open a connection')
+
+	monkeypatch.setattr(database, '_open_connection', _no_db)
+	assert asyncio.run(database.get_setting('cron_expression', '0 */6 * * *')) == '0 */4 * * *'
+	assert asyncio.run(database.get_setting('missing', 'fallback')) == 'fallback'
+
+
+def test_set_setting_is_write_through_and_persisted(db_path):
+	asyncio.run(database.set_setting('log_retention_days', '30'))
+	assert database.get_setting_int('log_retention_days', 90) == 30
+
+	asyncio.run(database.load_settings())
+	assert database.get_cached_setting('log_retention_days') == '30'
+
+
+def test_typed_accessors_fall_back_on_missing_or_invalid_values(db_path):
+	asyncio.run(database.set_setting('bad_int', 'abc'))
+	asyncio.run(database.set_setting('flag', 'true'))
+	asyncio.run(database.set_setting('ratio', '0.5'))
+
+	assert database.get_setting_int('bad_int', 7) == 7
+	assert database.get_setting_int('missing', 3) == 3
+	assert database.get_setting_bool('flag', False) is True
+	assert database.get_setting_bool('missing', True) is True
+	assert database.get_setting_float('ratio', 1.0) == 0.5
@@ -0,0 +1,191 @@
+"""Keyword classification of check-in result messages.
+
+Shared by the CLI (checkin.py) and the web panel (web/failure_reason.py, web/scheduler.py) so the
+keyword tables exist once. All tables are compiled into one regex whose alternation is laid out
+as a trie, and a single pass over the lowercased message finds the keywords in it; the category
+with the highest priority wins, exactly as testing each table in order with `in` did.
+"""
+
+import re
+from collections.abc import Iterable
+
+ALREADY_CHECKED_IN_KEYWORDS = (
+	'already checked in',
+	'already check in',
+	'already_check_in',
+	'already_checked_in',
+	'already signed in',
+	'已经签到',
+	'已签到',
+	'重复签到',
+)
+
+AUTH_FAILED_KEYWORDS = (
+	'auth failed',
+	'authentication',
+	'unauthorized',
+	'invalid api user',
+	'invalid token',
+	'invalid credentials',
+	'cookie expired',
+	'凭据',
+	'认证失败',
+	'cookie 过期',
+	'api user',
+)
+
+WAF_BLOCKED_KEYWORDS = (
+	'waf',
+	'cloudflare',
+	'cf_chl',
+	'missing waf cookies',
+	'challenge',
+	'反爬',
+	'风控',
+)
+
+NETWORK_ERROR_KEYWORDS = (
+	'timeout',
+	'timed out',
+	'connection refused',
+	'connection reset',
+	'network is unreachable',
+	'temporary failure in name resolution',
+	'failed to establish a new connection',
+	'无法连接',
+	'连接超时',
+	'网络错误',
+	'dns',
+)
+
+CONFIG_ERROR_KEYWORDS = (
+	'provider not found',
+	'invalid url',
+	'域名格式',
+	'配置错误',
+	'json',
+)
+
+UPSTREAM_ERROR_KEYWORDS = (
+	'http 5',
+	'upstream',
+	'bad gateway',
+	'service unavailable',
+	'internal server error',
+)
+
+# Priority order: a message matching several tables gets the first category listed.
+CATEGORY_KEYWORDS = (
+	('already_checked_in', ALREADY_CHECKED_IN_KEYWORDS),
+	('auth_failed', AUTH_FAILED_KEYWORDS),
+	('waf_blocked', WAF_BLOCKED_KEYWORDS),
+	('network_error', NETWORK_ERROR_KEYWORDS),
+	('config_error', CONFIG_ERROR_KEYWORDS),
+	('upstream_error', UPSTREAM_ERROR_KEYWORDS),
+)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+	"""Regex matching any of `words`, preferring the longest one at a given position."""
+	trie: dict = {}
+	for word in words:
+		node = trie
+		for char in word:
+			node = node.setdefault(char, {})
+		node[''] = {}  # end of a keyword
+
+	def _render(node: dict) -> str:
+		branches = [re.escape(char) + _render(child) for char, child in sorted(node.items()) if char]
+		if not branches:
+			return ''
+		body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+		# greedy: try to extend to a longer keyword before stopping at this one
+		return f'(?:{body})?' if '' in node else body
+
+	return _render(trie)
+
+
+class KeywordClassifier:
+	"""Compiled priority-ordered keyword tables; see the module docstring."""
+
+	def __init__(self, tables: Iterable[tuple[str, Iterable[str]]]):
+		self.categories: list[str] = []
+		rank_of: dict[str, int] = {}
+		for rank, (category, keywords) in enumerate(tables):
+			self.categories.append(category)
+			for keyword in keywords:
+				rank_of.setdefault(keyword.lower(), rank)
+		# A match reports the longest keyword starting at its position, and every keyword that is
+		# a prefix of it matched there too; so the match ranks as the best of those prefixes.
+		self._rank = {
+			keyword: min(rank for prefix, rank in rank_of.items() if keyword.startswith(prefix))
+			for keyword in rank_of
+		}
+		pattern = _trie_pattern(rank_of)
+		self._scan = re.compile(pattern)
+		# The scan does not look inside a match again. Keywords that could hide a better ranked
+		# one overlapping them (e.g. 'provider not found' + 'dns') switch to the overlapping scan.
+		self._overlapping = re.compile(f'(?=({pattern}))')
+		self._unsafe = {
+			keyword for keyword in rank_of
+			if any(
+				rank < self._rank[keyword] and (other.startswith(keyword[i:]) or keyword[i:].startswith(other))
+				for i in range(1, len(keyword)) for other, rank in rank_of.items()
+			)
+		}
+
+	def classify(self, text: str) -> str | None:
+		"""Highest-priority category with a keyword in `text` (already lowercased), else None."""
+		best = None
+		for match in self._scan.finditer(text):
+			keyword = match.group()
+			if keyword in self._unsafe:
+				return self._classify_overlapping(text)
+			rank = self._rank[keyword]
+			if best is None or rank < best:
+				best = rank
+				if rank == 0:
+					break
+		return None if best is None else self.categories[best]
+
+	def _classify_overlapping(self, text: str) -> str:
+		best = min(self._rank[match.group(1)] for match in self._overlapping.finditer(text))
+		return self.categories[best]
+
+
+classifier = KeywordClassifier(CATEGORY_KEYWORDS)
+_already_checked_in = KeywordClassifier([('already_checked_in', ALREADY_CHECKED_IN_KEYWORDS)])
+
+
+def normalize_message(message: str | None) -> str:
+	return str(message or '').strip().lower()
+
+
+def classify_result(status: str | None, message: str | None) -> str:
+	"""Category of one check-in result: success, one of CATEGORY_KEYWORDS, or unknown_error."""
+	status_value = (status or '').strip().lower()
+	if status_value == 'success':
+		return 'success'
+	if status_value == 'already_checked_in':
+		return 'already_checked_in'
+	return classifier.classify(normalize_message(message)) or 'unknown_error'
+
+
+def classify_results(rows: Iterable[tuple[str | None, str | None]]) -> list[str]:
+	"""classify_result() for many (status, message) pairs, e.g. a batch of log rows.
+
+	Check-in logs repeat a handful of messages, so each distinct pair is matched only once.
+	"""
+	cache: dict[tuple, str] = {}
+	results = []
+	for row in rows:
+		category = cache.get(row)
+		if category is None:
+			category = cache[row] = classify_result(*row)
+		results.append(category)
+	return results
+
+
+def is_already_checked_in_message(message: str | None) -> bool:
+	"""Whether a provider message says the account has already checked in today."""
+	return _already_checked_in.classify(normalize_message(message)) is not None
@@ -1,10 +1,88 @@
+import asyncio
 import os
 import smtplib
+import time
 from email.mime.text import MIMEText
 from typing import Literal
 
 import httpx
 
+# 每个渠道单独计时，一个渠道卡住不影响其它渠道，也不会阻塞事件循环
+DEFAULT_TIMEOUT = 30.0
+# 所有渠道共用一个长连接客户端；渠道最多 8 个，连接数不需要更多
+HTTP_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8, keepalive_expiry=60.0)
+
+# 渠道名 -> 构造 (url, json) 的方法名；Email 走 SMTP，单独处理
+HTTP_CHANNELS = {
+	'PushPlus': '_pushplus_request',
+	'Server Push': '_server_push_request',
+	'DingTalk': '_dingtalk_request',
+	'Feishu': '_feishu_request',
+	'WeChat Work': '_wecom_request',
+	'Gotify': '_gotify_request',
+	'Telegram': '_telegram_request',
+	'Bark': '_bark_request',
+}
+
+# 各渠道环境变量后缀，用于 NOTIFY_DIGEST_MINUTES_<后缀> 单独设置汇总窗口
+CHANNEL_ENV_SUFFIXES = {
+	'Email': 'EMAIL',
+	'PushPlus': 'PUSHPLUS',
+	'Server Push': 'SERVERPUSH',
+	'DingTalk': 'DINGTALK',
+	'Feishu': 'FEISHU',
+	'WeChat Work': 'WECOM',
+	'Gotify': 'GOTIFY',
+	'Telegram': 'TELEGRAM',
+	'Bark': 'BARK',
+}
+
+# 已知的机器人限流 (条数, 秒)：超出的消息会被平台直接丢弃，发送前按此限速
+CHANNEL_RATE_LIMITS = {
+	'DingTalk': (20, 60),
+	'WeChat Work': (20, 60),
+	'Feishu': (100, 60),
+	'Telegram': (20, 60),
+}
+
+# 这些机器人被限流、签名错误时仍返回 HTTP 200，发送结果在响应体的错误码字段里（0 为成功）
+CHANNEL_ERROR_CODE_FIELDS = {
+	'DingTalk': 'errcode',
+	'WeChat Work': 'errcode',
+	'Feishu': 'code',
+}
+
+
+def _check_response(name: str, response: httpx.Response):
+	"""Raise if the channel rejected the message, by HTTP status or by the error code in its body."""
+	response.raise_for_status()
+	field = CHANNEL_ERROR_CODE_FIELDS.get(name)
+	if field is None:
+		return
+	try:
+		body = response.json()
+	except ValueError:
+		raise ValueError(f'unexpected response: {response.text[:200]}') from None
+	if isinstance(body, dict) and body.get(field, 0) != 0:
+		message = body.get('errmsg') or body.get('msg') or ''
+		raise ValueError(f'{field} {body[field]}: {message}'.rstrip(': '))
+
+
+def _env_float(name: str, default: float) -> float:
+	"""Read a number from the environment; a malformed value falls back to `default` with a warning."""
+	value = os.getenv(name, '')
+	if not value.strip():
+		return default
+	try:
+		return float(value)
+	except ValueError:
+		print(f'[WARN] Invalid {name}={value!r}, using {default:g}')
+		return default
+
+
+def _env_minutes(name: str, default: float = 0) -> float:
+	return max(_env_float(name, default), 0)
+
 
 class NotificationKit:
 	def __init__(self):
@@ -26,8 +104,62 @@ class NotificationKit:
 		self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
 		self.bark_key = os.getenv('BARK_KEY')
 		self.bark_server = os.getenv('BARK_SERVER', 'https://api.day.app')
+		timeout = _env_float('NOTIFY_TIMEOUT', DEFAULT_TIMEOUT)
+		self.timeout = timeout if timeout > 0 else DEFAULT_TIMEOUT
+
+		configured = {
+			'Email': bool(self.email_user and self.email_pass and self.email_to),
+			'PushPlus': bool(self.pushplus_token),
+			'Server Push': bool(self.server_push_key),
+			'DingTalk': bool(self.dingding_webhook),
+			'Feishu': bool(self.feishu_webhook),
+			'WeChat Work': bool(self.weixin_webhook),
+			'Gotify': bool(self.gotify_url and self.gotify_token),
+			'Telegram': bool(self.telegram_bot_token and self.telegram_chat_id),
+			'Bark': bool(self.bark_key),
+		}
+		# 启用的渠道只在构造时计算一次，发送时不再逐个尝试未配置的渠道
+		self.channels: list[str] = [name for name, enabled in configured.items() if enabled]
+		# 汇总模式：窗口 > 0 的渠道不逐条推送，而是每个窗口合并成一条失败汇总
+		default_digest = _env_minutes('NOTIFY_DIGEST_MINUTES')
+		self.digest_windows: dict[str, float] = {}
+		for name in self.channels:
+			minutes = _env_minutes(f'NOTIFY_DIGEST_MINUTES_{CHANNEL_ENV_SUFFIXES[name]}', default_digest)
+			if minutes:
+				self.digest_windows[name] = minutes * 60
+		self._client: httpx.Client | None = None
+		self._async_client: httpx.AsyncClient | None = None
+		self._async_loop: asyncio.AbstractEventLoop | None = None
+
+	def _http_client(self) -> httpx.Client:
+		if self._client is None:
+			self._client = httpx.Client(timeout=self.timeout, limits=HTTP_LIMITS)
+		return self._client
+
+	def _http_async_client(self) -> httpx.AsyncClient:
+		# AsyncClient 的连接绑定在创建它的事件循环上，换了循环（如 CLI 多次 asyncio.run）就重建
+		loop = asyncio.get_running_loop()
+		if self._async_client is None or self._async_loop is not loop:
+			self._async_client = httpx.AsyncClient(timeout=self.timeout, limits=HTTP_LIMITS)
+			self._async_loop = loop
+		return self._async_client
+
+	def close(self):
+		if self._client is not None:
+			self._client.close()
+			self._client = None
+
+	async def aclose(self):
+		self.close()
+		if self._async_client is not None and self._async_loop is asyncio.get_running_loop():
+			await self._async_client.aclose()
+		self._async_client = None
+		self._async_loop = None
 
 	def send_email(self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text'):
+		self._send_smtp(*self._email_message(title, content, msg_type))
+
+	def _email_message(self, title: str, content: str, msg_type: Literal['text', 'html']) -> tuple[str, MIMEText]:
 		if not self.email_user or not self.email_pass or not self.email_to:
 			raise ValueError('Email configuration not set')
 
@@ -42,35 +174,51 @@ class NotificationKit:
 		msg['Subject'] = title
 
 		smtp_server = self.smtp_server if self.smtp_server else f'smtp.{self.email_user.split("@")[1]}'
-		with smtplib.SMTP_SSL(smtp_server, 465) as server:
+		return smtp_server, msg
+
+	def _send_smtp(self, smtp_server: str, msg: MIMEText):
+		with smtplib.SMTP_SSL(smtp_server, 465, timeout=self.timeout) as server:
 			server.login(self.email_user, self.email_pass)
 			server.send_message(msg)
 
 	def send_pushplus(self, title: str, content: str):
+		url, data = self._pushplus_request(title, content)
+		self._http_client().post(url, json=data)
+
+	def _pushplus_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.pushplus_token:
 			raise ValueError('PushPlus Token not configured')
 
 		data = {'token': self.pushplus_token, 'title': title, 'content': content, 'template': 'html'}
-		with httpx.Client(timeout=30.0) as client:
-			client.post('http://www.pushplus.plus/send', json=data)
+		return 'http://www.pushplus.plus/send', data
 
 	def send_serverPush(self, title: str, content: str):
+		url, data = self._server_push_request(title, content)
+		self._http_client().post(url, json=data)
+
+	def _server_push_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.server_push_key:
 			raise ValueError('Server Push key not configured')
 
 		data = {'title': title, 'desp': content}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(f'https://sctapi.ftqq.com/{self.server_push_key}.send', json=data)
+		return f'https://sctapi.ftqq.com/{self.server_push_key}.send', data
 
 	def send_dingtalk(self, title: str, content: str):
+		url, data = self._dingtalk_request(title, content)
+		_check_response('DingTalk', self._http_client().post(url, json=data))
+
+	def _dingtalk_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.dingding_webhook:
 			raise ValueError('DingTalk Webhook not configured')
 
 		data = {'msgtype': 'text', 'text': {'content': f'{title}\n{content}'}}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.dingding_webhook, json=data)
+		return self.dingding_webhook, data
 
 	def send_feishu(self, title: str, content: str):
+		url, data = self._feishu_request(title, content)
+		_check_response('Feishu', self._http_client().post(url, json=data))
+
+	def _feishu_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.feishu_webhook:
 			raise ValueError('Feishu Webhook not configured')
 
@@ -81,18 +229,24 @@ class NotificationKit:
 				'header': {'template': 'blue', 'title': {'content': title, 'tag': 'plain_text'}},
 			},
 		}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.feishu_webhook, json=data)
+		return self.feishu_webhook, data
 
 	def send_wecom(self, title: str, content: str):
+		url, data = self._wecom_request(title, content)
+		_check_response('WeChat Work', self._http_client().post(url, json=data))
+
+	def _wecom_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.weixin_webhook:
 			raise ValueError('WeChat Work Webhook not configured')
 
 		data = {'msgtype': 'text', 'text': {'content': f'{title}\n{content}'}}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.weixin_webhook, json=data)
+		return self.weixin_webhook, data
 
 	def send_gotify(self, title: str, content: str):
+		url, data = self._gotify_request(title, content)
+		self._http_client().post(url, json=data)
+
+	def _gotify_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.gotify_url or not self.gotify_token:
 			raise ValueError('Gotify URL or Token not configured')
 
@@ -108,21 +262,25 @@ class NotificationKit:
 			'priority': priority
 		}
 
-		url = f'{self.gotify_url}?token={self.gotify_token}'
-		with httpx.Client(timeout=30.0) as client:
-			client.post(url, json=data)
+		return f'{self.gotify_url}?token={self.gotify_token}', data
 
 	def send_telegram(self, title: str, content: str):
+		url, data = self._telegram_request(title, content)
+		self._http_client().post(url, json=data)
+
+	def _telegram_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.telegram_bot_token or not self.telegram_chat_id:
 			raise ValueError('Telegram Bot Token or Chat ID not configured')
 
 		message = f'<b>{title}</b>\n\n{content}'
 		data = {'chat_id': self.telegram_chat_id, 'text': message, 'parse_mode': 'HTML'}
-		url = f'https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage'
-		with httpx.Client(timeout=30.0) as client:
-			client.post(url, json=data)
+		return f'https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage', data
 
 	def send_bark(self, title: str, content: str):
+		url, data = self._bark_request(title, content)
+		self._http_client().post(url, json=data)
+
+	def _bark_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.bark_key:
 			raise ValueError('Bark Key not configured')
 
@@ -136,29 +294,72 @@ class NotificationKit:
 			'icon': 'https://anyrouter.top/favicon.ico',  # 可选：尝试使用 AnyRouter 图标
 			'group': 'AnyRouter'
 		}
-
-		with httpx.Client(timeout=30.0) as client:
-			client.post(url, json=data)
+		return url, data
 
 	def push_message(self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text'):
-		notifications = [
-			('Email', lambda: self.send_email(title, content, msg_type)),
-			('PushPlus', lambda: self.send_pushplus(title, content)),
-			('Server Push', lambda: self.send_serverPush(title, content)),
-			('DingTalk', lambda: self.send_dingtalk(title, content)),
-			('Feishu', lambda: self.send_feishu(title, content)),
-			('WeChat Work', lambda: self.send_wecom(title, content)),
-			('Gotify', lambda: self.send_gotify(title, content)),
-			('Telegram', lambda: self.send_telegram(title, content)),
-			('Bark', lambda: self.send_bark(title, content)),
-		]
-
-		for name, func in notifications:
+		senders = {
+			'Email': lambda: self.send_email(title, content, msg_type),
+			'PushPlus': lambda: self.send_pushplus(title, content),
+			'Server Push': lambda: self.send_serverPush(title, content),
+			'DingTalk': lambda: self.send_dingtalk(title, content),
+			'Feishu': lambda: self.send_feishu(title, content),
+			'WeChat Work': lambda: self.send_wecom(title, content),
+			'Gotify': lambda: self.send_gotify(title, content),
+			'Telegram': lambda: self.send_telegram(title, content),
+			'Bark': lambda: self.send_bark(title, content),
+		}
+
+		for name in self.channels:
 			try:
-				func()
+				senders[name]()
 				print(f'[{name}]: Message push successful!')
 			except Exception as e:
 				print(f'[{name}]: Message push failed! Reason: {str(e)}')
 
+	async def apush_message(
+		self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text', timeout: float | None = None
+	) -> dict[str, dict]:
+		"""Send to every enabled channel concurrently without blocking the event loop.
+
+		Each channel gets its own `timeout`; SMTP runs in the default thread pool. Returns
+		{channel: {'status': 'sent' | 'failed' | 'timeout', 'error', 'elapsed_ms'}}.
+		"""
+		results = await asyncio.gather(
+			*(self.asend_channel(name, title, content, msg_type, timeout) for name in self.channels)
+		)
+		return dict(zip(self.channels, results))
+
+	async def asend_channel(
+		self, name: str, title: str, content: str, msg_type: Literal['text', 'html'] = 'text',
+		timeout: float | None = None,
+	) -> dict:
+		"""Send to a single channel; same result shape as one apush_message entry."""
+		timeout = self.timeout if timeout is None else timeout
+
+		async def _send():
+			if name == 'Email':
+				server, msg = self._email_message(title, content, msg_type)
+				await asyncio.to_thread(self._send_smtp, server, msg)
+				return
+			url, data = getattr(self, HTTP_CHANNELS[name])(title, content)
+			response = await self._http_async_client().post(url, json=data, timeout=timeout)
+			_check_response(name, response)
+
+		return await self._send_channel(name, _send, timeout)
+
+	async def _send_channel(self, name: str, send, timeout: float) -> dict:
+		started = time.monotonic()
+		error = None
+		try:
+			await asyncio.wait_for(send(), timeout)
+			status = 'sent'
+			print(f'[{name}]: Message push successful!')
+		except asyncio.TimeoutError:
+			status, error = 'timeout', f'no response within {timeout:g}s'
+			print(f'[{name}]: Message push failed! Reason: {error}')
+		except Exception as e:
+			status, error = 'failed', str(e) or type(e).__name__
+			print(f'[{name}]: Message push failed! Reason: {error}')
+		return {'status': status, 'error': error, 'elapsed_ms': int((time.monotonic() - started) * 1000)}
 
 notify = NotificationKit()
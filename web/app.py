@@ -5,15 +5,19 @@ from fastapi import FastAPI, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from starlette.middleware.base import BaseHTTPMiddleware
+from markupsafe import Markup
 
-from web.auth import auth_middleware, is_authenticated, set_auth_cookie, verify_password
-from web.database import init_db
-from web.failure_reason import summarize_reason
+from web.auth import AuthMiddleware, is_authenticated, set_auth_cookie, verify_password
+from web.conditional import conditional
+from web.database import close_db, init_db
+from web.failure_reason import summarize_log_reason
 from web.routes.accounts import router as accounts_router
 from web.routes.checkin import router as checkin_router
+from web.routes.events import router as events_router
 from web.routes.logs import router as logs_router
+from web.routes.notifications import router as notifications_router
 from web.routes.providers import router as providers_router
+from web.routes.stats import router as stats_router
 
 app = FastAPI(title='AnyRouter Check-in', docs_url=None, redoc_url=None)
 
@@ -21,21 +25,37 @@ BASE_DIR = os.path.dirname(__file__)
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, 'templates'))
 app.mount('/static', StaticFiles(directory=os.path.join(BASE_DIR, 'static')), name='static')
 
-app.add_middleware(BaseHTTPMiddleware, dispatch=auth_middleware)
+app.add_middleware(AuthMiddleware)
 
 app.include_router(accounts_router)
 app.include_router(providers_router)
 app.include_router(checkin_router)
 app.include_router(logs_router)
+app.include_router(stats_router)
+app.include_router(events_router)
+app.include_router(notifications_router)
 
 
 @app.on_event('startup')
 async def startup():
 	await init_db()
+	from web.jobs import recover_jobs
+	await recover_jobs()
+	from web.outbox import start_outbox_worker
+	start_outbox_worker()
 	from web.scheduler import start_scheduler
 	start_scheduler()
 
 
+@app.on_event('shutdown')
+async def shutdown():
+	from web.outbox import stop_outbox_worker
+	await stop_outbox_worker()
+	from utils.notify import notify
+	await notify.aclose()
+	await close_db()
+
+
 @app.get('/login', response_class=HTMLResponse)
 async def login_page(request: Request):
 	if is_authenticated(request):
@@ -58,31 +78,61 @@ async def logout():
 	return response
 
 
-@app.get('/', response_class=HTMLResponse)
-async def dashboard(request: Request):
-	from web.database import get_all_accounts, get_checkin_logs, get_setting
-	accounts = await get_all_accounts()
-	success_count = sum(1 for acc in accounts if acc.get('last_status') in {'success', 'already_checked_in'})
-	total_balance = round(
-		sum(acc.get('last_balance') or 0 for acc in accounts if acc.get('last_balance') is not None), 2
+# (versions, data) of the last dashboard build; reused until accounts or logs are written again
+_dashboard_snapshot: tuple[tuple[int, ...], dict] | None = None
+
+
+async def _load_dashboard_snapshot() -> dict:
+	"""Dashboard data, rebuilt only after an account or check-in log has been written."""
+	global _dashboard_snapshot
+	from web.database import (
+		get_account_stats,
+		get_checkin_logs,
+		get_dashboard_accounts,
+		get_dashboard_summary,
+		get_versions,
 	)
+	# Read the version before querying: a write that lands mid-build leaves the stored
+	# snapshot one version behind, so the next request rebuilds it
+	version = get_versions('accounts', 'logs')
+	if _dashboard_snapshot is not None and _dashboard_snapshot[0] == version:
+		return _dashboard_snapshot[1]
+
 	recent_logs = await get_checkin_logs(limit=10)
-	for log in recent_logs:
-		log.update(summarize_reason(log.get('status'), log.get('message')))
+	# The card grid is most of the page; render it once per snapshot instead of per request
+	account_cards = templates.get_template('account_cards.html').render(
+		accounts=await get_dashboard_accounts(),
+		account_stats=await get_account_stats(),
+	)
+	snapshot = {
+		'summary': await get_dashboard_summary(),
+		'account_cards': Markup(account_cards),
+		'recent_logs': [
+			{**log, **summarize_log_reason(log)} for log in recent_logs
+		],
+	}
+	_dashboard_snapshot = (version, snapshot)
+	return snapshot
+
+
+def _next_run_time() -> str:
+	from web.scheduler import get_next_run_time
+	return get_next_run_time() or ''
 
-	cron_expr = await get_setting('cron_expression', '0 */6 * * *')
 
+@app.get('/', response_class=HTMLResponse)
+@conditional('accounts', 'logs', 'settings', extra=_next_run_time)
+async def dashboard(request: Request):
+	from web.database import get_setting
 	from web.scheduler import get_next_run_time
-	next_run = get_next_run_time()
+	snapshot = await _load_dashboard_snapshot()
+	cron_expr = await get_setting('cron_expression', '0 */6 * * *')
 
 	return templates.TemplateResponse('dashboard.html', {
 		'request': request,
-		'accounts': accounts,
-		'success_count': success_count,
-		'recent_logs': recent_logs,
-		'total_balance': total_balance,
+		**snapshot,
 		'cron_expression': cron_expr,
-		'next_run': next_run,
+		'next_run': get_next_run_time(),
 		'active_page': 'dashboard',
 	})
 
@@ -108,3 +158,24 @@ async def update_schedule(request: Request):
 	await do_update(cron_expr)
 	from web.scheduler import get_next_run_time
 	return {'success': True, 'next_run': get_next_run_time()}
+
+
+@app.get('/api/settings/retention')
+async def get_retention():
+	from web.scheduler import get_log_retention_days
+	return {'success': True, 'retention_days': get_log_retention_days()}
+
+
+@app.post('/api/settings/retention')
+async def update_retention(request: Request):
+	from web.database import set_setting
+	from web.scheduler import MIN_LOG_RETENTION_DAYS, get_log_retention_days
+	data = await request.json()
+	try:
+		days = int(data.get('retention_days', ''))
+	except (TypeError, ValueError):
+		return {'success': False, 'message': '保留天数必须为整数'}
+	if days < 0 or 0 < days < MIN_LOG_RETENTION_DAYS:
+		return {'success': False, 'message': f'保留天数需不少于 {MIN_LOG_RETENTION_DAYS} 天，0 表示永久保留'}
+	await set_setting('log_retention_days', str(days))
+	return {'success': True, 'retention_days': get_log_retention_days()}
@@ -2,13 +2,21 @@ import hashlib
 import hmac
 import os
 import time
+from collections import OrderedDict
 
 from fastapi import Request, Response
 from fastapi.responses import RedirectResponse
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'anyrouter-checkin-secret-key-change-me')
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin')
 TOKEN_MAX_AGE = 86400 * 7  # 7 days
+TOKEN_CACHE_SIZE = 128
+
+# token -> issue timestamp of recently verified tokens (LRU), so a page load with a dozen static
+# requests does not recompute the HMAC for each of them. Only valid tokens are cached.
+_verified_tokens: OrderedDict[str, int] = OrderedDict()
 
 
 def _sign_token(timestamp: str) -> str:
@@ -25,16 +33,29 @@ def create_token() -> str:
 def verify_token(token: str) -> bool:
 	if not token:
 		return False
+	now = int(time.time())
+	issued = _verified_tokens.get(token)
+	if issued is not None:
+		if now - issued > TOKEN_MAX_AGE:
+			del _verified_tokens[token]
+			return False
+		_verified_tokens.move_to_end(token)
+		return True
 	try:
 		parts = token.split(':')
 		if len(parts) != 2:
 			return False
 		ts, sig = parts
-		if int(time.time()) - int(ts) > TOKEN_MAX_AGE:
+		if now - int(ts) > TOKEN_MAX_AGE:
+			return False
+		if not hmac.compare_digest(sig, _sign_token(ts)):
 			return False
-		return hmac.compare_digest(sig, _sign_token(ts))
 	except (ValueError, IndexError):
 		return False
+	_verified_tokens[token] = int(ts)
+	if len(_verified_tokens) > TOKEN_CACHE_SIZE:
+		_verified_tokens.popitem(last=False)
+	return True
 
 
 def verify_password(password: str) -> bool:
@@ -58,15 +79,35 @@ def set_auth_cookie(response: Response) -> Response:
 	return response
 
 
-LOGIN_EXEMPT_PATHS = {'/login', '/static'}
+# First path segment of the routes reachable without logging in ('/login', '/static/...')
+LOGIN_EXEMPT_SEGMENTS = frozenset({'login', 'static'})
+
+
+def is_exempt_path(path: str) -> bool:
+	return path.split('/', 2)[1] in LOGIN_EXEMPT_SEGMENTS
+
+
+def _auth_cookie(scope: Scope) -> str | None:
+	for name, value in scope['headers']:
+		if name == b'cookie':
+			return cookie_parser(value.decode('latin-1')).get('auth_token')
+	return None
+
 
+class AuthMiddleware:
+	"""Redirect unauthenticated HTTP requests to /login.
 
-async def auth_middleware(request: Request, call_next):
-	path = request.url.path
-	if any(path.startswith(p) for p in LOGIN_EXEMPT_PATHS):
-		return await call_next(request)
+	Plain ASGI rather than BaseHTTPMiddleware: the request is passed straight through, with no
+	extra task or wrapped response stream, so streaming responses such as /api/events are not
+	buffered.
+	"""
 
-	if not is_authenticated(request):
-		return RedirectResponse(url='/login', status_code=302)
+	def __init__(self, app: ASGIApp):
+		self.app = app
 
-	return await call_next(request)
+	async def __call__(self, scope: Scope, receive: Receive, send: Send):
+		if scope['type'] != 'http' or is_exempt_path(scope['path']) or verify_token(_auth_cookie(scope)):
+			await self.app(scope, receive, send)
+			return
+		response = RedirectResponse(url='/login', status_code=302)
+		await response(scope, receive, send)
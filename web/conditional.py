@@ -0,0 +1,85 @@
+"""Conditional GET (ETag / Last-Modified) for pages and list endpoints.
+
+A response's ETag is built from the change versions of the resources it is rendered from
+(get_versions in web/database.py). A client revalidating with a matching If-None-Match is
+answered 304 before the handler runs, so no query is made and no template rendered.
+"""
+
+import functools
+import hashlib
+import time
+import uuid
+from collections.abc import Callable
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from web.database import get_changed_at, get_versions
+
+# Versions restart at 0 with the process; the boot id keeps an old ETag from matching new data
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+def build_etag(resources: tuple[str, ...], extra: str = '') -> str:
+	tag = f'{BOOT_ID}-' + '.'.join(str(v) for v in get_versions(*resources))
+	if extra:
+		tag += '-' + hashlib.sha1(extra.encode()).hexdigest()[:8]
+	return f'W/"{tag}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+	if if_none_match.strip() == '*':
+		return True
+	opaque = etag.removeprefix('W/')
+	return any(candidate.strip().removeprefix('W/') == opaque for candidate in if_none_match.split(','))
+
+
+def _not_modified_since(if_modified_since: str, changed_at: int) -> bool:
+	try:
+		since = parsedate_to_datetime(if_modified_since).timestamp()
+	except (TypeError, ValueError):
+		return False
+	return changed_at <= since
+
+
+def conditional(*resources: str, extra: Callable[[], str] | None = None):
+	"""Answer unchanged GETs of the decorated handler with 304 Not Modified.
+
+	`resources` are the change versions the response depends on; `extra` returns any other
+	in-memory state baked into it (e.g. the next scheduled run). The handler must take a
+	`request: Request` argument; plain dict results are sent as JSON.
+	"""
+
+	def decorator(handler):
+		@functools.wraps(handler)
+		async def wrapper(*args, **kwargs):
+			request: Request = kwargs['request']
+			# Taken before the handler reads anything: a write landing mid-request only makes
+			# the next revalidation miss, never pins stale data
+			etag = build_etag(resources, extra() if extra else '')
+			changed_at = int(get_changed_at(*resources))
+			headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+			# HTTP dates have one-second resolution: advertising the current second would let a
+			# later write in that same second still pass If-Modified-Since
+			if changed_at < int(time.time()):
+				headers['Last-Modified'] = formatdate(changed_at, usegmt=True)
+
+			if_none_match = request.headers.get('if-none-match')
+			if if_none_match is not None:
+				fresh = etag_matches(if_none_match, etag)
+			else:
+				if_modified_since = request.headers.get('if-modified-since')
+				fresh = if_modified_since is not None and _not_modified_since(if_modified_since, changed_at)
+			if fresh:
+				return Response(status_code=304, headers=headers)
+
+			response = await handler(*args, **kwargs)
+			if not isinstance(response, Response):
+				response = JSONResponse(response)
+			response.headers.update(headers)
+			return response
+
+		return wrapper
+
+	return decorator
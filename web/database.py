@@ -1,20 +1,307 @@
+import asyncio
 import json
 import os
+import re
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
 import aiosqlite
 
+from utils.classifier import classify_results
+from web.failure_reason import categorize_checkin_result
+
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'checkin.db')
 
 
-async def get_db():
-	os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-	db = await aiosqlite.connect(DB_PATH)
+def _env_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+	value = os.getenv(name, default).strip().upper()
+	return value if value in choices else default
+
+
+# --- Connection profile & pool ---
+# Defaults were picked with benchmarks/bench_database.py; every value can be overridden via env.
+
+SQLITE_PRAGMAS = (
+	('journal_mode', _env_choice('SQLITE_JOURNAL_MODE', 'WAL', ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY'))),
+	('synchronous', _env_choice('SQLITE_SYNCHRONOUS', 'NORMAL', ('OFF', 'NORMAL', 'FULL', 'EXTRA'))),
+	('busy_timeout', int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))),
+	# negative cache_size is in KiB rather than pages
+	('cache_size', -abs(int(os.getenv('SQLITE_CACHE_SIZE_KB', '16384')))),
+	('mmap_size', int(os.getenv('SQLITE_MMAP_SIZE', str(64 * 1024 * 1024)))),
+	('temp_store', _env_choice('SQLITE_TEMP_STORE', 'MEMORY', ('DEFAULT', 'FILE', 'MEMORY'))),
+)
+SQLITE_POOL_SIZE = max(1, int(os.getenv('SQLITE_POOL_SIZE', '4')))
+SQLITE_OPTIMIZE_INTERVAL = int(os.getenv('SQLITE_OPTIMIZE_INTERVAL', '3600'))
+
+
+async def _open_connection(path: str) -> aiosqlite.Connection:
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	db = aiosqlite.connect(path)
+	await db
 	db.row_factory = aiosqlite.Row
-	await db.execute('PRAGMA journal_mode=WAL')
+	for name, value in SQLITE_PRAGMAS:
+		await db.execute(f'PRAGMA {name}={value}')
 	return db
 
 
+async def get_db():
+	"""Open a dedicated profiled connection; the caller closes it. Regular queries use connection()."""
+	return await _open_connection(DB_PATH)
+
+
+class _ConnectionPool:
+	"""Up to `size` profiled connections to one database file, reused across calls.
+
+	The semaphore is bound to the event loop that created the pool, so asyncio.run() in tests and
+	scripts gets a fresh pool.
+	"""
+
+	def __init__(self, path: str, size: int):
+		self.path = path
+		self.loop = asyncio.get_running_loop()
+		self._idle: list[aiosqlite.Connection] = []
+		self._slots = asyncio.Semaphore(size)
+		self._last_optimize = time.monotonic()
+
+	async def acquire(self) -> aiosqlite.Connection:
+		await self._slots.acquire()
+		try:
+			return self._idle.pop() if self._idle else await _open_connection(self.path)
+		except BaseException:
+			self._slots.release()
+			raise
+
+	async def release(self, db: aiosqlite.Connection):
+		try:
+			if db.in_transaction:
+				await db.rollback()
+			if SQLITE_OPTIMIZE_INTERVAL > 0 and time.monotonic() - self._last_optimize >= SQLITE_OPTIMIZE_INTERVAL:
+				self._last_optimize = time.monotonic()
+				await db.execute('PRAGMA optimize')
+			if _pool is self:
+				self._idle.append(db)
+			else:
+				await db.close()
+		except Exception:
+			# a connection that cannot roll back is not reused
+			try:
+				await db.close()
+			except Exception:
+				pass
+		finally:
+			self._slots.release()
+
+	async def close(self):
+		idle, self._idle = self._idle, []
+		for db in idle:
+			try:
+				await db.execute('PRAGMA optimize')
+			except Exception:
+				pass
+			finally:
+				await db.close()
+
+
+_pool: _ConnectionPool | None = None
+
+
+async def _get_pool() -> _ConnectionPool:
+	global _pool
+	if _pool is None or _pool.path != DB_PATH or _pool.loop is not asyncio.get_running_loop():
+		stale, _pool = _pool, _ConnectionPool(DB_PATH, SQLITE_POOL_SIZE)
+		if stale is not None:
+			# aiosqlite connections are not tied to a loop, so stale ones can be closed from this one.
+			await stale.close()
+	return _pool
+
+
+@asynccontextmanager
+async def connection():
+	"""Borrow a pooled connection; an uncommitted transaction is rolled back on return."""
+	pool = await _get_pool()
+	db = await pool.acquire()
+	try:
+		yield db
+	finally:
+		await pool.release(db)
+
+
+async def close_db_pool():
+	"""Close pooled connections (app shutdown); PRAGMA optimize runs on each before it closes."""
+	global _pool
+	if _pool is None:
+		return
+	pool, _pool = _pool, None
+	await pool.close()
+
+
+# --- Single writer ---
+# Every mutation runs on one dedicated connection fed by a bounded queue, so writers never
+# contend for the SQLite write lock. Operations already queued when the writer wakes up are
+# applied back to back in one transaction, each inside its own savepoint (a failing operation
+# only rolls back itself), and committed together.
+
+WRITE_QUEUE_SIZE = max(1, int(os.getenv('SQLITE_WRITE_QUEUE_SIZE', '1000')))
+WRITE_BATCH_SIZE = max(1, int(os.getenv('SQLITE_WRITE_BATCH_SIZE', '100')))
+
+
+# stands in for a queue item that has already been added to the current batch
+_DRAINED = object()
+
+
+class _Writer:
+	"""Owns the writer connection and the task draining the write queue for one event loop."""
+
+	def __init__(self, path: str):
+		self.path = path
+		self.loop = asyncio.get_running_loop()
+		self.queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+		self.db: aiosqlite.Connection | None = None
+		self.task = self.loop.create_task(self._run())
+
+	async def submit(self, op, transaction: bool = True):
+		future = self.loop.create_future()
+		# put() waits while the queue is full, which is the back-pressure on callers
+		await self.queue.put((op, future, transaction))
+		return await future
+
+	async def _run(self):
+		while True:
+			item = await self.queue.get()
+			while item is not None:
+				if not item[2]:
+					await self._apply_alone(item[0], item[1])
+					break
+				batch = [item]
+				item = _DRAINED
+				while len(batch) < WRITE_BATCH_SIZE and not self.queue.empty():
+					item = self.queue.get_nowait()
+					if item is None or not item[2]:
+						break  # the sentinel, or an op that must run outside the shared transaction
+					batch.append(item)
+					item = _DRAINED
+				await self._apply(batch)
+				if item is _DRAINED:
+					break
+			if item is None:
+				return
+
+	async def _apply_alone(self, op, future):
+		if future.cancelled():
+			return
+		try:
+			if self.db is None:
+				self.db = await _open_connection(self.path)
+			result = await op(self.db)
+			if self.db.in_transaction:
+				await self.db.commit()
+		except Exception as e:
+			if self.db is not None and self.db.in_transaction:
+				try:
+					await self.db.rollback()
+				except Exception:
+					pass
+			if not future.done():
+				future.set_exception(e)
+			return
+		if not future.done():
+			future.set_result(result)
+
+	async def _apply(self, batch: list):
+		batch = [(op, future) for op, future, _ in batch if not future.cancelled()]
+		if not batch:
+			return
+		outcomes = []
+		try:
+			if self.db is None:
+				self.db = await _open_connection(self.path)
+			await self.db.execute('BEGIN IMMEDIATE')
+			for op, future in batch:
+				await self.db.execute('SAVEPOINT write_op')
+				try:
+					result = await op(self.db)
+				except Exception as e:
+					await self.db.execute('ROLLBACK TO write_op')
+					await self.db.execute('RELEASE write_op')
+					outcomes.append((future, None, e))
+				else:
+					await self.db.execute('RELEASE write_op')
+					outcomes.append((future, result, None))
+			await self.db.commit()
+		except Exception as e:
+			if self.db is not None:
+				try:
+					await self.db.rollback()
+				except Exception:
+					pass
+			for _, future in batch:
+				if not future.done():
+					future.set_exception(e)
+			return
+
+		for future, result, error in outcomes:
+			if future.done():
+				continue
+			if error is not None:
+				future.set_exception(error)
+			else:
+				future.set_result(result)
+
+	async def close(self):
+		if self.loop is asyncio.get_running_loop() and not self.task.done():
+			# the sentinel is queued behind pending writes, so they are still committed
+			await self.queue.put(None)
+			await self.task
+		while not self.queue.empty():
+			item = self.queue.get_nowait()
+			if item is not None and not item[1].done():
+				item[1].set_exception(RuntimeError('database writer is closed'))
+		if self.db is not None:
+			await self.db.close()
+			self.db = None
+
+
+_writer: _Writer | None = None
+
+
+async def _get_writer() -> _Writer:
+	global _writer
+	if _writer is None or _writer.path != DB_PATH or _writer.loop is not asyncio.get_running_loop():
+		stale, _writer = _writer, _Writer(DB_PATH)
+		if stale is not None:
+			await stale.close()
+	return _writer
+
+
+async def _write(op):
+	"""Run `op(db)` on the writer connection and return its result once the write is committed.
+
+	`op` must not commit or open its own transaction: it runs in a savepoint of a transaction
+	shared with the other queued writes.
+	"""
+	writer = await _get_writer()
+	return await writer.submit(op)
+
+
+async def _write_alone(op):
+	"""Like _write(), but `op` runs by itself in autocommit mode, outside the batched transaction.
+
+	For statements that do nothing useful inside a transaction, such as PRAGMA incremental_vacuum.
+	"""
+	writer = await _get_writer()
+	return await writer.submit(op, transaction=False)
+
+
+async def close_db():
+	"""Flush and close the writer, then the read pool (app shutdown)."""
+	global _writer
+	if _writer is not None:
+		writer, _writer = _writer, None
+		await writer.close()
+	await close_db_pool()
+
+
 async def init_db():
 	db = await get_db()
 	try:
@@ -76,14 +363,38 @@ async def init_db():
 				fetched_at TEXT NOT NULL,
 				expires_at TEXT NOT NULL
 			);
+
+			CREATE TABLE IF NOT EXISTS schema_version (
+				version INTEGER PRIMARY KEY,
+				applied_at TEXT NOT NULL
+			);
 		''')
 		await _init_builtin_providers(db)
-		await _migrate_builtin_provider_paths(db)
-		await _migrate_old_newapi_provider(db)
-		await _migrate_accounts_table(db)
 		await db.commit()
+		await _apply_migrations(db)
 	finally:
 		await db.close()
+	await load_settings()
+
+
+async def _get_schema_version(db) -> int:
+	cursor = await db.execute('SELECT MAX(version) FROM schema_version')
+	row = await cursor.fetchone()
+	return row[0] or 0
+
+
+async def _apply_migrations(db):
+	"""Apply pending migrations in order, recording each version once it is committed."""
+	current = await _get_schema_version(db)
+	for version, migration in MIGRATIONS:
+		if version <= current:
+			continue
+		await migration(db)
+		await db.execute(
+			'INSERT INTO schema_version (version, applied_at) VALUES (?, ?)',
+			(version, datetime.now().isoformat())
+		)
+		await db.commit()
 
 
 async def _init_builtin_providers(db):
@@ -143,36 +454,334 @@ async def _migrate_accounts_table(db):
 			await db.execute(sql)
 
 
+# Composite indexes matching the filters and the stable ORDER BY of get_checkin_logs / get_log_count.
+# The rowid (id) is implicitly the last column of every index, so (created_at) also orders by id.
+CHECKIN_LOG_INDEXES = (
+	'CREATE INDEX IF NOT EXISTS idx_checkin_logs_created ON checkin_logs (created_at)',
+	'CREATE INDEX IF NOT EXISTS idx_checkin_logs_account_created ON checkin_logs (account_id, created_at)',
+	'CREATE INDEX IF NOT EXISTS idx_checkin_logs_status_created ON checkin_logs (status, created_at)',
+)
+
+
+async def _migrate_checkin_logs_indexes(db):
+	"""Create secondary indexes for log listing and counting."""
+	for sql in CHECKIN_LOG_INDEXES:
+		await db.execute(sql)
+	await db.execute('ANALYZE checkin_logs')
+
+
+async def _migrate_daily_stats_table(db):
+	"""Create the daily rollup table and switch the database to incremental auto-vacuum."""
+	await db.execute('''
+		CREATE TABLE IF NOT EXISTS checkin_daily_stats (
+			account_id INTEGER NOT NULL,
+			day TEXT NOT NULL,
+			account_name TEXT NOT NULL,
+			provider TEXT NOT NULL,
+			total_count INTEGER NOT NULL DEFAULT 0,
+			success_count INTEGER NOT NULL DEFAULT 0,
+			already_checked_in_count INTEGER NOT NULL DEFAULT 0,
+			failed_count INTEGER NOT NULL DEFAULT 0,
+			category_counts TEXT NOT NULL DEFAULT '{}',
+			last_balance REAL,
+			last_used REAL,
+			last_log_at TEXT,
+			PRIMARY KEY (account_id, day)
+		)
+	''')
+	await db.execute('CREATE INDEX IF NOT EXISTS idx_checkin_daily_stats_day ON checkin_daily_stats (day)')
+	await db.commit()
+	cursor = await db.execute('PRAGMA auto_vacuum')
+	row = await cursor.fetchone()
+	if row[0] != 2:
+		# auto_vacuum mode only changes on a fresh database or after a full VACUUM: a one-off cost on
+		# upgrade that blocks startup and needs about twice the file size in free disk (see README)
+		await db.execute('PRAGMA auto_vacuum = INCREMENTAL')
+		await db.execute('VACUUM')
+
+
+async def _migrate_account_stats_table(db):
+	"""Add check-in latency to logs and create the per-account stats table, backfilled from history."""
+	cursor = await db.execute('PRAGMA table_info(checkin_logs)')
+	columns = {row[1] for row in await cursor.fetchall()}
+	if 'duration_ms' not in columns:
+		await db.execute('ALTER TABLE checkin_logs ADD COLUMN duration_ms INTEGER')
+	await db.execute('''
+		CREATE TABLE IF NOT EXISTS account_stats (
+			account_id INTEGER PRIMARY KEY,
+			last_status TEXT,
+			last_checkin_at TEXT,
+			current_streak INTEGER NOT NULL DEFAULT 0,
+			success_7d INTEGER NOT NULL DEFAULT 0,
+			total_7d INTEGER NOT NULL DEFAULT 0,
+			success_30d INTEGER NOT NULL DEFAULT 0,
+			total_30d INTEGER NOT NULL DEFAULT 0,
+			last_failure_category TEXT,
+			last_failure_at TEXT,
+			last_balance REAL,
+			balance_day TEXT,
+			prev_day_balance REAL,
+			latency_count INTEGER NOT NULL DEFAULT 0,
+			latency_total_ms INTEGER NOT NULL DEFAULT 0
+		)
+	''')
+	await _backfill_account_stats(db)
+
+
+async def _migrate_balance_series_table(db):
+	"""Create the compact balance time-series table and backfill it from logs and daily rollups."""
+	await db.execute('''
+		CREATE TABLE IF NOT EXISTS balance_series (
+			account_id INTEGER NOT NULL,
+			ts INTEGER NOT NULL,
+			quota REAL NOT NULL,
+			used REAL,
+			PRIMARY KEY (account_id, ts)
+		) WITHOUT ROWID
+	''')
+	cursor = await db.execute(
+		'SELECT account_id, created_at, balance, used_quota FROM checkin_logs '
+		'WHERE account_id IS NOT NULL AND balance IS NOT NULL'
+	)
+	rows = [
+		(r['account_id'], _to_epoch(r['created_at']), r['balance'], r['used_quota'])
+		for r in await cursor.fetchall()
+	]
+	cursor = await db.execute(
+		'SELECT account_id, last_log_at, last_balance, last_used FROM checkin_daily_stats '
+		'WHERE last_balance IS NOT NULL AND last_log_at IS NOT NULL'
+	)
+	rows.extend(
+		(r['account_id'], _to_epoch(r['last_log_at']), r['last_balance'], r['last_used'])
+		for r in await cursor.fetchall()
+	)
+	await db.executemany(
+		'INSERT OR REPLACE INTO balance_series (account_id, ts, quota, used) VALUES (?, ?, ?, ?)', rows
+	)
+
+
+async def _migrate_checkin_logs_fts(db):
+	"""Full-text index over log message/account/provider, kept in sync with checkin_logs by triggers.
+
+	The trigram tokenizer matches substrings, so Chinese text without word breaks and partial
+	upstream error strings are searchable; terms shorter than 3 characters fall back to LIKE.
+	"""
+	await db.executescript('''
+		CREATE VIRTUAL TABLE IF NOT EXISTS checkin_logs_fts USING fts5(
+			message, account_name, provider,
+			content='checkin_logs', content_rowid='id', tokenize='trigram'
+		);
+
+		CREATE TRIGGER IF NOT EXISTS checkin_logs_fts_ai AFTER INSERT ON checkin_logs BEGIN
+			INSERT INTO checkin_logs_fts (rowid, message, account_name, provider)
+			VALUES (new.id, new.message, new.account_name, new.provider);
+		END;
+
+		CREATE TRIGGER IF NOT EXISTS checkin_logs_fts_ad AFTER DELETE ON checkin_logs BEGIN
+			INSERT INTO checkin_logs_fts (checkin_logs_fts, rowid, message, account_name, provider)
+			VALUES ('delete', old.id, old.message, old.account_name, old.provider);
+		END;
+
+		CREATE TRIGGER IF NOT EXISTS checkin_logs_fts_au
+		AFTER UPDATE OF message, account_name, provider ON checkin_logs BEGIN
+			INSERT INTO checkin_logs_fts (checkin_logs_fts, rowid, message, account_name, provider)
+			VALUES ('delete', old.id, old.message, old.account_name, old.provider);
+			INSERT INTO checkin_logs_fts (rowid, message, account_name, provider)
+			VALUES (new.id, new.message, new.account_name, new.provider);
+		END;
+	''')
+	await db.execute("INSERT INTO checkin_logs_fts (checkin_logs_fts) VALUES ('rebuild')")
+
+
+async def _migrate_checkin_logs_error_category(db):
+	"""Store the failure category of each log so pages filter and count it in SQL.
+
+	Existing rows are classified once here, a chunk at a time through the batch classifier, which
+	matches each distinct message only once; the FTS update trigger only watches the text columns,
+	so it does not fire.
+	"""
+	cursor = await db.execute('PRAGMA table_info(checkin_logs)')
+	columns = {row[1] for row in await cursor.fetchall()}
+	if 'error_category' not in columns:
+		await db.execute('ALTER TABLE checkin_logs ADD COLUMN error_category TEXT')
+	last_id = 0
+	while True:
+		cursor = await db.execute(
+			'SELECT id, status, message FROM checkin_logs WHERE error_category IS NULL AND id > ? ORDER BY id LIMIT ?',
+			(last_id, LOG_RETENTION_CHUNK_SIZE)
+		)
+		rows = await cursor.fetchall()
+		if not rows:
+			break
+		categories = classify_results((row[1], row[2]) for row in rows)
+		await db.executemany(
+			'UPDATE checkin_logs SET error_category = ? WHERE id = ?',
+			[(category, row[0]) for category, row in zip(categories, rows)]
+		)
+		last_id = rows[-1][0]
+	await db.execute(
+		'CREATE INDEX IF NOT EXISTS idx_checkin_logs_category_created ON checkin_logs (error_category, created_at)'
+	)
+	await db.execute('ANALYZE checkin_logs')
+
+
+async def _migrate_checkin_jobs_table(db):
+	"""Persist "check in all" job progress so job status survives restarts."""
+	await db.execute('''
+		CREATE TABLE IF NOT EXISTS checkin_jobs (
+			id TEXT PRIMARY KEY,
+			triggered_by TEXT NOT NULL,
+			status TEXT NOT NULL,
+			total INTEGER NOT NULL DEFAULT 0,
+			done INTEGER NOT NULL DEFAULT 0,
+			counts TEXT NOT NULL DEFAULT '{}',
+			current TEXT NOT NULL DEFAULT '[]',
+			error TEXT,
+			created_at TEXT NOT NULL,
+			started_at TEXT,
+			finished_at TEXT
+		)
+	''')
+	await db.execute('CREATE INDEX IF NOT EXISTS idx_checkin_jobs_created ON checkin_jobs (created_at)')
+
+
+async def _migrate_notification_outbox_table(db):
+	"""One row per (message, channel); web.outbox delivers them with retry/backoff."""
+	await db.execute('''
+		CREATE TABLE IF NOT EXISTS notification_outbox (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			channel TEXT NOT NULL,
+			title TEXT NOT NULL,
+			content TEXT NOT NULL,
+			msg_type TEXT NOT NULL DEFAULT 'text',
+			status TEXT NOT NULL DEFAULT 'pending',
+			attempts INTEGER NOT NULL DEFAULT 0,
+			last_error TEXT,
+			next_attempt_at TEXT NOT NULL,
+			created_at TEXT NOT NULL,
+			sent_at TEXT
+		)
+	''')
+	await db.execute(
+		'CREATE INDEX IF NOT EXISTS idx_notification_outbox_due ON notification_outbox (status, next_attempt_at)'
+	)
+
+
+async def _migrate_account_stats_window_day(db):
+	"""Record the day the 7/30-day counters were counted for, so inserts can bump them in place."""
+	cursor = await db.execute('PRAGMA table_info(account_stats)')
+	columns = {row[1] for row in await cursor.fetchall()}
+	if 'window_day' not in columns:
+		await db.execute('ALTER TABLE account_stats ADD COLUMN window_day TEXT')
+	await _refresh_window_counts(db, datetime.now())
+
+
+async def _migrate_checkin_jobs_merged_triggers(db):
+	"""Keep the trigger of every run request merged into a job, so merged scheduled runs stay visible."""
+	cursor = await db.execute('PRAGMA table_info(checkin_jobs)')
+	columns = {row[1] for row in await cursor.fetchall()}
+	if 'merged_triggers' not in columns:
+		await db.execute("ALTER TABLE checkin_jobs ADD COLUMN merged_triggers TEXT NOT NULL DEFAULT '[]'")
+
+
+# (version, migration) pairs, applied once each by init_db in ascending order.
+MIGRATIONS = [
+	(1, _migrate_builtin_provider_paths),
+	(2, _migrate_old_newapi_provider),
+	(3, _migrate_accounts_table),
+	(4, _migrate_checkin_logs_indexes),
+	(5, _migrate_daily_stats_table),
+	(6, _migrate_account_stats_table),
+	(7, _migrate_balance_series_table),
+	(8, _migrate_checkin_logs_fts),
+	(9, _migrate_checkin_jobs_table),
+	(10, _migrate_checkin_logs_error_category),
+	(11, _migrate_notification_outbox_table),
+	(12, _migrate_account_stats_window_day),
+	(13, _migrate_checkin_jobs_merged_triggers),
+]
+
+
+# --- Change versions ---
+# One counter per resource, bumped after every committed write to it. The dashboard snapshot
+# and the ETags of pages / list endpoints (web/conditional.py) are derived from them, so an
+# unchanged resource can be answered without querying SQLite.
+
+RESOURCES = ('accounts', 'providers', 'logs', 'settings')
+
+_versions = dict.fromkeys(RESOURCES, 0)
+_changed_at = dict.fromkeys(RESOURCES, time.time())
+
+
+def get_versions(*resources: str) -> tuple[int, ...]:
+	return tuple(_versions[name] for name in resources)
+
+
+def get_changed_at(*resources: str) -> float:
+	"""Wall-clock time of the latest write to any of `resources` (process start if none)."""
+	return max(_changed_at[name] for name in resources)
+
+
+def bump_version(*resources: str):
+	now = time.time()
+	for name in resources:
+		_versions[name] += 1
+		_changed_at[name] = now
+
+
 # --- Account CRUD ---
 
 async def get_all_accounts():
-	db = await get_db()
-	try:
+	async with connection() as db:
 		cursor = await db.execute('SELECT * FROM accounts ORDER BY id')
 		rows = await cursor.fetchall()
 		return [dict(r) for r in rows]
-	finally:
-		await db.close()
+
+
+# Columns the dashboard cards need; cookies/passwords never leave the database for a page render.
+DASHBOARD_ACCOUNT_COLUMNS = (
+	'id, name, provider, domain, auth_method, enabled, last_status, last_balance, last_used, last_checkin'
+)
+
+
+async def get_dashboard_accounts() -> list[dict]:
+	async with connection() as db:
+		cursor = await db.execute(f'SELECT {DASHBOARD_ACCOUNT_COLUMNS} FROM accounts ORDER BY id')
+		return [dict(r) for r in await cursor.fetchall()]
+
+
+async def get_dashboard_summary() -> dict:
+	"""Account totals for the dashboard stat cards, computed in a single aggregate query."""
+	async with connection() as db:
+		cursor = await db.execute('''
+			SELECT COUNT(*) AS total,
+				   COALESCE(SUM(enabled), 0) AS enabled,
+				   COALESCE(SUM(last_status IN ('success', 'already_checked_in')), 0) AS success,
+				   COALESCE(SUM(last_status = 'failed'), 0) AS failed,
+				   ROUND(COALESCE(SUM(last_balance), 0), 2) AS total_balance
+			FROM accounts
+		''')
+		return dict(await cursor.fetchone())
 
 
 async def get_account(account_id: int):
-	db = await get_db()
-	try:
+	async with connection() as db:
 		cursor = await db.execute('SELECT * FROM accounts WHERE id = ?', (account_id,))
 		row = await cursor.fetchone()
 		return dict(row) if row else None
-	finally:
-		await db.close()
+
+
+async def get_account_ids() -> list[int]:
+	async with connection() as db:
+		cursor = await db.execute('SELECT id FROM accounts ORDER BY id')
+		return [row[0] for row in await cursor.fetchall()]
 
 
 async def get_enabled_accounts():
-	db = await get_db()
-	try:
+	async with connection() as db:
 		cursor = await db.execute('SELECT * FROM accounts WHERE enabled = 1 ORDER BY id')
 		rows = await cursor.fetchall()
 		return [dict(r) for r in rows]
-	finally:
-		await db.close()
 
 
 async def create_account(name: str, provider: str, auth_method: str = 'cookie',
@@ -180,80 +789,116 @@ async def create_account(name: str, provider: str, auth_method: str = 'cookie',
 						 username: str = '', password: str = '',
 						 domain: str = ''):
 	now = datetime.now().isoformat()
-	db = await get_db()
-	try:
+
+	async def _insert(db):
 		cursor = await db.execute(
 			'''INSERT INTO accounts (name, provider, auth_method, cookies, api_user,
 			   username, password, domain, enabled, created_at, updated_at)
 			   VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)''',
 			(name, provider, auth_method, cookies, api_user, username, password, domain, now, now)
 		)
-		await db.commit()
 		return cursor.lastrowid
-	finally:
-		await db.close()
+
+	account_id = await _write(_insert)
+	bump_version('accounts')
+	return account_id
+
+
+async def create_accounts_bulk(accounts: list[dict]) -> int:
+	"""Insert already-validated accounts in a single transaction; returns the number inserted."""
+	now = datetime.now().isoformat()
+	rows = [
+		(
+			acc['name'], acc['provider'], acc.get('auth_method', 'cookie'), acc.get('cookies', ''),
+			acc.get('api_user', ''), acc.get('username', ''), acc.get('password', ''),
+			acc.get('domain', ''), acc.get('enabled', 1), now, now,
+		)
+		for acc in accounts
+	]
+
+	async def _insert(db):
+		await db.executemany(
+			'''INSERT INTO accounts (name, provider, auth_method, cookies, api_user,
+			   username, password, domain, enabled, created_at, updated_at)
+			   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+			rows,
+		)
+
+	await _write(_insert)
+	bump_version('accounts')
+	return len(rows)
+
+
+async def iter_accounts(batch_size: int = 200):
+	"""Yield accounts in id order, fetching one keyset page per pooled connection checkout."""
+	last_id = 0
+	while True:
+		async with connection() as db:
+			cursor = await db.execute(
+				'SELECT * FROM accounts WHERE id > ? ORDER BY id LIMIT ?', (last_id, batch_size)
+			)
+			rows = [dict(r) for r in await cursor.fetchall()]
+		for row in rows:
+			yield row
+		if len(rows) < batch_size:
+			return
+		last_id = rows[-1]['id']
 
 
 async def update_account(account_id: int, **kwargs):
 	kwargs['updated_at'] = datetime.now().isoformat()
 	set_clause = ', '.join(f'{k} = ?' for k in kwargs)
 	values = list(kwargs.values()) + [account_id]
-	db = await get_db()
-	try:
+
+	async def _update(db):
 		await db.execute(f'UPDATE accounts SET {set_clause} WHERE id = ?', values)
-		await db.commit()
-	finally:
-		await db.close()
+
+	await _write(_update)
+	bump_version('accounts')
 
 
 async def delete_account(account_id: int):
-	db = await get_db()
-	try:
+	async def _delete(db):
 		await db.execute('DELETE FROM accounts WHERE id = ?', (account_id,))
-		await db.commit()
-	finally:
-		await db.close()
+		await db.execute('DELETE FROM account_stats WHERE account_id = ?', (account_id,))
+		await db.execute('DELETE FROM balance_series WHERE account_id = ?', (account_id,))
+
+	await _write(_delete)
+	bump_version('accounts', 'logs')
 
 
 async def toggle_account(account_id: int):
-	db = await get_db()
-	try:
+	async def _toggle(db):
 		await db.execute('UPDATE accounts SET enabled = 1 - enabled, updated_at = ? WHERE id = ?',
 						 (datetime.now().isoformat(), account_id))
-		await db.commit()
-	finally:
-		await db.close()
+
+	await _write(_toggle)
+	bump_version('accounts')
 
 
 # --- Provider CRUD ---
 
 async def get_all_providers():
-	db = await get_db()
-	try:
+	async with connection() as db:
 		cursor = await db.execute('SELECT * FROM providers ORDER BY is_builtin DESC, id')
 		rows = await cursor.fetchall()
 		return [dict(r) for r in rows]
-	finally:
-		await db.close()
 
 
 async def get_provider(name: str):
-	db = await get_db()
-	try:
+	async with connection() as db:
 		cursor = await db.execute('SELECT * FROM providers WHERE name = ?', (name,))
 		row = await cursor.fetchone()
 		return dict(row) if row else None
-	finally:
-		await db.close()
 
 
 async def create_provider(name: str, domain: str, **kwargs):
 	now = datetime.now().isoformat()
-	db = await get_db()
-	try:
-		waf_names = kwargs.get('waf_cookie_names', '')
-		if isinstance(waf_names, list):
-			waf_names = json.dumps(waf_names)
+	waf_names = kwargs.get('waf_cookie_names', '')
+	if isinstance(waf_names, list):
+		waf_names = json.dumps(waf_names)
+
+	async def _insert(db):
 		await db.execute(
 			'''INSERT INTO providers (name, domain, login_path, sign_in_path, user_info_path,
 			   api_user_key, bypass_method, waf_cookie_names, is_builtin, created_at)
@@ -267,9 +912,9 @@ async def create_provider(name: str, domain: str, **kwargs):
 			 waf_names,
 			 now)
 		)
-		await db.commit()
-	finally:
-		await db.close()
+
+	await _write(_insert)
+	bump_version('providers')
 
 
 async def update_provider(name: str, **kwargs):
@@ -277,55 +922,77 @@ async def update_provider(name: str, **kwargs):
 		kwargs['waf_cookie_names'] = json.dumps(kwargs['waf_cookie_names'])
 	set_clause = ', '.join(f'{k} = ?' for k in kwargs)
 	values = list(kwargs.values()) + [name]
-	db = await get_db()
-	try:
+
+	async def _update(db):
 		await db.execute(f'UPDATE providers SET {set_clause} WHERE name = ? AND is_builtin = 0', values)
-		await db.commit()
-	finally:
-		await db.close()
+
+	await _write(_update)
+	bump_version('providers')
 
 
 async def delete_provider(name: str):
-	db = await get_db()
-	try:
+	async def _delete(db):
 		await db.execute('DELETE FROM providers WHERE name = ? AND is_builtin = 0', (name,))
-		await db.commit()
-	finally:
-		await db.close()
+
+	await _write(_delete)
+	bump_version('providers')
 
 
 # --- Log CRUD ---
 
 async def add_checkin_log(account_id: int, account_name: str, provider: str,
 						  status: str, balance=None, used_quota=None,
-						  message='', triggered_by='schedule'):
-	db = await get_db()
-	try:
+						  message='', triggered_by='schedule', duration_ms=None) -> str:
+	"""Insert a log (with its failure category) and update the account's stats; returns the category."""
+	now = datetime.now()
+	category = categorize_checkin_result(status, message)
+
+	async def _insert(db):
 		await db.execute(
 			'''INSERT INTO checkin_logs (account_id, account_name, provider, status,
-			   balance, used_quota, message, triggered_by, created_at)
-			   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+			   balance, used_quota, message, triggered_by, duration_ms, error_category, created_at)
+			   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
 			(account_id, account_name, provider, status,
-			 balance, used_quota, message, triggered_by,
-			 datetime.now().isoformat())
+			 balance, used_quota, message, triggered_by, duration_ms, category,
+			 now.isoformat())
 		)
-		await db.commit()
-	finally:
-		await db.close()
-
-
-async def get_checkin_logs(limit=50, offset=0, account_id=None, status=None):
-	db = await get_db()
-	try:
-		conditions = []
-		params = []
 		if account_id is not None:
-			conditions.append('account_id = ?')
-			params.append(account_id)
-		if status:
-			conditions.append('status = ?')
-			params.append(status)
-
+			await _update_account_stats(
+				db, account_id, status, category, balance, duration_ms, now
+			)
+			if balance is not None:
+				await _append_balance_point(db, account_id, now, balance, used_quota)
+
+	await _write(_insert)
+	bump_version('logs')
+	return category
+
+
+def _log_filters(account_id=None, status=None, category=None, since=None, until=None) -> tuple[list[str], list]:
+	"""WHERE conditions for the log filters; `since` is inclusive and `until` exclusive (ISO strings)."""
+	conditions = []
+	params = []
+	if account_id is not None:
+		conditions.append('account_id = ?')
+		params.append(account_id)
+	if status:
+		conditions.append('status = ?')
+		params.append(status)
+	if category:
+		conditions.append('error_category = ?')
+		params.append(category)
+	if since:
+		conditions.append('created_at >= ?')
+		params.append(since)
+	if until:
+		conditions.append('created_at < ?')
+		params.append(until)
+	return conditions, params
+
+
+async def get_checkin_logs(limit=50, offset=0, account_id=None, status=None, category=None, since=None):
+	async with connection() as db:
+		conditions, params = _log_filters(account_id, status, category, since)
 		where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
 		query = f'SELECT * FROM checkin_logs {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?'
 		params.extend([limit, offset])
@@ -333,52 +1000,836 @@ async def get_checkin_logs(limit=50, offset=0, account_id=None, status=None):
 		cursor = await db.execute(query, params)
 		rows = await cursor.fetchall()
 		return [dict(r) for r in rows]
-	finally:
-		await db.close()
 
 
-async def get_log_count(account_id=None, status=None):
-	db = await get_db()
-	try:
+async def get_checkin_logs_keyset(limit=50, account_id=None, status=None, before=None, after=None,
+								  category=None, since=None):
+	"""Page logs by the (created_at, id) keyset instead of OFFSET.
+
+	`before` returns the rows older than the given (created_at, id) cursor, `after` the rows
+	newer than it. Rows are always returned newest first, so the cost of a page does not
+	depend on how deep it is.
+	"""
+	async with connection() as db:
+		conditions, params = _log_filters(account_id, status, category, since)
+		if after is not None:
+			conditions.append('(created_at, id) > (?, ?)')
+			params.extend(after)
+			order_by = 'ORDER BY created_at ASC, id ASC'
+		else:
+			if before is not None:
+				conditions.append('(created_at, id) < (?, ?)')
+				params.extend(before)
+			order_by = 'ORDER BY created_at DESC, id DESC'
+
+		where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+		params.append(limit)
+		cursor = await db.execute(f'SELECT * FROM checkin_logs {where} {order_by} LIMIT ?', params)
+		rows = [dict(r) for r in await cursor.fetchall()]
+		if after is not None:
+			rows.reverse()
+		return rows
+
+
+async def get_log_count(account_id=None, status=None, category=None, since=None):
+	async with connection() as db:
+		conditions, params = _log_filters(account_id, status, category, since)
+		where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+		cursor = await db.execute(f'SELECT COUNT(*) as cnt FROM checkin_logs {where}', params)
+		row = await cursor.fetchone()
+		return row['cnt']
+
+
+LOG_EXPORT_COLUMNS = (
+	'id', 'created_at', 'account_id', 'account_name', 'provider', 'status', 'error_category',
+	'balance', 'used_quota', 'duration_ms', 'triggered_by', 'message',
+)
+
+
+async def iter_checkin_log_batches(batch_size: int = 1000, **filters):
+	"""Yield matching logs oldest first as lists of LOG_EXPORT_COLUMNS tuples.
+
+	Each batch is one keyset query on its own pooled connection checkout, so an export that is
+	downloaded slowly neither holds a pool slot nor pins a WAL snapshot between batches.
+	"""
+	columns = ', '.join(LOG_EXPORT_COLUMNS)
+	last = None
+	while True:
+		conditions, params = _log_filters(**filters)
+		if last is not None:
+			conditions.append('(created_at, id) > (?, ?)')
+			params.extend(last)
+		where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+		async with connection() as db:
+			cursor = await db.execute(
+				f'SELECT {columns} FROM checkin_logs {where} ORDER BY created_at, id LIMIT ?',
+				[*params, batch_size],
+			)
+			rows = [tuple(row) for row in await cursor.fetchall()]
+		if rows:
+			yield rows
+		if len(rows) < batch_size:
+			return
+		last = (rows[-1][1], rows[-1][0])
+
+
+async def get_log_category_counts(account_id=None, since=None) -> dict[str, int]:
+	"""Number of logs per error_category, e.g. how many were waf_blocked since a given day."""
+	async with connection() as db:
+		conditions, params = _log_filters(account_id, since=since)
+		where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+		cursor = await db.execute(
+			f'SELECT error_category, COUNT(*) FROM checkin_logs {where} GROUP BY error_category', params
+		)
+		return {row[0]: row[1] for row in await cursor.fetchall() if row[0] is not None}
+
+
+FTS_MIN_TERM_LENGTH = 3  # trigram tokenizer: shorter terms cannot use the index
+SEARCH_RANK_WINDOW = 1000
+
+
+def _search_terms(text: str) -> list[str]:
+	"""Split a search box query into terms; "double quoted" parts stay together as one phrase."""
+	return [phrase or word for phrase, word in re.findall(r'"([^"]+)"|(\S+)', text or '')]
+
+
+def _fts_match_expression(terms: list[str]) -> str:
+	"""AND together terms as quoted FTS5 strings, so user input never becomes query syntax."""
+	return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+async def search_checkin_logs(query: str, limit=30, offset=0, account_id=None, status=None,
+							  category=None, since=None) -> list[dict]:
+	"""Full-text search over log message, account name and provider, best matches (bm25) first.
+
+	Every term must match. Terms of at least FTS_MIN_TERM_LENGTH characters go through the FTS
+	index; shorter ones are applied as LIKE filters on the matched rows. Ranking is limited to the
+	newest SEARCH_RANK_WINDOW matches, so a common term costs the same on a year of logs as on a
+	week. A query made only of short terms scans checkin_logs and is ordered newest first.
+	"""
+	terms = _search_terms(query)
+	if not terms:
+		return []
+	indexed = [t for t in terms if len(t) >= FTS_MIN_TERM_LENGTH]
+	short = [t for t in terms if len(t) < FTS_MIN_TERM_LENGTH]
+
+	conditions, params = _log_filters(account_id, status, category, since)
+	conditions = [f'l.{c}' for c in conditions]
+	for term in short:
+		pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+		conditions.append(
+			"(l.message LIKE ? ESCAPE '\\' OR l.account_name LIKE ? ESCAPE '\\' OR l.provider LIKE ? ESCAPE '\\')"
+		)
+		params.extend([pattern] * 3)
+
+	async with connection() as db:
+		if not indexed:
+			cursor = await db.execute(
+				f'SELECT l.* FROM checkin_logs l WHERE {" AND ".join(conditions)} '
+				'ORDER BY l.created_at DESC, l.id DESC LIMIT ? OFFSET ?',
+				[*params, limit, offset],
+			)
+			return [dict(r) for r in await cursor.fetchall()]
+
+		conditions.insert(0, 'checkin_logs_fts MATCH ?')
+		params.insert(0, _fts_match_expression(indexed))
+		from_clause = 'FROM checkin_logs_fts JOIN checkin_logs l ON l.id = checkin_logs_fts.rowid'
+
+		# FTS5 walks matches by rowid (= insertion order) cheaply; find where the newest window starts.
+		window = max(SEARCH_RANK_WINDOW, offset + limit)
+		cursor = await db.execute(
+			f'SELECT checkin_logs_fts.rowid {from_clause} WHERE {" AND ".join(conditions)} '
+			'ORDER BY checkin_logs_fts.rowid DESC LIMIT 1 OFFSET ?',
+			[*params, window - 1],
+		)
+		row = await cursor.fetchone()
+		if row:
+			conditions.append('checkin_logs_fts.rowid >= ?')
+			params.append(row[0])
+
+		cursor = await db.execute(
+			f'SELECT l.*, bm25(checkin_logs_fts) AS rank {from_clause} WHERE {" AND ".join(conditions)} '
+			'ORDER BY rank, checkin_logs_fts.rowid DESC LIMIT ? OFFSET ?',
+			[*params, limit, offset],
+		)
+		return [dict(r) for r in await cursor.fetchall()]
+
+
+LOG_COUNT_CACHE_SECONDS = 60
+_log_count_cache: dict[tuple, tuple[float, int, int]] = {}
+
+
+async def get_log_count_cached(account_id=None, status=None, category=None, since=None) -> int:
+	"""Log count, reusing a COUNT(*) result for up to LOG_COUNT_CACHE_SECONDS while no log was written."""
+	key = (account_id, status or None, category or None, since or None)
+	version = get_versions('logs')[0]
+	now = time.monotonic()
+	cached = _log_count_cache.get(key)
+	if cached and cached[1] == version and now - cached[0] < LOG_COUNT_CACHE_SECONDS:
+		return cached[2]
+	count = await get_log_count(account_id=account_id, status=status, category=category, since=since)
+	_log_count_cache[key] = (now, version, count)
+	return count
+
+
+_category_counts_cache: dict[tuple, tuple[float, int, dict[str, int]]] = {}
+
+
+async def get_log_category_counts_cached(account_id=None, since=None) -> dict[str, int]:
+	"""get_log_category_counts(), reused for up to LOG_COUNT_CACHE_SECONDS while no log was written."""
+	key = (account_id, since or None)
+	version = get_versions('logs')[0]
+	now = time.monotonic()
+	cached = _category_counts_cache.get(key)
+	if cached and cached[1] == version and now - cached[0] < LOG_COUNT_CACHE_SECONDS:
+		return cached[2]
+	counts = await get_log_category_counts(account_id=account_id, since=since)
+	_category_counts_cache[key] = (now, version, counts)
+	return counts
+
+
+# --- Log retention ---
+
+LOG_RETENTION_CHUNK_SIZE = 1000
+INCREMENTAL_VACUUM_PAGES = 2000
+
+
+def _merge_daily_stats(stats: dict, log: dict):
+	"""Fold one raw log row into its (account, day) rollup bucket."""
+	status = log['status']
+	stats['total_count'] += 1
+	if status == 'success':
+		stats['success_count'] += 1
+	elif status == 'already_checked_in':
+		stats['already_checked_in_count'] += 1
+	else:
+		stats['failed_count'] += 1
+		category = log.get('error_category') or categorize_checkin_result(status, log['message'])
+		stats['category_counts'][category] = stats['category_counts'].get(category, 0) + 1
+	# Chunks are read in created_at order, so the latest row seen wins
+	if log['balance'] is not None:
+		stats['last_balance'] = log['balance']
+		stats['last_used'] = log['used_quota']
+	stats['last_log_at'] = log['created_at']
+
+
+async def _rollup_log_chunk(db, logs: list[dict]):
+	buckets = {}
+	for log in logs:
+		key = (log['account_id'] or 0, log['created_at'][:10])
+		if key not in buckets:
+			cursor = await db.execute(
+				'SELECT * FROM checkin_daily_stats WHERE account_id = ? AND day = ?', key
+			)
+			row = await cursor.fetchone()
+			if row:
+				existing = dict(row)
+				existing['category_counts'] = json.loads(existing['category_counts'] or '{}')
+			else:
+				existing = {
+					'account_id': key[0], 'day': key[1],
+					'account_name': log['account_name'], 'provider': log['provider'],
+					'total_count': 0, 'success_count': 0, 'already_checked_in_count': 0, 'failed_count': 0,
+					'category_counts': {}, 'last_balance': None, 'last_used': None, 'last_log_at': None,
+				}
+			buckets[key] = existing
+		_merge_daily_stats(buckets[key], log)
+
+	await db.executemany(
+		'''INSERT OR REPLACE INTO checkin_daily_stats (account_id, day, account_name, provider,
+		   total_count, success_count, already_checked_in_count, failed_count, category_counts,
+		   last_balance, last_used, last_log_at)
+		   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+		[
+			(b['account_id'], b['day'], b['account_name'], b['provider'],
+			 b['total_count'], b['success_count'], b['already_checked_in_count'], b['failed_count'],
+			 json.dumps(b['category_counts'], sort_keys=True), b['last_balance'], b['last_used'], b['last_log_at'])
+			for b in buckets.values()
+		]
+	)
+	await db.executemany('DELETE FROM checkin_logs WHERE id = ?', [(log['id'],) for log in logs])
+
+
+async def prune_checkin_logs(retention_days: int, chunk_size: int = LOG_RETENTION_CHUNK_SIZE) -> dict:
+	"""Roll raw logs older than `retention_days` into checkin_daily_stats, then delete them.
+
+	Only whole days are rolled up. Each chunk is summarized and deleted as its own write-queue
+	operation, so other writes interleave between chunks; freed pages are released afterwards
+	with an incremental vacuum.
+	"""
+	cutoff = (datetime.now() - timedelta(days=retention_days)).date().isoformat()
+
+	async def _rollup_next_chunk(db) -> int:
+		cursor = await db.execute(
+			'SELECT * FROM checkin_logs WHERE created_at < ? ORDER BY created_at, id LIMIT ?',
+			(cutoff, chunk_size)
+		)
+		logs = [dict(r) for r in await cursor.fetchall()]
+		if logs:
+			await _rollup_log_chunk(db, logs)
+		return len(logs)
+
+	async def _vacuum(db):
+		# executescript runs the pragma outside any transaction; inside one it frees next to nothing
+		previous = None
+		while True:
+			await db.executescript(f'PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES})')
+			cursor = await db.execute('PRAGMA freelist_count')
+			free = (await cursor.fetchone())[0]
+			if not free or free == previous:
+				return
+			previous = free
+
+	rolled_up = 0
+	while count := await _write(_rollup_next_chunk):
+		rolled_up += count
+
+	if rolled_up:
+		_log_count_cache.clear()
+		bump_version('logs')
+		await _write_alone(_vacuum)
+	return {'rolled_up': rolled_up, 'cutoff': cutoff}
+
+
+async def get_daily_stats(account_id=None, since: str | None = None) -> list[dict]:
+	async with connection() as db:
 		conditions = []
 		params = []
 		if account_id is not None:
 			conditions.append('account_id = ?')
 			params.append(account_id)
-		if status:
-			conditions.append('status = ?')
-			params.append(status)
-
+		if since:
+			conditions.append('day >= ?')
+			params.append(since)
 		where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
-		cursor = await db.execute(f'SELECT COUNT(*) as cnt FROM checkin_logs {where}', params)
+		cursor = await db.execute(f'SELECT * FROM checkin_daily_stats {where} ORDER BY day DESC, account_id', params)
+		rows = [dict(r) for r in await cursor.fetchall()]
+		for row in rows:
+			row['category_counts'] = json.loads(row['category_counts'] or '{}')
+		return rows
+
+
+# --- Account stats ---
+# account_stats is maintained in the same transaction as each add_checkin_log insert, so readers
+# get streaks, success rates and balance deltas per account without aggregating checkin_logs.
+# The 7/30-day windows are whole calendar days (today and the 6 / 29 days before it), so an insert
+# only bumps the counters; they are recounted once the day changes (at the account's first log of
+# the day, or by refresh_account_window_counts).
+
+SUCCESS_STATUSES = ('success', 'already_checked_in')
+WINDOW_DAYS = (7, 30)
+ACCOUNT_STATS_COLUMNS = (
+	'account_id', 'last_status', 'last_checkin_at', 'current_streak',
+	'success_7d', 'total_7d', 'success_30d', 'total_30d', 'last_failure_category', 'last_failure_at',
+	'last_balance', 'balance_day', 'prev_day_balance', 'latency_count', 'latency_total_ms', 'window_day',
+)
+
+
+async def _window_counts(db, account_id: int, now: datetime) -> dict:
+	"""Success/total counts over the last 7 / 30 calendar days, from raw logs plus rolled-up days."""
+	since_7d = (now.date() - timedelta(days=6)).isoformat()
+	since_30d = (now.date() - timedelta(days=29)).isoformat()
+	cursor = await db.execute(
+		f'''SELECT
+			   COALESCE(SUM(created_at >= ? AND status IN {SUCCESS_STATUSES}), 0),
+			   COALESCE(SUM(created_at >= ?), 0),
+			   COALESCE(SUM(status IN {SUCCESS_STATUSES}), 0),
+			   COUNT(*)
+		   FROM checkin_logs WHERE account_id = ? AND created_at >= ?''',
+		(since_7d, since_7d, account_id, since_30d)
+	)
+	success_7d, total_7d, success_30d, total_30d = await cursor.fetchone()
+
+	# Days older than the retention window only exist as daily rollups
+	cursor = await db.execute(
+		'''SELECT
+			   COALESCE(SUM(CASE WHEN day >= ? THEN success_count + already_checked_in_count END), 0),
+			   COALESCE(SUM(CASE WHEN day >= ? THEN total_count END), 0),
+			   COALESCE(SUM(success_count + already_checked_in_count), 0),
+			   COALESCE(SUM(total_count), 0)
+		   FROM checkin_daily_stats WHERE account_id = ? AND day >= ?''',
+		(since_7d, since_7d, account_id, since_30d)
+	)
+	rolled = await cursor.fetchone()
+	return {
+		'success_7d': success_7d + rolled[0],
+		'total_7d': total_7d + rolled[1],
+		'success_30d': success_30d + rolled[2],
+		'total_30d': total_30d + rolled[3],
+		'window_day': now.date().isoformat(),
+	}
+
+
+async def _update_account_stats(db, account_id: int, status: str, category: str, balance, duration_ms,
+								now: datetime):
+	cursor = await db.execute('SELECT * FROM account_stats WHERE account_id = ?', (account_id,))
+	row = await cursor.fetchone()
+	stats = dict(row) if row else {
+		'account_id': account_id, 'current_streak': 0,
+		'last_failure_category': None, 'last_failure_at': None,
+		'last_balance': None, 'balance_day': None, 'prev_day_balance': None,
+		'latency_count': 0, 'latency_total_ms': 0,
+	}
+
+	timestamp = now.isoformat()
+	stats['last_status'] = status
+	stats['last_checkin_at'] = timestamp
+	if status in SUCCESS_STATUSES:
+		stats['current_streak'] += 1
+	else:
+		stats['current_streak'] = 0
+		stats['last_failure_category'] = category
+		stats['last_failure_at'] = timestamp
+
+	if balance is not None:
+		today = timestamp[:10]
+		if stats['balance_day'] != today:
+			# 跨天时把上一次余额作为「昨日余额」基准
+			stats['prev_day_balance'] = stats['last_balance']
+			stats['balance_day'] = today
+		stats['last_balance'] = balance
+
+	if duration_ms is not None:
+		stats['latency_count'] += 1
+		stats['latency_total_ms'] += int(duration_ms)
+
+	if stats.get('window_day') == timestamp[:10]:
+		for days in WINDOW_DAYS:
+			stats[f'total_{days}d'] += 1
+			stats[f'success_{days}d'] += status in SUCCESS_STATUSES
+	else:
+		# first log of the day: the windows moved, so recount them (this log is already inserted)
+		stats.update(await _window_counts(db, account_id, now))
+	await _save_account_stats(db, stats)
+
+
+async def _save_account_stats(db, stats: dict):
+	columns = [column for column in ACCOUNT_STATS_COLUMNS if column in stats]
+	await db.execute(
+		f'INSERT OR REPLACE INTO account_stats ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+		[stats[column] for column in columns]
+	)
+
+
+async def _refresh_window_counts(db, now: datetime) -> int:
+	"""Recount stale windows; returns how many accounts' counters changed."""
+	today = now.date().isoformat()
+	cursor = await db.execute(
+		'''SELECT account_id, success_7d, total_7d, success_30d, total_30d FROM account_stats
+		   WHERE window_day IS NULL OR window_day < ?''',
+		(today,)
+	)
+	changed = 0
+	for row in await cursor.fetchall():
+		counts = await _window_counts(db, row['account_id'], now)
+		changed += tuple(row)[1:] != (counts['success_7d'], counts['total_7d'], counts['success_30d'], counts['total_30d'])
+		await db.execute(
+			'''UPDATE account_stats SET success_7d = ?, total_7d = ?, success_30d = ?, total_30d = ?,
+			   window_day = ? WHERE account_id = ?''',
+			(counts['success_7d'], counts['total_7d'], counts['success_30d'], counts['total_30d'],
+			 counts['window_day'], row['account_id'])
+		)
+	return changed
+
+
+async def refresh_account_window_counts(now: datetime | None = None) -> int:
+	"""Recount the 7/30-day windows of accounts with no log yet today; returns how many changed."""
+	now = now or datetime.now()
+	changed = await _write(lambda db: _refresh_window_counts(db, now))
+	if changed:
+		# account stats are served under the 'logs' version (dashboard snapshot, /api/stats ETags)
+		bump_version('logs')
+	return changed
+
+
+async def _backfill_account_stats(db):
+	"""Build account_stats for every account that already has logs."""
+	now = datetime.now()
+	cursor = await db.execute('SELECT DISTINCT account_id FROM checkin_logs WHERE account_id IS NOT NULL')
+	account_ids = [row[0] for row in await cursor.fetchall()]
+	for account_id in account_ids:
+		cursor = await db.execute(
+			'''SELECT status, message, balance, duration_ms, created_at FROM checkin_logs
+			   WHERE account_id = ? ORDER BY created_at DESC, id DESC''',
+			(account_id,)
+		)
+		logs = await cursor.fetchall()
+		latest = logs[0]
+		stats = {
+			'account_id': account_id,
+			'last_status': latest['status'],
+			'last_checkin_at': latest['created_at'],
+			'current_streak': 0,
+			'last_failure_category': None, 'last_failure_at': None,
+			'last_balance': None, 'balance_day': None, 'prev_day_balance': None,
+			'latency_count': 0, 'latency_total_ms': 0,
+		}
+		streak_open = True
+		for log in logs:
+			if streak_open:
+				if log['status'] in SUCCESS_STATUSES:
+					stats['current_streak'] += 1
+				else:
+					streak_open = False
+			if log['status'] not in SUCCESS_STATUSES and stats['last_failure_at'] is None:
+				stats['last_failure_category'] = categorize_checkin_result(log['status'], log['message'])
+				stats['last_failure_at'] = log['created_at']
+			if log['balance'] is not None:
+				if stats['balance_day'] is None:
+					stats['last_balance'] = log['balance']
+					stats['balance_day'] = log['created_at'][:10]
+				elif stats['prev_day_balance'] is None and log['created_at'][:10] < stats['balance_day']:
+					stats['prev_day_balance'] = log['balance']
+			if log['duration_ms'] is not None:
+				stats['latency_count'] += 1
+				stats['latency_total_ms'] += log['duration_ms']
+		stats.update(await _window_counts(db, account_id, now))
+		# migration 6 runs this before window_day exists; migration 12 sets it for every account
+		del stats['window_day']
+		await _save_account_stats(db, stats)
+
+
+def _present_account_stats(row: dict) -> dict:
+	stats = dict(row)
+	stats['success_rate_7d'] = round(stats['success_7d'] / stats['total_7d'], 4) if stats['total_7d'] else None
+	stats['success_rate_30d'] = round(stats['success_30d'] / stats['total_30d'], 4) if stats['total_30d'] else None
+	stats['avg_latency_ms'] = (
+		round(stats['latency_total_ms'] / stats['latency_count']) if stats['latency_count'] else None
+	)
+	if stats['last_balance'] is not None and stats['prev_day_balance'] is not None:
+		stats['balance_delta'] = round(stats['last_balance'] - stats['prev_day_balance'], 2)
+	else:
+		stats['balance_delta'] = None
+	return stats
+
+
+async def get_account_stats(account_id: int | None = None) -> dict[int, dict]:
+	"""Precomputed per-account stats keyed by account id."""
+	async with connection() as db:
+		if account_id is None:
+			cursor = await db.execute('SELECT * FROM account_stats')
+		else:
+			cursor = await db.execute('SELECT * FROM account_stats WHERE account_id = ?', (account_id,))
+		return {row['account_id']: _present_account_stats(dict(row)) for row in await cursor.fetchall()}
+
+
+# --- Balance time series ---
+# One (account_id, ts) keyed row per balance reading, kept out of checkin_logs so charts read
+# a narrow clustered range instead of every log row. Not affected by log retention.
+
+BALANCE_SERIES_AGGREGATES = {
+	# SQLite returns the bare columns of the row that holds the MIN()/MAX() value
+	'last': 'SELECT MAX(ts) AS ts, quota, used',
+	'min': 'SELECT ts, MIN(quota) AS quota, used',
+	'max': 'SELECT ts, MAX(quota) AS quota, used',
+}
+
+
+def _to_epoch(value: str) -> int:
+	return int(datetime.fromisoformat(value).timestamp())
+
+
+async def _append_balance_point(db, account_id: int, when: datetime, quota, used):
+	await db.execute(
+		'INSERT OR REPLACE INTO balance_series (account_id, ts, quota, used) VALUES (?, ?, ?, ?)',
+		(account_id, int(when.timestamp()), quota, used)
+	)
+
+
+async def get_balance_series(account_ids: list[int], since: int, until: int,
+							 points: int = 200, agg: str = 'last') -> dict[int, dict]:
+	"""Downsample balance readings to at most `points` buckets per account.
+
+	The [since, until] range (epoch seconds) is split into equal buckets; each bucket keeps the
+	last, min or max reading. Returns column-oriented series keyed by account id.
+	"""
+	select = BALANCE_SERIES_AGGREGATES[agg]
+	span = max(until - since + 1, 1)
+	buckets = max(points, 1)
+	async with connection() as db:
+		series = {}
+		for account_id in account_ids:
+			cursor = await db.execute(
+				f'''{select}, (ts - ?) * ? / ? AS bucket FROM balance_series
+				    WHERE account_id = ? AND ts BETWEEN ? AND ?
+				    GROUP BY bucket ORDER BY bucket''',
+				(since, buckets, span, account_id, since, until)
+			)
+			rows = await cursor.fetchall()
+			series[account_id] = {
+				'ts': [r['ts'] for r in rows],
+				'quota': [r['quota'] for r in rows],
+				'used': [r['used'] for r in rows],
+			}
+		return series
+
+
+# --- Check-in jobs ---
+
+CHECKIN_JOB_HISTORY = 200
+UNFINISHED_JOB_STATUSES = ('queued', 'running')
+
+
+async def save_checkin_job(job: dict):
+	"""Upsert a job snapshot; finished jobs beyond the newest CHECKIN_JOB_HISTORY are dropped."""
+	row = (
+		job['id'], job['triggered_by'], job['status'], job['total'], job['done'],
+		json.dumps(job['counts']), json.dumps(job['current'], ensure_ascii=False), job.get('error'),
+		job['created_at'], job.get('started_at'), job.get('finished_at'),
+		json.dumps(job.get('merged_triggers') or []),
+	)
+	finished = job['status'] not in UNFINISHED_JOB_STATUSES
+
+	async def _upsert(db):
+		await db.execute(
+			'''INSERT OR REPLACE INTO checkin_jobs (id, triggered_by, status, total, done, counts,
+			   current, error, created_at, started_at, finished_at, merged_triggers)
+			   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+			row
+		)
+		if finished:
+			await db.execute(
+				'''DELETE FROM checkin_jobs WHERE id IN (
+				       SELECT id FROM checkin_jobs ORDER BY created_at DESC LIMIT -1 OFFSET ?)''',
+				(CHECKIN_JOB_HISTORY,)
+			)
+
+	await _write(_upsert)
+
+
+async def get_checkin_job(job_id: str) -> dict | None:
+	async with connection() as db:
+		cursor = await db.execute('SELECT * FROM checkin_jobs WHERE id = ?', (job_id,))
 		row = await cursor.fetchone()
-		return row['cnt']
-	finally:
-		await db.close()
+	if not row:
+		return None
+	job = dict(row)
+	job['counts'] = json.loads(job['counts'] or '{}')
+	job['current'] = json.loads(job['current'] or '[]')
+	job['merged_triggers'] = json.loads(job['merged_triggers'] or '[]')
+	return job
+
+
+async def fail_unfinished_checkin_jobs(reason: str) -> int:
+	"""Mark jobs left queued/running by a previous process as failed; returns how many."""
+	async def _update(db):
+		cursor = await db.execute(
+			'''UPDATE checkin_jobs SET status = 'failed', error = ?, current = '[]', finished_at = ?
+			   WHERE status IN (?, ?)''',
+			(reason, datetime.now().isoformat(), *UNFINISHED_JOB_STATUSES)
+		)
+		return cursor.rowcount
+
+	return await _write(_update)
+
+
+# --- Notification outbox ---
+# status: pending (waiting for its next attempt) | sent | dead (gave up after the max attempts)
+
+OUTBOX_HISTORY = 500
+
+
+async def enqueue_notifications(channels: list[str], title: str, content: str, msg_type: str = 'text') -> list[int]:
+	"""Queue one pending row per channel, due immediately; returns the new row ids."""
+	now = datetime.now().isoformat()
+
+	async def _insert(db):
+		ids = []
+		for channel in channels:
+			cursor = await db.execute(
+				'''INSERT INTO notification_outbox (channel, title, content, msg_type, next_attempt_at, created_at)
+				   VALUES (?, ?, ?, ?, ?, ?)''',
+				(channel, title, content, msg_type, now, now)
+			)
+			ids.append(cursor.lastrowid)
+		return ids
+
+	return await _write(_insert)
+
+
+async def get_due_notifications(now: str, limit: int = 50) -> list[dict]:
+	async with connection() as db:
+		cursor = await db.execute(
+			'''SELECT * FROM notification_outbox WHERE status = 'pending' AND next_attempt_at <= ?
+			   ORDER BY next_attempt_at, id LIMIT ?''',
+			(now, limit)
+		)
+		return [dict(row) for row in await cursor.fetchall()]
+
+
+async def get_next_notification_due() -> str | None:
+	"""next_attempt_at of the earliest pending row, or None when nothing is pending."""
+	async with connection() as db:
+		cursor = await db.execute("SELECT MIN(next_attempt_at) FROM notification_outbox WHERE status = 'pending'")
+		row = await cursor.fetchone()
+	return row[0]
+
+
+async def mark_notification_sent(notification_id: int):
+	"""Mark a row delivered; sent rows beyond the newest OUTBOX_HISTORY are dropped (dead letters stay)."""
+	async def _update(db):
+		await db.execute(
+			'''UPDATE notification_outbox SET status = 'sent', attempts = attempts + 1, last_error = NULL,
+			   sent_at = ? WHERE id = ?''',
+			(datetime.now().isoformat(), notification_id)
+		)
+		await db.execute(
+			'''DELETE FROM notification_outbox WHERE id IN (
+			       SELECT id FROM notification_outbox WHERE status = 'sent'
+			       ORDER BY id DESC LIMIT -1 OFFSET ?)''',
+			(OUTBOX_HISTORY,)
+		)
+
+	await _write(_update)
+
+
+async def mark_notification_failed(notification_id: int, error: str, next_attempt_at: str | None):
+	"""Record a failed attempt; next_attempt_at=None moves the row to the dead-letter state."""
+	async def _update(db):
+		await db.execute(
+			'''UPDATE notification_outbox SET attempts = attempts + 1, last_error = ?,
+			   status = CASE WHEN ? IS NULL THEN 'dead' ELSE 'pending' END,
+			   next_attempt_at = COALESCE(?, next_attempt_at) WHERE id = ?''',
+			(error, next_attempt_at, next_attempt_at, notification_id)
+		)
+
+	await _write(_update)
+
+
+async def retry_notification(notification_id: int) -> bool:
+	"""Put a dead row back in the queue with a fresh attempt budget; False if it is not dead."""
+	async def _update(db):
+		cursor = await db.execute(
+			'''UPDATE notification_outbox SET status = 'pending', attempts = 0, next_attempt_at = ?
+			   WHERE status = 'dead' AND id = ?''',
+			(datetime.now().isoformat(), notification_id)
+		)
+		return cursor.rowcount > 0
+
+	return await _write(_update)
+
+
+async def postpone_notification(notification_id: int, next_attempt_at: str):
+	"""Move a pending row's next attempt without counting it as a failed one (rate limiting)."""
+	async def _update(db):
+		await db.execute(
+			'UPDATE notification_outbox SET next_attempt_at = ? WHERE id = ?', (next_attempt_at, notification_id)
+		)
+
+	await _write(_update)
+
+
+async def get_last_notification_at(channel: str) -> str | None:
+	async with connection() as db:
+		cursor = await db.execute('SELECT MAX(created_at) FROM notification_outbox WHERE channel = ?', (channel,))
+		row = await cursor.fetchone()
+	return row[0]
+
+
+async def get_notifications(status: str | None = None, limit: int = 100) -> list[dict]:
+	where, params = ('WHERE status = ?', [status]) if status else ('', [])
+	async with connection() as db:
+		cursor = await db.execute(
+			f'SELECT * FROM notification_outbox {where} ORDER BY id DESC LIMIT ?', (*params, limit)
+		)
+		return [dict(row) for row in await cursor.fetchall()]
+
+
+async def get_notification_counts() -> dict[str, int]:
+	async with connection() as db:
+		cursor = await db.execute('SELECT status, COUNT(*) FROM notification_outbox GROUP BY status')
+		return {status: count for status, count in await cursor.fetchall()}
+
+
+async def get_failure_digest(since: str, until: str, limit: int = 5) -> dict:
+	"""Failed check-ins with since <= created_at < until: counts per category and the worst accounts."""
+	async with connection() as db:
+		cursor = await db.execute(
+			'''SELECT error_category, COUNT(*) FROM checkin_logs
+			   WHERE status = 'failed' AND created_at >= ? AND created_at < ?
+			   GROUP BY error_category ORDER BY COUNT(*) DESC''',
+			(since, until)
+		)
+		categories = {category: count for category, count in await cursor.fetchall()}
+		cursor = await db.execute(
+			'''SELECT account_name, COUNT(*) AS failures, COUNT(*) OVER () AS accounts,
+			          MAX(created_at) AS last_at
+			   FROM checkin_logs WHERE status = 'failed' AND created_at >= ? AND created_at < ?
+			   GROUP BY account_id ORDER BY failures DESC, last_at DESC LIMIT ?''',
+			(since, until, limit)
+		)
+		worst = [dict(row) for row in await cursor.fetchall()]
+	return {
+		'total': sum(categories.values()),
+		'accounts': worst[0]['accounts'] if worst else 0,
+		'categories': categories,
+		'worst': [{'account_name': row['account_name'], 'failures': row['failures']} for row in worst],
+	}
 
 
 # --- Settings ---
+# The settings table is small and read on hot paths (dashboard, schedule API, scheduler jobs), so
+# it is loaded into memory by init_db and kept current write-through by set_setting. The typed
+# accessors below are synchronous and never touch the database.
+
+_settings_cache: dict[str, str] | None = None
+_TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+
+async def load_settings():
+	global _settings_cache
+	async with connection() as db:
+		cursor = await db.execute('SELECT key, value FROM settings')
+		_settings_cache = {row['key']: row['value'] for row in await cursor.fetchall()}
+
 
 async def get_setting(key: str, default=None):
-	db = await get_db()
-	try:
-		cursor = await db.execute('SELECT value FROM settings WHERE key = ?', (key,))
-		row = await cursor.fetchone()
-		return row['value'] if row else default
-	finally:
-		await db.close()
+	if _settings_cache is None:
+		await load_settings()
+	return _settings_cache.get(key, default)
 
 
 async def set_setting(key: str, value: str):
-	db = await get_db()
-	try:
+	async def _upsert(db):
 		await db.execute(
 			'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
 			(key, value)
 		)
-		await db.commit()
-	finally:
-		await db.close()
+
+	await _write(_upsert)
+	if _settings_cache is not None:
+		_settings_cache[key] = value
+	bump_version('settings')
+
+
+def get_cached_setting(key: str, default: str | None = None) -> str | None:
+	"""Setting value from the in-memory cache (default until init_db has loaded it)."""
+	if _settings_cache is None:
+		return default
+	return _settings_cache.get(key, default)
+
+
+def get_setting_int(key: str, default: int) -> int:
+	value = get_cached_setting(key)
+	try:
+		return int(value) if value is not None else default
+	except ValueError:
+		return default
+
+
+def get_setting_float(key: str, default: float) -> float:
+	value = get_cached_setting(key)
+	try:
+		return float(value) if value is not None else default
+	except ValueError:
+		return default
+
+
+def get_setting_bool(key: str, default: bool) -> bool:
+	value = get_cached_setting(key)
+	if value is None:
+		return default
+	return value.strip().lower() in _TRUE_VALUES
 
 
 # --- WAF Cookie Cache ---
@@ -388,13 +1839,13 @@ WAF_CACHE_HOURS = 24
 
 async def get_cached_waf_cookies(provider_id: str) -> dict | None:
 	"""Get valid (non-expired) cached WAF cookies for a provider."""
-	db = await get_db()
 	try:
-		cursor = await db.execute(
-			'SELECT cookies, expires_at FROM waf_cookies WHERE provider_id = ?',
-			(provider_id,)
-		)
-		row = await cursor.fetchone()
+		async with connection() as db:
+			cursor = await db.execute(
+				'SELECT cookies, expires_at FROM waf_cookies WHERE provider_id = ?',
+				(provider_id,)
+			)
+			row = await cursor.fetchone()
 		if not row:
 			return None
 
@@ -405,8 +1856,6 @@ async def get_cached_waf_cookies(provider_id: str) -> dict | None:
 		return json.loads(row['cookies'])
 	except Exception:
 		return None
-	finally:
-		await db.close()
 
 
 async def save_waf_cookies(provider_id: str, cookies: dict):
@@ -414,8 +1863,8 @@ async def save_waf_cookies(provider_id: str, cookies: dict):
 	now = datetime.now()
 	expires_at = now + timedelta(hours=WAF_CACHE_HOURS)
 	cookies_json = json.dumps(cookies)
-	db = await get_db()
-	try:
+
+	async def _upsert(db):
 		await db.execute(
 			'''INSERT INTO waf_cookies (provider_id, cookies, fetched_at, expires_at)
 			   VALUES (?, ?, ?, ?)
@@ -425,30 +1874,25 @@ async def save_waf_cookies(provider_id: str, cookies: dict):
 			       expires_at = excluded.expires_at''',
 			(provider_id, cookies_json, now.isoformat(), expires_at.isoformat())
 		)
-		await db.commit()
-	finally:
-		await db.close()
+
+	await _write(_upsert)
 
 
 async def delete_waf_cookies(provider_id: str):
 	"""Delete cached WAF cookies for a provider (invalidate cache)."""
-	db = await get_db()
-	try:
+	async def _delete(db):
 		await db.execute('DELETE FROM waf_cookies WHERE provider_id = ?', (provider_id,))
-		await db.commit()
-	finally:
-		await db.close()
+
+	await _write(_delete)
 
 
 async def cleanup_expired_waf_cookies() -> int:
 	"""Delete all expired WAF cookies. Returns count of deleted rows."""
-	db = await get_db()
-	try:
+	async def _delete(db):
 		cursor = await db.execute(
 			'DELETE FROM waf_cookies WHERE expires_at < ?',
 			(datetime.now().isoformat(),)
 		)
-		await db.commit()
 		return cursor.rowcount
-	finally:
-		await db.close()
+
+	return await _write(_delete)
@@ -0,0 +1,105 @@
+"""Per-channel failure digests and send-rate caps for the notification outbox.
+
+Channels with a digest window (NOTIFY_DIGEST_MINUTES / NOTIFY_DIGEST_MINUTES_<CHANNEL>) do not
+get one push per run: once per window the failed check-ins logged since the channel's previous
+digest are merged into one message with counts per failure category and the accounts that
+failed most. The check-in logs are the event buffer, so nothing is lost across restarts.
+
+Independently, ChannelRateLimiter keeps every channel under its known bot rate limit
+(utils.notify.CHANNEL_RATE_LIMITS); the outbox postpones rows that would exceed it instead of
+letting the platform drop them.
+"""
+
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from utils.notify import CHANNEL_RATE_LIMITS, notify
+from web.database import enqueue_notifications, get_failure_digest, get_last_notification_at
+from web.failure_reason import describe_category
+
+logger = logging.getLogger('checkin')
+
+DIGEST_TITLE = 'AnyRouter Check-in 失败汇总'
+DIGEST_TOP_ACCOUNTS = 5
+
+# channel -> end of the window covered by its last digest
+_last_flush: dict[str, datetime] = {}
+
+
+class ChannelRateLimiter:
+	"""Sliding-window counter per channel: at most `count` sends in any `seconds` span."""
+
+	def __init__(self, limits: dict[str, tuple[int, float]]):
+		self.limits = limits
+		self._sent: dict[str, deque[float]] = {}
+
+	def acquire(self, channel: str, now: float | None = None) -> float:
+		"""Reserve a send slot; returns 0 if granted, else the seconds until one frees up."""
+		limit = self.limits.get(channel)
+		if limit is None:
+			return 0.0
+		count, seconds = limit
+		now = time.time() if now is None else now
+		sent = self._sent.setdefault(channel, deque())
+		while sent and sent[0] <= now - seconds:
+			sent.popleft()
+		if len(sent) >= count:
+			return sent[0] + seconds - now
+		sent.append(now)
+		return 0.0
+
+
+rate_limiter = ChannelRateLimiter(CHANNEL_RATE_LIMITS)
+
+
+def format_digest(digest: dict, start: datetime, end: datetime) -> str:
+	lines = [
+		f'{start:%m-%d %H:%M} 至 {end:%m-%d %H:%M} 签到失败 {digest["total"]} 次，涉及 {digest["accounts"]} 个账号'
+	]
+	by_category = '，'.join(
+		f'{describe_category(category)["error_category_label"]} {count}'
+		for category, count in digest['categories'].items()
+	)
+	lines.append(f'按原因：{by_category}')
+	lines.append('失败最多的账号：')
+	lines.extend(f'- {row["account_name"]}：{row["failures"]} 次' for row in digest['worst'])
+	if digest['accounts'] > len(digest['worst']):
+		lines.append(f'- ……另有 {digest["accounts"] - len(digest["worst"])} 个账号')
+	return '\n'.join(lines)
+
+
+async def _window_start(channel: str, window: float, now: datetime) -> datetime:
+	if channel not in _last_flush:
+		# 重启后从该渠道最后一条通知继续，避免重复汇总；没有失败的窗口不会写通知，
+		# 所以最多回溯一个窗口，不把几天前到现在都算进第一条汇总
+		last = await get_last_notification_at(channel)
+		start = now - timedelta(seconds=window)
+		_last_flush[channel] = max(datetime.fromisoformat(last), start) if last else now
+	return _last_flush[channel]
+
+
+async def flush_due_digests(now: datetime | None = None) -> int:
+	"""Queue a digest for every channel whose window has elapsed; returns how many were queued."""
+	now = now or datetime.now()
+	queued = 0
+	for channel, window in notify.digest_windows.items():
+		start = await _window_start(channel, window, now)
+		if (now - start).total_seconds() < window:
+			continue
+		digest = await get_failure_digest(start.isoformat(), now.isoformat(), DIGEST_TOP_ACCOUNTS)
+		_last_flush[channel] = now
+		if digest['total']:
+			await enqueue_notifications([channel], DIGEST_TITLE, format_digest(digest, start, now))
+			queued += 1
+	return queued
+
+
+async def seconds_until_next_digest(now: datetime | None = None) -> float | None:
+	now = now or datetime.now()
+	waits = [
+		((await _window_start(channel, window, now)) + timedelta(seconds=window) - now).total_seconds()
+		for channel, window in notify.digest_windows.items()
+	]
+	return max(min(waits), 0) if waits else None
@@ -0,0 +1,57 @@
+"""In-process fan-out of live check-in events to Server-Sent Events subscribers.
+
+publish() never waits: every subscriber has its own bounded queue, and an event that does not
+fit into a slow subscriber's queue is dropped for that subscriber only (the stream then tells
+the client how many it missed so the page can resync). The check-in run is never slowed down by
+the people watching it.
+"""
+
+import asyncio
+import json
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+	def __init__(self, maxsize: int):
+		self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+		self.dropped = 0
+
+	def take_dropped(self) -> int:
+		dropped, self.dropped = self.dropped, 0
+		return dropped
+
+
+class EventBroker:
+	def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+		self.queue_size = queue_size
+		self._subscribers: set[Subscription] = set()
+
+	@property
+	def subscriber_count(self) -> int:
+		return len(self._subscribers)
+
+	def publish(self, event: str, data: dict):
+		for sub in list(self._subscribers):
+			try:
+				sub.queue.put_nowait((event, data))
+			except asyncio.QueueFull:
+				sub.dropped += 1
+
+	@contextmanager
+	def subscribe(self) -> Iterator[Subscription]:
+		sub = Subscription(self.queue_size)
+		self._subscribers.add(sub)
+		try:
+			yield sub
+		finally:
+			self._subscribers.discard(sub)
+
+
+def format_sse(event: str, data: dict) -> str:
+	return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+broker = EventBroker()
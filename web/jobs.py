@@ -0,0 +1,173 @@
+"""Registry of "check in all" jobs.
+
+POST /api/checkin/all only enqueues a job and returns its id; the run itself happens in a
+background task that reports progress into a CheckinJob. Jobs live in memory for cheap polling
+and every state change is mirrored to the checkin_jobs table, so the status of a job can still
+be looked up after a restart (unfinished ones are marked failed at startup).
+
+A run requested while another one is queued or running is merged into it instead of queueing
+a second full pass behind _checkin_lock: the caller gets the active job, accounts that job has
+already checked in are reused, and accounts enabled since it started are appended to it.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from web.database import fail_unfinished_checkin_jobs, get_checkin_job, save_checkin_job
+
+logger = logging.getLogger('checkin')
+
+MAX_JOBS_IN_MEMORY = 50
+UNFINISHED_STATUSES = ('queued', 'running')
+
+_jobs: dict[str, 'CheckinJob'] = {}
+_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class CheckinJob:
+	id: str
+	triggered_by: str
+	status: str = 'queued'  # queued | running | completed | failed
+	total: int = 0
+	done: int = 0
+	counts: dict[str, int] = field(default_factory=dict)
+	current: list[str] = field(default_factory=list)
+	error: str | None = None
+	created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+	started_at: str | None = None
+	finished_at: str | None = None
+	merged: int = 0  # run requests coalesced into this job
+	merged_triggers: list[str] = field(default_factory=list)  # triggered_by of each merged request
+	_started: float | None = field(default=None, repr=False)
+	_rescan: bool = field(default=False, repr=False)
+
+	def start(self, total: int):
+		self.status = 'running'
+		self.total = total
+		self.started_at = datetime.now().isoformat()
+		self._started = time.monotonic()
+		self._rescan = False  # requests merged while queued are covered by the fresh account list
+
+	def begin_account(self, name: str):
+		self.current.append(name)
+
+	def finish_account(self, name: str, status: str):
+		if name in self.current:
+			self.current.remove(name)
+		self.done += 1
+		self.counts[status] = self.counts.get(status, 0) + 1
+
+	def merge(self, triggered_by: str):
+		"""Another run request joined this job; the run re-reads enabled accounts before finishing."""
+		self.merged += 1
+		self.merged_triggers.append(triggered_by)
+		self._rescan = True
+
+	def take_rescan(self) -> bool:
+		rescan, self._rescan = self._rescan, False
+		return rescan
+
+	def extend(self, count: int):
+		self.total += count
+
+	def complete(self):
+		self.status = 'completed'
+		self.current = []
+		self.finished_at = datetime.now().isoformat()
+
+	def fail(self, error: str):
+		self.status = 'failed'
+		self.error = error
+		self.current = []
+		self.finished_at = datetime.now().isoformat()
+
+	def eta_seconds(self) -> float | None:
+		"""Remaining time extrapolated from the average duration of the accounts done so far."""
+		if self.status != 'running' or not self.done or self._started is None:
+			return None
+		elapsed = time.monotonic() - self._started
+		return round(elapsed / self.done * (self.total - self.done), 1)
+
+	def to_dict(self) -> dict:
+		data = {k: v for k, v in asdict(self).items() if not k.startswith('_')}
+		data['eta_seconds'] = self.eta_seconds()
+		return data
+
+
+async def persist_job(job: CheckinJob):
+	"""Mirror the job to SQLite; a failing write never interrupts the run itself."""
+	try:
+		await save_checkin_job(job.to_dict())
+	except Exception as e:
+		logger.warning(f'Failed to persist check-in job {job.id}: {e}')
+
+
+def _remember(job: CheckinJob):
+	_jobs[job.id] = job
+	finished = [j for j in _jobs.values() if j.status not in UNFINISHED_STATUSES]
+	for old in finished[:max(0, len(_jobs) - MAX_JOBS_IN_MEMORY)]:
+		del _jobs[old.id]
+
+
+async def _run_job(job: CheckinJob):
+	from web.scheduler import run_checkin_task
+	try:
+		await run_checkin_task(triggered_by=job.triggered_by, job=job)
+	except Exception as e:
+		logger.error(f'Check-in job {job.id} failed: {e}')
+		job.fail(str(e))
+		await persist_job(job)
+
+
+def get_active_job() -> CheckinJob | None:
+	"""Most recently created job that is still queued or running."""
+	for job in reversed(_jobs.values()):
+		if job.status in UNFINISHED_STATUSES:
+			return job
+	return None
+
+
+async def request_checkin_run(triggered_by: str = 'manual', force: bool = False) -> tuple[CheckinJob, bool]:
+	"""Join the active job if there is one, else start a new job; returns (job, merged).
+
+	force=True always starts a new job, which re-runs every account once the active one is done.
+	"""
+	if not force:
+		job = get_active_job()
+		if job is not None:
+			job.merge(triggered_by)
+			logger.info(f'Run requested by {triggered_by} merged into active job {job.id} ({job.triggered_by})')
+			return job, True
+	return await start_checkin_job(triggered_by), False
+
+
+async def start_checkin_job(triggered_by: str = 'manual') -> CheckinJob:
+	"""Register a job and start the run in the background; returns immediately."""
+	job = CheckinJob(id=uuid.uuid4().hex, triggered_by=triggered_by)
+	_remember(job)
+	await persist_job(job)
+	task = asyncio.create_task(_run_job(job))
+	_tasks.add(task)
+	task.add_done_callback(_tasks.discard)
+	return job
+
+
+async def get_job_status(job_id: str) -> dict | None:
+	"""Live status from memory, falling back to the persisted snapshot (e.g. after a restart)."""
+	job = _jobs.get(job_id)
+	if job is not None:
+		return job.to_dict()
+	row = await get_checkin_job(job_id)
+	if row is not None:
+		row['eta_seconds'] = None
+	return row
+
+
+async def recover_jobs() -> int:
+	"""Called at startup: jobs persisted as queued/running belonged to a process that is gone."""
+	return await fail_unfinished_checkin_jobs('服务重启，任务已中断')
@@ -0,0 +1,143 @@
+"""Durable notification outbox.
+
+Check-in runs only enqueue a message (one notification_outbox row per enabled channel) and move
+on; a background worker delivers due rows and retries failed ones with exponential backoff. A
+row that still fails after MAX_ATTEMPTS is moved to the dead-letter state, where it stays on the
+notifications page until it is retried by hand. Rows survive restarts, so delivery is
+at-least-once: a row that was being sent when the process died is sent again.
+
+Channels in digest mode get periodic failure digests (web.digest) instead of per-run messages,
+and every send first takes a slot from the channel's rate limiter; a row over the limit is
+postponed without using up one of its attempts.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from utils.notify import notify
+from web.database import (
+	enqueue_notifications,
+	get_due_notifications,
+	get_next_notification_due,
+	mark_notification_failed,
+	mark_notification_sent,
+	postpone_notification,
+)
+from web.digest import flush_due_digests, rate_limiter, seconds_until_next_digest
+
+logger = logging.getLogger('checkin')
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+BATCH_SIZE = 50
+# enqueue wakes the worker directly; the idle poll only bounds how stale the next-due estimate gets
+IDLE_POLL_SECONDS = 300
+
+_wakeup: asyncio.Event | None = None
+_worker: asyncio.Task | None = None
+
+
+def backoff_seconds(attempts: int) -> int:
+	"""Delay after `attempts` failed tries: 30s, 1m, 2m, 4m, ... capped at BACKOFF_MAX_SECONDS."""
+	return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+async def enqueue_notification(title: str, content: str, msg_type: str = 'text') -> int:
+	"""Queue a message for every enabled channel not in digest mode; returns how many rows were queued."""
+	channels = [channel for channel in notify.channels if channel not in notify.digest_windows]
+	if not channels:
+		return 0
+	ids = await enqueue_notifications(channels, title, content, msg_type)
+	wake_worker()
+	return len(ids)
+
+
+def wake_worker():
+	"""Make the worker look at the table now instead of at its next scheduled check."""
+	if _wakeup is not None:
+		_wakeup.set()
+
+
+async def deliver_due(now: datetime | None = None) -> dict[str, int]:
+	"""Try every due row once (channels concurrently); returns counts of sent / retry / dead / deferred."""
+	now = now or datetime.now()
+	counts = {'sent': 0, 'retry': 0, 'dead': 0, 'deferred': 0}
+	rows = []
+	for row in await get_due_notifications(now.isoformat(), BATCH_SIZE):
+		wait = rate_limiter.acquire(row['channel'], now.timestamp())
+		if wait:
+			await postpone_notification(row['id'], (now + timedelta(seconds=wait)).isoformat())
+			counts['deferred'] += 1
+		else:
+			rows.append(row)
+	results = await asyncio.gather(*(
+		notify.asend_channel(row['channel'], row['title'], row['content'], row['msg_type']) for row in rows
+	))
+
+	for row, result in zip(rows, results):
+		if result['status'] == 'sent':
+			await mark_notification_sent(row['id'])
+			counts['sent'] += 1
+			continue
+		attempts = row['attempts'] + 1
+		if attempts >= MAX_ATTEMPTS:
+			await mark_notification_failed(row['id'], result['error'], None)
+			counts['dead'] += 1
+			logger.warning(f'Notification {row["id"]} to {row["channel"]} gave up after {attempts} attempts: {result["error"]}')
+		else:
+			next_attempt_at = now + timedelta(seconds=backoff_seconds(attempts))
+			await mark_notification_failed(row['id'], result['error'], next_attempt_at.isoformat())
+			counts['retry'] += 1
+	return counts
+
+
+async def _seconds_until_next_due() -> float:
+	waits = [IDLE_POLL_SECONDS]
+	next_due = await get_next_notification_due()
+	if next_due is not None:
+		waits.append((datetime.fromisoformat(next_due) - datetime.now()).total_seconds())
+	next_digest = await seconds_until_next_digest()
+	if next_digest is not None:
+		waits.append(next_digest)
+	return max(min(waits), 0)
+
+
+async def _run_worker():
+	while True:
+		# clear before looking at the table, so an enqueue during this pass is not lost
+		_wakeup.clear()
+		try:
+			await flush_due_digests()
+			counts = await deliver_due()
+			if sum(counts.values()) >= BATCH_SIZE:
+				continue  # a full batch: more rows may already be due
+			timeout = await _seconds_until_next_due()
+		except Exception as e:
+			logger.error(f'Notification outbox worker failed: {e}')
+			timeout = BACKOFF_BASE_SECONDS
+		try:
+			await asyncio.wait_for(_wakeup.wait(), timeout=timeout)
+		except asyncio.TimeoutError:
+			pass
+
+
+def start_outbox_worker():
+	global _wakeup, _worker
+	if _worker is not None and not _worker.done():
+		return
+	_wakeup = asyncio.Event()
+	_worker = asyncio.create_task(_run_worker())
+
+
+async def stop_outbox_worker():
+	global _wakeup, _worker
+	if _worker is not None:
+		_worker.cancel()
+		try:
+			await _worker
+		except asyncio.CancelledError:
+			pass
+	_worker = None
+	_wakeup = None
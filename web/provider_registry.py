@@ -0,0 +1,57 @@
+"""In-memory provider registry.
+
+Providers are read from the database once and kept as prebuilt ProviderConfig templates keyed
+by name. The provider routes call invalidate_provider_registry() after every write, and the next
+lookup reloads the table. Templates are shared: callers that need a different domain (template
+providers) must clone them with dataclasses.replace instead of mutating them.
+"""
+
+import json
+
+from utils.config import ProviderConfig
+from web.database import get_all_providers
+
+_templates: dict[str, ProviderConfig] | None = None
+# bumped by every invalidation, so a load that raced with a write does not cache what it read
+_generation = 0
+
+
+def _row_to_provider_config(row: dict) -> ProviderConfig:
+	waf_names = None
+	if row['waf_cookie_names']:
+		try:
+			waf_names = json.loads(row['waf_cookie_names'])
+		except (json.JSONDecodeError, TypeError):
+			waf_names = None
+	return ProviderConfig(
+		name=row['name'],
+		domain=(row['domain'] or '').rstrip('/'),
+		login_path=row['login_path'] or '/login',
+		sign_in_path=row['sign_in_path'],
+		user_info_path=row['user_info_path'] or '/api/user/self',
+		api_user_key=row['api_user_key'] or 'new-api-user',
+		bypass_method=row['bypass_method'],
+		waf_cookie_names=waf_names,
+	)
+
+
+async def _load_templates() -> dict[str, ProviderConfig]:
+	global _templates
+	generation = _generation
+	templates = {row['name']: _row_to_provider_config(row) for row in await get_all_providers()}
+	if generation == _generation:
+		_templates = templates
+	return templates
+
+
+async def get_provider_template(name: str) -> ProviderConfig | None:
+	"""Return the shared ProviderConfig template for `name`, loading the registry on first use."""
+	templates = _templates if _templates is not None else await _load_templates()
+	return templates.get(name)
+
+
+def invalidate_provider_registry():
+	"""Drop cached templates; the next lookup reloads providers from the database."""
+	global _templates, _generation
+	_templates = None
+	_generation += 1
@@ -1,18 +1,136 @@
 import json
+from collections.abc import AsyncIterator
 
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from web.conditional import conditional
 from web.database import (
-	get_all_accounts, get_account, create_account,
-	update_account, delete_account, toggle_account,
-	get_all_providers, get_provider,
+	create_account,
+	create_accounts_bulk,
+	delete_account,
+	get_account,
+	get_all_accounts,
+	get_all_providers,
+	iter_accounts,
+	toggle_account,
+	update_account,
 )
 
 router = APIRouter()
 
+IMPORT_CHUNK_SIZE = 500
+EXPORT_FIELDS = ('name', 'provider', 'auth_method', 'cookies', 'api_user', 'username', 'password', 'domain')
+
+
+async def _provider_rows() -> dict[str, dict]:
+	return {p['name']: p for p in await get_all_providers()}
+
+
+def _text(data: dict, key: str) -> str:
+	value = data.get(key)
+	return '' if value is None else str(value).strip()
+
+
+def _validate_account(data: dict, providers: dict[str, dict],
+					  default_name: str | None = None) -> tuple[dict | None, str | None]:
+	"""Normalize one account payload into create_account() fields, or return an error message.
+
+	Also accepts the ANYROUTER_ACCOUNTS shape: cookies as an object, numeric api_user, optional name.
+	"""
+	name = _text(data, 'name') or (default_name or '')
+	provider = _text(data, 'provider') or 'anyrouter'
+	auth_method = _text(data, 'auth_method') or 'cookie'
+	domain = _text(data, 'domain')
+
+	if not name:
+		return None, '请填写账号名称'
+
+	# 检查模板 Provider 是否需要域名
+	provider_row = providers.get(provider)
+	if provider_row and not provider_row.get('domain'):
+		if not domain:
+			return None, '该 Provider 为模板，请填写域名'
+		# 验证域名格式
+		if not domain.startswith(('http://', 'https://')):
+			return None, '域名需以 http:// 或 https:// 开头'
+
+	fields = {'name': name, 'provider': provider, 'domain': domain}
+	if auth_method == 'browser_login':
+		username = _text(data, 'username')
+		password = _text(data, 'password')
+		if not username or not password:
+			return None, '请填写用户名和密码'
+		return {**fields, 'auth_method': 'browser_login', 'username': username, 'password': password}, None
+
+	cookies = data.get('cookies')
+	cookies_raw = json.dumps(cookies) if isinstance(cookies, dict) else _text(data, 'cookies')
+	api_user = _text(data, 'api_user')
+	if not cookies_raw or not api_user:
+		return None, '请填写 Cookies 和 API User ID'
+	# Auto-wrap plain session value into JSON format
+	if not cookies_raw.startswith('{'):
+		cookies_raw = json.dumps({'session': cookies_raw})
+	else:
+		try:
+			json.loads(cookies_raw)
+		except json.JSONDecodeError:
+			return None, 'Cookies JSON 格式不正确'
+	return {**fields, 'auth_method': 'cookie', 'cookies': cookies_raw, 'api_user': api_user}, None
+
+
+async def _iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object, str | None]]:
+	"""Yield (line number, record, parse error) from an NDJSON byte stream; blank lines are skipped."""
+	buffer = b''
+	line_no = 0
+
+	def _parse(line: bytes):
+		try:
+			return json.loads(line), None
+		except (json.JSONDecodeError, UnicodeDecodeError):
+			return None, 'JSON 格式不正确'
+
+	async for chunk in chunks:
+		buffer += chunk
+		*lines, buffer = buffer.split(b'\n')
+		for line in lines:
+			line_no += 1
+			if line.strip():
+				yield line_no, *_parse(line)
+	if buffer.strip():
+		yield line_no + 1, *_parse(buffer)
+
+
+async def _iter_import_records(request: Request) -> AsyncIterator[tuple[int, object, str | None]]:
+	"""NDJSON bodies are parsed while streaming; JSON bodies are an array or {"accounts": [...]}."""
+	content_type = request.headers.get('content-type', '')
+	if 'ndjson' in content_type or 'jsonl' in content_type:
+		async for item in _iter_ndjson(request.stream()):
+			yield item
+		return
+
+	payload = json.loads(await request.body())
+	if isinstance(payload, dict):
+		payload = payload.get('accounts')
+	if not isinstance(payload, list):
+		raise ValueError('expected a JSON array of accounts')
+	for index, record in enumerate(payload, start=1):
+		yield index, record, None
+
+
+def _export_record(acc: dict) -> dict:
+	record = {field: acc.get(field) or '' for field in EXPORT_FIELDS}
+	try:
+		# keep cookies as an object so the export is valid ANYROUTER_ACCOUNTS input
+		record['cookies'] = json.loads(record['cookies']) if record['cookies'] else ''
+	except json.JSONDecodeError:
+		pass
+	record['enabled'] = bool(acc.get('enabled'))
+	return record
+
 
 @router.get('/accounts')
+@conditional('accounts', 'providers')
 async def accounts_page(request: Request):
 	from web.app import templates
 	accounts = await get_all_accounts()
@@ -28,51 +146,71 @@ async def accounts_page(request: Request):
 @router.post('/api/accounts')
 async def api_create_account(request: Request):
 	data = await request.json()
-	name = data.get('name', '').strip()
-	provider = data.get('provider', 'anyrouter').strip()
-	auth_method = data.get('auth_method', 'cookie').strip()
-	domain = data.get('domain', '').strip()
+	fields, error = _validate_account(data, await _provider_rows())
+	if error:
+		return JSONResponse({'success': False, 'message': error})
+	account_id = await create_account(**fields)
+	return JSONResponse({'success': True, 'id': account_id})
 
-	if not name:
-		return JSONResponse({'success': False, 'message': '请填写账号名称'})
 
-	# 检查模板 Provider 是否需要域名
-	provider_row = await get_provider(provider)
-	if provider_row and not provider_row.get('domain'):
-		if not domain:
-			return JSONResponse({'success': False, 'message': '该 Provider 为模板，请填写域名'})
-		# 验证域名格式
-		if not domain.startswith(('http://', 'https://')):
-			return JSONResponse({'success': False, 'message': '域名需以 http:// 或 https:// 开头'})
+@router.post('/api/accounts/import')
+async def api_import_accounts(request: Request):
+	"""Bulk-create accounts from NDJSON (one per line) or a JSON array in the ANYROUTER_ACCOUNTS format.
 
-	if auth_method == 'browser_login':
-		username = data.get('username', '').strip()
-		password = data.get('password', '').strip()
-		if not username or not password:
-			return JSONResponse({'success': False, 'message': '请填写用户名和密码'})
-		account_id = await create_account(
-			name=name, provider=provider, auth_method='browser_login',
-			username=username, password=password, domain=domain,
-		)
-	else:
-		cookies_raw = data.get('cookies', '').strip()
-		api_user = data.get('api_user', '').strip()
-		if not cookies_raw or not api_user:
-			return JSONResponse({'success': False, 'message': '请填写 Cookies 和 API User ID'})
-		# Auto-wrap plain session value into JSON format
-		if not cookies_raw.startswith('{'):
-			cookies_raw = json.dumps({'session': cookies_raw})
-		else:
-			try:
-				json.loads(cookies_raw)
-			except json.JSONDecodeError:
-				return JSONResponse({'success': False, 'message': 'Cookies JSON 格式不正确'})
-		account_id = await create_account(
-			name=name, provider=provider, auth_method='cookie',
-			cookies=cookies_raw, api_user=api_user, domain=domain,
-		)
+	Invalid rows are reported with their row number and skipped; valid rows are inserted in
+	chunks of IMPORT_CHUNK_SIZE, one transaction per chunk.
+	"""
+	providers = await _provider_rows()
+	imported = 0
+	errors = []
+	batch = []
+	try:
+		async for index, record, error in _iter_import_records(request):
+			if error is None and not isinstance(record, dict):
+				error = '格式不正确，应为 JSON 对象'
+			if error is None:
+				fields, error = _validate_account(record, providers, default_name=f'Account {index}')
+			if error:
+				errors.append({'row': index, 'message': error})
+				continue
+			fields['enabled'] = 0 if record.get('enabled') in (False, 0) else 1
+			batch.append(fields)
+			if len(batch) >= IMPORT_CHUNK_SIZE:
+				imported += await create_accounts_bulk(batch)
+				batch = []
+	except (ValueError, UnicodeDecodeError):
+		return JSONResponse({'success': False, 'message': '导入内容需为 JSON 数组或 NDJSON', 'imported': imported})
+	if batch:
+		imported += await create_accounts_bulk(batch)
 
-	return JSONResponse({'success': True, 'id': account_id})
+	return JSONResponse({'success': True, 'imported': imported, 'failed': len(errors), 'errors': errors})
+
+
+@router.get('/api/accounts/export')
+async def api_export_accounts(request: Request):
+	"""Stream all accounts (including credentials) as NDJSON, or as a JSON array with ?format=json."""
+	as_json = request.query_params.get('format') == 'json'
+
+	async def _body():
+		first = True
+		if as_json:
+			yield '['
+		async for acc in iter_accounts():
+			line = json.dumps(_export_record(acc), ensure_ascii=False)
+			if as_json:
+				yield line if first else ',' + line
+			else:
+				yield line + '\n'
+			first = False
+		if as_json:
+			yield ']'
+
+	filename = 'accounts.json' if as_json else 'accounts.ndjson'
+	return StreamingResponse(
+		_body(),
+		media_type='application/json' if as_json else 'application/x-ndjson',
+		headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+	)
 
 
 @router.put('/api/accounts/{account_id}')
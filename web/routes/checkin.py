@@ -2,33 +2,42 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
 from web.database import get_account
+from web.jobs import get_job_status, request_checkin_run
 
 router = APIRouter()
 
 
 @router.post('/api/checkin/all')
-async def api_checkin_all():
-	from web.scheduler import run_checkin_task
+async def api_checkin_all(force: bool = False):
+	"""Enqueue a run over all enabled accounts; poll /api/checkin/jobs/{job_id} for progress.
+
+	While a run is active the request joins it (merged=true) unless force=true.
+	"""
 	try:
-		result = await run_checkin_task(triggered_by='manual')
-		return JSONResponse({
-			'success': True,
-			'success_count': result['success_count'],
-			'total_count': result['total_count'],
-		})
+		job, merged = await request_checkin_run(triggered_by='manual', force=force)
+		return JSONResponse({'success': True, 'job_id': job.id, 'job': job.to_dict(), 'merged': merged})
 	except Exception as e:
 		return JSONResponse({'success': False, 'message': str(e)})
 
 
+@router.get('/api/checkin/jobs/{job_id}')
+async def api_checkin_job(job_id: str):
+	job = await get_job_status(job_id)
+	if not job:
+		return JSONResponse({'success': False, 'message': '任务不存在'})
+	return JSONResponse({'success': True, 'job': job})
+
+
 @router.post('/api/checkin/{account_id}')
 async def api_checkin_single(account_id: int):
-	from web.scheduler import run_checkin_single
+	from web.scheduler import run_checkin_shared
 	account = await get_account(account_id)
 	if not account:
 		return JSONResponse({'success': False, 'message': '账号不存在'})
 
 	try:
-		result = await run_checkin_single(account, triggered_by='manual')
+		# 同一账号已在签到中（重复点击/定时任务进行中）时复用其结果，不再重复发起
+		result, shared = await run_checkin_shared(account, triggered_by='manual')
 		status = result.get('status')
 		if not status:
 			status = 'success' if result.get('success') else 'failed'
@@ -36,6 +45,7 @@ async def api_checkin_single(account_id: int):
 			'success': result['success'],
 			'status': status,
 			'message': result.get('message', ''),
+			'shared': shared,
 		})
 	except Exception as e:
 		return JSONResponse({'success': False, 'message': str(e)})
@@ -0,0 +1,35 @@
+import asyncio
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from web.events import broker, format_sse
+
+router = APIRouter()
+
+KEEPALIVE_SECONDS = 15
+
+
+@router.get('/api/events')
+async def api_events(request: Request):
+	"""SSE stream of run_started / account_result / run_finished events."""
+
+	async def _stream():
+		with broker.subscribe() as sub:
+			yield 'retry: 3000\n\n'
+			while not await request.is_disconnected():
+				try:
+					event, data = await asyncio.wait_for(sub.queue.get(), timeout=KEEPALIVE_SECONDS)
+				except asyncio.TimeoutError:
+					yield ': keep-alive\n\n'
+					continue
+				dropped = sub.take_dropped()
+				if dropped:
+					yield format_sse('dropped', {'count': dropped})
+				yield format_sse(event, data)
+
+	return StreamingResponse(
+		_stream(),
+		media_type='text/event-stream',
+		headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+	)
@@ -1,11 +1,32 @@
+import base64
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator
+from datetime import date, timedelta
+
 from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 
-from web.database import get_all_accounts, get_checkin_logs, get_log_count
-from web.failure_reason import summarize_reason
+from web.conditional import conditional
+from web.database import (
+	LOG_EXPORT_COLUMNS,
+	get_all_accounts,
+	get_checkin_logs_keyset,
+	get_daily_stats,
+	get_log_category_counts_cached,
+	get_log_count_cached,
+	iter_checkin_log_batches,
+	search_checkin_logs,
+)
+from web.failure_reason import CATEGORY_DISPLAY_MAP, summarize_log_reason
 
 router = APIRouter()
 
 PAGE_SIZE = 30
+MAX_API_PAGE_SIZE = 200
+EXPORT_BATCH_SIZE = 1000
 
 
 def _parse_positive_int(value: str | None, default: int | None = None) -> int | None:
@@ -18,34 +39,227 @@ def _parse_positive_int(value: str | None, default: int | None = None) -> int |
 	return parsed if parsed > 0 else default
 
 
-@router.get('/logs')
-async def logs_page(request: Request):
-	from web.app import templates
+def _encode_cursor(log: dict) -> str:
+	raw = f'{log["created_at"]}|{log["id"]}'.encode()
+	return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(value: str | None) -> tuple[str, int] | None:
+	"""Decode a (created_at, id) keyset cursor; invalid cursors fall back to the first page."""
+	if not value:
+		return None
+	try:
+		raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+		created_at, log_id = raw.rsplit('|', 1)
+		return created_at, int(log_id)
+	except (ValueError, UnicodeDecodeError):
+		return None
+
+
+def _parse_day(value: str | None) -> date | None:
+	try:
+		return date.fromisoformat(value or '')
+	except ValueError:
+		return None
+
+
+def _parse_filters(request: Request) -> dict:
+	"""Log filters from the query string; unknown categories and malformed dates are ignored."""
+	params = request.query_params
+	category = params.get('category', '')
+	since = _parse_day(params.get('since'))
+	return {
+		'account_id': _parse_positive_int(params.get('account_id')),
+		'status': params.get('status', '') or None,
+		'category': category if category in CATEGORY_DISPLAY_MAP else None,
+		'since': since.isoformat() if since else None,
+	}
 
-	page = _parse_positive_int(request.query_params.get('page'), 1) or 1
-	status = request.query_params.get('status', '') or None
-	account_id = request.query_params.get('account_id', '') or None
 
-	account_id_int = _parse_positive_int(account_id)
+def _filter_context(filters: dict) -> dict:
+	"""Current filter values, echoed back to the filter controls and pagination links."""
+	return {
+		'filter_status': filters['status'] or '',
+		'filter_account': str(filters['account_id'] or ''),
+		'filter_category': filters['category'] or '',
+		'filter_since': filters['since'] or '',
+	}
 
-	total = await get_log_count(account_id=account_id_int, status=status)
-	total_pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
-	page = min(page, total_pages)
 
-	offset = (page - 1) * PAGE_SIZE
-	logs = await get_checkin_logs(limit=PAGE_SIZE, offset=offset, account_id=account_id_int, status=status)
+async def _load_logs_page(request: Request, page_size: int) -> dict:
+	"""Load one keyset page of logs with next/prev cursors and an approximate total."""
+	filters = _parse_filters(request)
+	cursor = _decode_cursor(request.query_params.get('cursor'))
+	backwards = cursor is not None and request.query_params.get('dir') == 'prev'
+
+	if backwards:
+		logs = await get_checkin_logs_keyset(limit=page_size + 1, after=cursor, **filters)
+		has_prev = len(logs) > page_size
+		logs = logs[-page_size:]
+		has_next = True
+	else:
+		logs = await get_checkin_logs_keyset(limit=page_size + 1, before=cursor, **filters)
+		has_next = len(logs) > page_size
+		logs = logs[:page_size]
+		has_prev = cursor is not None
+
+	for log in logs:
+		log.update(summarize_log_reason(log))
+
+	return {
+		'logs': logs,
+		'next_cursor': _encode_cursor(logs[-1]) if logs and has_next else None,
+		'prev_cursor': _encode_cursor(logs[0]) if logs and has_prev else None,
+		'total': await get_log_count_cached(**filters),
+		**_filter_context(filters),
+		'search': '',
+	}
+
+
+async def _load_search_page(request: Request, page_size: int) -> dict:
+	"""Load one page of full-text search results (ranked, so paged by offset rather than keyset)."""
+	search = request.query_params.get('q', '').strip()
+	filters = _parse_filters(request)
+	offset = _parse_positive_int(request.query_params.get('offset'), 0)
+
+	logs = await search_checkin_logs(search, limit=page_size + 1, offset=offset, **filters)
+	has_next = len(logs) > page_size
+	logs = logs[:page_size]
 	for log in logs:
-		log.update(summarize_reason(log.get('status'), log.get('message')))
+		log.update(summarize_log_reason(log))
+
+	return {
+		'logs': logs,
+		'next_offset': offset + page_size if has_next else None,
+		'prev_offset': max(offset - page_size, 0) if offset else None,
+		**_filter_context(filters),
+		'search': search,
+	}
+
+
+def _since_options() -> list[tuple[str, str]]:
+	today = date.today()
+	return [
+		('今天', today.isoformat()),
+		('近 7 天', (today - timedelta(days=6)).isoformat()),
+		('近 30 天', (today - timedelta(days=29)).isoformat()),
+	]
 
+
+# The "近 7 天" style options are dated, so the page ETag also changes at midnight
+@router.get('/logs')
+@conditional('logs', 'accounts', 'settings', extra=lambda: date.today().isoformat())
+async def logs_page(request: Request):
+	from web.app import templates
+	from web.scheduler import get_log_retention_days
+
+	if request.query_params.get('q', '').strip():
+		page = await _load_search_page(request, PAGE_SIZE)
+	else:
+		page = await _load_logs_page(request, PAGE_SIZE)
 	accounts = await get_all_accounts()
+	filters = _parse_filters(request)
+	category_counts = await get_log_category_counts_cached(account_id=filters['account_id'], since=filters['since'])
 
 	return templates.TemplateResponse('logs.html', {
 		'request': request,
-		'logs': logs,
 		'accounts': accounts,
-		'current_page': page,
-		'total_pages': total_pages,
-		'filter_status': status or '',
-		'filter_account': account_id or '',
+		'categories': [
+			(category, meta['label'], category_counts.get(category, 0))
+			for category, meta in CATEGORY_DISPLAY_MAP.items()
+		],
+		'since_options': _since_options(),
+		'retention_days': get_log_retention_days(),
 		'active_page': 'logs',
+		**page,
 	})
+
+
+@router.get('/api/logs')
+@conditional('logs')
+async def api_logs(request: Request):
+	limit = min(_parse_positive_int(request.query_params.get('limit'), PAGE_SIZE), MAX_API_PAGE_SIZE)
+	page = await _load_logs_page(request, limit)
+	return {'success': True, **page}
+
+
+@router.get('/api/logs/search')
+@conditional('logs')
+async def api_search_logs(request: Request):
+	"""Ranked full-text search over log messages, account names and providers."""
+	if not request.query_params.get('q', '').strip():
+		return {'success': False, 'message': '请输入搜索关键词'}
+	limit = min(_parse_positive_int(request.query_params.get('limit'), PAGE_SIZE), MAX_API_PAGE_SIZE)
+	page = await _load_search_page(request, limit)
+	return {'success': True, **page}
+
+
+@router.get('/api/logs/categories')
+@conditional('logs')
+async def api_log_categories(request: Request):
+	"""Log counts per error_category, optionally for one account and/or since a day (YYYY-MM-DD)."""
+	filters = _parse_filters(request)
+	counts = await get_log_category_counts_cached(account_id=filters['account_id'], since=filters['since'])
+	return {'success': True, 'counts': counts}
+
+
+def _csv_chunk(rows) -> str:
+	buffer = io.StringIO()
+	csv.writer(buffer).writerows(rows)
+	return buffer.getvalue()
+
+
+async def _gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+	compressor = zlib.compressobj(wbits=31)  # 31 = gzip header and trailer
+	async for chunk in chunks:
+		# Sync-flush every batch so the client receives data as it is read, not at the end
+		yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+	yield compressor.flush()
+
+
+@router.get('/api/logs/export')
+async def api_export_logs(request: Request):
+	"""Stream logs oldest first as CSV (default) or NDJSON (?format=ndjson).
+
+	Takes the logs page filters (status, account_id, category, since) plus until; since and until
+	are inclusive days (YYYY-MM-DD). Rows are read EXPORT_BATCH_SIZE at a time and compressed on
+	the fly when the client accepts gzip, so memory stays flat regardless of the export size.
+	"""
+	as_ndjson = request.query_params.get('format') == 'ndjson'
+	filters = _parse_filters(request)
+	until = _parse_day(request.query_params.get('until'))
+	if until:
+		filters['until'] = (until + timedelta(days=1)).isoformat()
+
+	async def _body():
+		if not as_ndjson:
+			# BOM so Excel opens the (partly Chinese) UTF-8 text correctly
+			yield '\ufeff' + _csv_chunk([LOG_EXPORT_COLUMNS])
+		async for rows in iter_checkin_log_batches(EXPORT_BATCH_SIZE, **filters):
+			if as_ndjson:
+				yield ''.join(
+					json.dumps(dict(zip(LOG_EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows
+				)
+			else:
+				yield _csv_chunk(rows)
+
+	filename = f'checkin-logs-{date.today():%Y%m%d}.{"ndjson" if as_ndjson else "csv"}'
+	headers = {'Content-Disposition': f'attachment; filename="{filename}"', 'Vary': 'Accept-Encoding'}
+	body = _body()
+	if 'gzip' in request.headers.get('accept-encoding', ''):
+		body = _gzip_stream(body)
+		headers['Content-Encoding'] = 'gzip'
+	return StreamingResponse(
+		body,
+		media_type='application/x-ndjson' if as_ndjson else 'text/csv',
+		headers=headers,
+	)
+
+
+@router.get('/api/logs/daily-stats')
+@conditional('logs')
+async def api_daily_stats(request: Request):
+	"""Per-account daily aggregates of logs that were rolled up by log retention."""
+	account_id = _parse_positive_int(request.query_params.get('account_id'))
+	since = request.query_params.get('since') or None
+	return {'success': True, 'stats': await get_daily_stats(account_id=account_id, since=since)}
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from web.database import get_notification_counts, get_notifications, retry_notification
+
+router = APIRouter()
+
+OUTBOX_STATUSES = ('pending', 'sent', 'dead')
+PAGE_LIMIT = 100
+
+
+def _parse_status(request: Request) -> str | None:
+	status = request.query_params.get('status', '')
+	return status if status in OUTBOX_STATUSES else None
+
+
+@router.get('/notifications')
+async def notifications_page(request: Request):
+	from utils.notify import notify
+	from web.app import templates
+	from web.outbox import MAX_ATTEMPTS
+
+	status = _parse_status(request)
+	return templates.TemplateResponse('notifications.html', {
+		'request': request,
+		'items': await get_notifications(status=status, limit=PAGE_LIMIT),
+		'counts': await get_notification_counts(),
+		'filter_status': status or '',
+		'channels': [
+			(channel, notify.digest_windows[channel] / 60 if channel in notify.digest_windows else None)
+			for channel in notify.channels
+		],
+		'max_attempts': MAX_ATTEMPTS,
+		'active_page': 'notifications',
+	})
+
+
+@router.get('/api/notifications')
+async def api_notifications(request: Request):
+	status = _parse_status(request)
+	return {
+		'success': True,
+		'items': await get_notifications(status=status, limit=PAGE_LIMIT),
+		'counts': await get_notification_counts(),
+	}
+
+
+@router.post('/api/notifications/{notification_id}/retry')
+async def api_retry_notification(notification_id: int):
+	"""Re-queue a dead-lettered notification with a fresh attempt budget."""
+	if not await retry_notification(notification_id):
+		return JSONResponse({'success': False, 'message': '只能重试已放弃的通知'})
+	from web.outbox import wake_worker
+	wake_worker()
+	return JSONResponse({'success': True})
@@ -4,6 +4,7 @@ from urllib.parse import urlparse
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 
+from web.conditional import conditional
 from web.database import (
 	create_provider,
 	delete_provider,
@@ -11,6 +12,7 @@ from web.database import (
 	get_provider,
 	update_provider,
 )
+from web.provider_registry import invalidate_provider_registry
 
 router = APIRouter()
 _COOKIE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
@@ -42,6 +44,7 @@ def _normalize_waf_cookie_names(raw) -> list[str]:
 
 
 @router.get('/providers')
+@conditional('providers')
 async def providers_page(request: Request):
 	from web.app import templates
 	providers = await get_all_providers()
@@ -82,6 +85,7 @@ async def api_create_provider(request: Request):
 		bypass_method=(data.get('bypass_method') or '').strip() or None,
 		waf_cookie_names=waf_cookie_names,
 	)
+	invalidate_provider_registry()
 	return JSONResponse({'success': True})
 
 
@@ -116,6 +120,7 @@ async def api_update_provider(name: str, request: Request):
 
 	if updates:
 		await update_provider(name, **updates)
+		invalidate_provider_registry()
 	return JSONResponse({'success': True})
 
 
@@ -127,4 +132,5 @@ async def api_delete_provider(name: str):
 	if existing['is_builtin']:
 		return JSONResponse({'success': False, 'message': '内置 Provider 不可删除'})
 	await delete_provider(name)
+	invalidate_provider_registry()
 	return JSONResponse({'success': True})
@@ -0,0 +1,64 @@
+import time
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from web.conditional import conditional
+from web.database import BALANCE_SERIES_AGGREGATES, get_account_ids, get_account_stats, get_balance_series
+
+router = APIRouter()
+
+DEFAULT_SERIES_DAYS = 30
+DEFAULT_SERIES_POINTS = 200
+MAX_SERIES_POINTS = 2000
+
+
+@router.get('/api/stats/accounts')
+@conditional('accounts', 'logs')
+async def api_account_stats(request: Request):
+	stats = await get_account_stats()
+	return JSONResponse({'success': True, 'stats': list(stats.values())})
+
+
+@router.get('/api/stats/accounts/{account_id}')
+@conditional('accounts', 'logs')
+async def api_account_stats_single(request: Request, account_id: int):
+	stats = await get_account_stats(account_id)
+	if account_id not in stats:
+		return JSONResponse({'success': False, 'message': '暂无统计数据'})
+	return JSONResponse({'success': True, 'stats': stats[account_id]})
+
+
+@router.get('/api/stats/balance')
+async def api_balance_series(request: Request):
+	"""Chart-ready balance series, downsampled to at most `points` buckets per account.
+
+	Query: account_id (comma separated, default all accounts), days (default 30) or since/until
+	epoch seconds, points (default 200), agg = last | min | max.
+	"""
+	params = request.query_params
+	agg = params.get('agg', 'last')
+	if agg not in BALANCE_SERIES_AGGREGATES:
+		return JSONResponse({'success': False, 'message': 'agg 仅支持 last / min / max'})
+
+	try:
+		account_ids = [int(v) for v in params.get('account_id', '').split(',') if v.strip()]
+		until = int(params.get('until') or time.time())
+		days = int(params.get('days') or DEFAULT_SERIES_DAYS)
+		since = int(params.get('since') or until - days * 86400)
+		points = min(max(int(params.get('points') or DEFAULT_SERIES_POINTS), 1), MAX_SERIES_POINTS)
+	except ValueError:
+		return JSONResponse({'success': False, 'message': '参数格式错误'})
+	if since > until:
+		return JSONResponse({'success': False, 'message': 'since 不能晚于 until'})
+
+	if not account_ids:
+		account_ids = await get_account_ids()
+	series = await get_balance_series(account_ids, since, until, points=points, agg=agg)
+	return JSONResponse({
+		'success': True,
+		'since': since,
+		'until': until,
+		'agg': agg,
+		'series': [{'account_id': account_id, **points_} for account_id, points_ in series.items()],
+	})
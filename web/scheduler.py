@@ -2,51 +2,50 @@ import asyncio
 import json
 import logging
 import os
+import time
+from dataclasses import replace as dc_replace
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from utils.classifier import is_already_checked_in_message
 from utils.config import AccountConfig, ProviderConfig
 from web.database import (
 	add_checkin_log,
 	cleanup_expired_waf_cookies,
 	delete_waf_cookies,
-	get_all_providers,
 	get_cached_waf_cookies,
 	get_enabled_accounts,
 	get_setting,
+	get_setting_int,
+	prune_checkin_logs,
+	refresh_account_window_counts,
 	save_waf_cookies,
 	set_setting,
 	update_account,
 )
+from web.events import broker
+from web.failure_reason import describe_category
+from web.jobs import persist_job, request_checkin_run
+from web.provider_registry import get_provider_template
 
 logger = logging.getLogger('checkin')
 _tz = ZoneInfo(os.environ.get('TZ', 'Asia/Shanghai'))
 scheduler = AsyncIOScheduler(timezone=_tz)
 _checkin_lock = asyncio.Lock()
+# account_id -> 正在执行的签到任务；同一账号的并发请求共享同一个结果
+_inflight: dict[int, asyncio.Task] = {}
 
-
-def _is_already_checked_in_message(message: str | None) -> bool:
-	if not message:
-		return False
-
-	text = str(message).strip().lower()
-	keywords = [
-		'already checked in',
-		'already check in',
-		'already signed in',
-		'already_checked_in',
-		'已经签到',
-		'已签到',
-		'重复签到',
-	]
-	return any(keyword in text for keyword in keywords)
+DEFAULT_LOG_RETENTION_DAYS = int(os.environ.get('LOG_RETENTION_DAYS', '90') or 0)
+MIN_LOG_RETENTION_DAYS = 7
+# 低峰期执行日志归档（默认签到为 0/6/12/18 点）
+RETENTION_CRON = os.environ.get('LOG_RETENTION_CRON', '30 3 * * *')
 
 
 def _normalize_status(success: bool, message: str | None) -> tuple[str, bool]:
-	if _is_already_checked_in_message(message):
+	if is_already_checked_in_message(message):
 		return 'already_checked_in', True
 	return ('success', True) if success else ('failed', False)
 
@@ -55,6 +54,7 @@ def start_scheduler():
 	async def _setup():
 		cron_expr = await get_setting('cron_expression', '0 */6 * * *')
 		_schedule_job(cron_expr)
+		_schedule_retention_job()
 
 	loop = asyncio.get_event_loop()
 	loop.create_task(_setup())
@@ -87,6 +87,49 @@ def _schedule_job(cron_expr: str):
 		logger.info(f'Scheduled checkin job with cron: {cron_expr}')
 
 
+def _schedule_retention_job():
+	parts = RETENTION_CRON.strip().split()
+	if len(parts) != 5:
+		logger.warning(f'Invalid LOG_RETENTION_CRON: {RETENTION_CRON}')
+		return
+	trigger = CronTrigger(
+		minute=parts[0], hour=parts[1], day=parts[2],
+		month=parts[3], day_of_week=parts[4]
+	)
+	scheduler.add_job(
+		_scheduled_retention, trigger, id='retention_job',
+		name='Log Retention', replace_existing=True,
+		misfire_grace_time=3600,
+	)
+
+
+def get_log_retention_days() -> int:
+	"""Configured log retention in days; 0 keeps raw logs forever."""
+	days = get_setting_int('log_retention_days', DEFAULT_LOG_RETENTION_DAYS)
+	if days <= 0:
+		return 0
+	return max(days, MIN_LOG_RETENTION_DAYS)
+
+
+async def _scheduled_retention():
+	# 日切后重新统计今天还没有签到记录的账号的 7/30 天成功率
+	try:
+		await refresh_account_window_counts()
+	except Exception as e:
+		logger.warning(f'Account stats refresh failed: {e}')
+	retention_days = get_log_retention_days()
+	if not retention_days:
+		return
+	# 与签到任务互斥，避免归档时与大量日志写入争用
+	async with _checkin_lock:
+		try:
+			result = await prune_checkin_logs(retention_days)
+			if result['rolled_up']:
+				logger.info(f'Rolled up {result["rolled_up"]} logs older than {result["cutoff"]} into daily stats')
+		except Exception as e:
+			logger.warning(f'Log retention failed: {e}')
+
+
 async def _scheduled_checkin():
 	logger.info('Scheduled check-in triggered')
 	# 清理过期的 WAF cookie 缓存
@@ -96,7 +139,8 @@ async def _scheduled_checkin():
 			logger.info(f'Cleaned up {deleted} expired WAF cookie cache entries')
 	except Exception as e:
 		logger.warning(f'WAF cookie cleanup failed: {e}')
-	await run_checkin_task(triggered_by='schedule')
+	# 手动任务进行中时并入该任务，不再排队重跑全部账号
+	await request_checkin_run(triggered_by='schedule')
 
 
 def get_next_run_time():
@@ -107,27 +151,12 @@ def get_next_run_time():
 
 
 async def _build_provider_config(provider_name: str) -> ProviderConfig | None:
-	providers = await get_all_providers()
-	for p in providers:
-		if p['name'] == provider_name:
-			domain = (p['domain'] or '').rstrip('/')
-			waf_names = None
-			if p['waf_cookie_names']:
-				try:
-					waf_names = json.loads(p['waf_cookie_names'])
-				except (json.JSONDecodeError, TypeError):
-					waf_names = None
-			return ProviderConfig(
-				name=p['name'],
-				domain=domain,
-				login_path=p['login_path'] or '/login',
-				sign_in_path=p['sign_in_path'],
-				user_info_path=p['user_info_path'] or '/api/user/self',
-				api_user_key=p['api_user_key'] or 'new-api-user',
-				bypass_method=p['bypass_method'],
-				waf_cookie_names=waf_names,
-			)
-	return None
+	"""Shared provider template from the in-memory registry; never mutate it in place."""
+	return await get_provider_template(provider_name)
+
+
+def _elapsed_ms(started: float) -> int:
+	return int((time.monotonic() - started) * 1000)
 
 
 def _db_account_to_config(acc: dict, index: int) -> AccountConfig:
@@ -144,6 +173,24 @@ def _db_account_to_config(acc: dict, index: int) -> AccountConfig:
 	)
 
 
+async def _record_checkin(**log):
+	"""Store a check-in log and publish the result to live subscribers (dashboard/accounts page)."""
+	reason = describe_category(await add_checkin_log(**log))
+	broker.publish('account_result', {
+		'account_id': log['account_id'],
+		'account_name': log['account_name'],
+		'status': log['status'],
+		'category': reason['error_category'],
+		'category_label': reason['error_category_label'],
+		'latency_ms': log.get('duration_ms'),
+		'balance': log.get('balance'),
+		'used_quota': log.get('used_quota'),
+		'message': log.get('message') or '',
+		'triggered_by': log.get('triggered_by'),
+		'at': datetime.now().isoformat(),
+	})
+
+
 async def run_checkin_single(account_row: dict, triggered_by='manual') -> dict:
 	auth_method = account_row.get('auth_method', 'cookie')
 
@@ -153,14 +200,42 @@ async def run_checkin_single(account_row: dict, triggered_by='manual') -> dict:
 		return await _run_cookie_checkin(account_row, triggered_by)
 
 
-def _resolve_domain(provider_config, account_row: dict) -> str | None:
-	"""Resolve domain: use account domain if provider has no domain (template provider)."""
+async def run_checkin_shared(account_row: dict, triggered_by='manual') -> tuple[dict, bool]:
+	"""Check in one account unless it is already in flight, in which case await that run.
+
+	Returns (result, shared); shared is True when the result came from a run started by
+	another caller (double-click, manual trigger during a scheduled run).
+	"""
+	account_id = account_row['id']
+	task = _inflight.get(account_id)
+	if task is not None:
+		return await asyncio.shield(task), True
+
+	task = asyncio.create_task(run_checkin_single(account_row, triggered_by=triggered_by))
+	_inflight[account_id] = task
+	task.add_done_callback(lambda done: _forget_inflight(account_id, done))
+	# shield: a disconnecting client must not cancel the check-in others are waiting on
+	return await asyncio.shield(task), False
+
+
+def _forget_inflight(account_id: int, task: asyncio.Task):
+	if _inflight.get(account_id) is task:
+		del _inflight[account_id]
+	if not task.cancelled():
+		task.exception()  # mark retrieved even if every waiter went away
+
+
+def _resolve_domain(provider_config: ProviderConfig, account_row: dict) -> ProviderConfig | None:
+	"""Resolve domain: use account domain if provider has no domain (template provider).
+
+	Template providers are cloned with the account domain so the shared registry entry stays
+	untouched. Returns None when neither the provider nor the account has a domain.
+	"""
 	if provider_config.domain:
-		return provider_config.domain
+		return provider_config
 	account_domain = (account_row.get('domain') or '').rstrip('/')
 	if account_domain:
-		provider_config.domain = account_domain
-		return account_domain
+		return dc_replace(provider_config, domain=account_domain)
 	return None
 
 
@@ -253,28 +328,32 @@ async def _run_browser_login_checkin(account_row: dict, triggered_by: str) -> di
 	"""使用浏览器登录方式签到"""
 	from web.browser_checkin import browser_login_checkin
 
+	started = time.monotonic()
 	provider_config = await _build_provider_config(account_row['provider'])
 	if not provider_config:
 		msg = f'Provider "{account_row["provider"]}" not found'
-		await add_checkin_log(
+		await _record_checkin(
 			account_id=account_row['id'],
 			account_name=account_row['name'],
 			provider=account_row['provider'],
 			status='failed',
 			message=msg,
 			triggered_by=triggered_by,
+			duration_ms=_elapsed_ms(started),
 		)
 		return {'success': False, 'status': 'failed', 'message': msg}
 
-	if not _resolve_domain(provider_config, account_row):
+	provider_config = _resolve_domain(provider_config, account_row)
+	if not provider_config:
 		msg = f'Provider "{account_row["provider"]}" 无域名，且账号未指定域名'
-		await add_checkin_log(
+		await _record_checkin(
 			account_id=account_row['id'],
 			account_name=account_row['name'],
 			provider=account_row['provider'],
 			status='failed',
 			message=msg,
 			triggered_by=triggered_by,
+			duration_ms=_elapsed_ms(started),
 		)
 		return {'success': False, 'status': 'failed', 'message': msg}
 
@@ -301,7 +380,7 @@ async def _run_browser_login_checkin(account_row: dict, triggered_by: str) -> di
 			update_data['last_used'] = result['used_quota']
 		await update_account(account_row['id'], **update_data)
 
-		await add_checkin_log(
+		await _record_checkin(
 			account_id=account_row['id'],
 			account_name=account_row['name'],
 			provider=account_row['provider'],
@@ -310,19 +389,21 @@ async def _run_browser_login_checkin(account_row: dict, triggered_by: str) -> di
 			used_quota=result.get('used_quota'),
 			message=message,
 			triggered_by=triggered_by,
+			duration_ms=_elapsed_ms(started),
 		)
 
 		return {'success': success_flag, 'status': status, 'message': message}
 
 	except Exception as e:
 		msg = str(e)[:200]
-		await add_checkin_log(
+		await _record_checkin(
 			account_id=account_row['id'],
 			account_name=account_row['name'],
 			provider=account_row['provider'],
 			status='failed',
 			message=msg,
 			triggered_by=triggered_by,
+			duration_ms=_elapsed_ms(started),
 		)
 		await update_account(account_row['id'],
 							 last_checkin=datetime.now().isoformat(),
@@ -333,31 +414,34 @@ async def _run_browser_login_checkin(account_row: dict, triggered_by: str) -> di
 async def _run_cookie_checkin(account_row: dict, triggered_by: str) -> dict:
 	"""使用 Cookie 方式签到（带 WAF cookie 缓存和挑战检测）"""
 	from checkin import check_in_account, is_waf_challenge_response, parse_cookies
-	from dataclasses import replace as dc_replace
 	from utils.config import AppConfig
 
+	started = time.monotonic()
 	provider_config = await _build_provider_config(account_row['provider'])
 	if not provider_config:
 		msg = f'Provider "{account_row["provider"]}" not found'
-		await add_checkin_log(
+		await _record_checkin(
 			account_id=account_row['id'],
 			account_name=account_row['name'],
 			provider=account_row['provider'],
 			status='failed',
 			message=msg,
 			triggered_by=triggered_by,
+			duration_ms=_elapsed_ms(started),
 		)
 		return {'success': False, 'status': 'failed', 'message': msg}
 
-	if not _resolve_domain(provider_config, account_row):
+	provider_config = _resolve_domain(provider_config, account_row)
+	if not provider_config:
 		msg = f'Provider "{account_row["provider"]}" 无域名，且账号未指定域名'
-		await add_checkin_log(
+		await _record_checkin(
 			account_id=account_row['id'],
 			account_name=account_row['name'],
 			provider=account_row['provider'],
 			status='failed',
 			message=msg,
 			triggered_by=triggered_by,
+			duration_ms=_elapsed_ms(started),
 		)
 		return {'success': False, 'status': 'failed', 'message': msg}
 
@@ -486,7 +570,7 @@ async def _run_cookie_checkin(account_row: dict, triggered_by: str) -> dict:
 		await update_account(account_row['id'], **update_data)
 
 		# Add log
-		await add_checkin_log(
+		await _record_checkin(
 			account_id=account_row['id'],
 			account_name=account_row['name'],
 			provider=account_row['provider'],
@@ -495,19 +579,21 @@ async def _run_cookie_checkin(account_row: dict, triggered_by: str) -> dict:
 			used_quota=used,
 			message=msg,
 			triggered_by=triggered_by,
+			duration_ms=_elapsed_ms(started),
 		)
 
 		return {'success': success, 'status': status, 'message': msg}
 
 	except Exception as e:
 		msg = str(e)[:200]
-		await add_checkin_log(
+		await _record_checkin(
 			account_id=account_row['id'],
 			account_name=account_row['name'],
 			provider=account_row['provider'],
 			status='failed',
 			message=msg,
 			triggered_by=triggered_by,
+			duration_ms=_elapsed_ms(started),
 		)
 		await update_account(account_row['id'],
 							 last_checkin=datetime.now().isoformat(),
@@ -515,44 +601,85 @@ async def _run_cookie_checkin(account_row: dict, triggered_by: str) -> dict:
 		return {'success': False, 'status': 'failed', 'message': msg}
 
 
-async def run_checkin_task(triggered_by='schedule') -> dict:
+async def run_checkin_task(triggered_by='schedule', job=None) -> dict:
+	"""Check in all enabled accounts one by one; `job` (web.jobs.CheckinJob) receives progress."""
 	async with _checkin_lock:
 		accounts = await get_enabled_accounts()
+		broker.publish('run_started', {
+			'triggered_by': triggered_by,
+			'total': len(accounts),
+			'job_id': job.id if job is not None else None,
+		})
+		if job is not None:
+			job.start(len(accounts))
+			await persist_job(job)
 		if not accounts:
 			logger.info('No enabled accounts found')
-			return {'success_count': 0, 'total_count': 0}
 
 		success_count = 0
 		failed_count = 0
 		total_count = len(accounts)
 
-		for acc in accounts:
-			try:
-				result = await run_checkin_single(acc, triggered_by=triggered_by)
-				status = result.get('status')
-				if not status:
-					status = 'success' if result.get('success') else 'failed'
-
-				if status in {'success', 'already_checked_in'}:
-					success_count += 1
-				elif status == 'failed':
+		processed = set()
+		pending = accounts
+		while True:
+			for acc in pending:
+				processed.add(acc['id'])
+				if job is not None:
+					job.begin_account(acc['name'])
+				try:
+					result, _ = await run_checkin_shared(acc, triggered_by=triggered_by)
+					status = result.get('status')
+					if not status:
+						status = 'success' if result.get('success') else 'failed'
+
+					if status in {'success', 'already_checked_in'}:
+						success_count += 1
+					elif status == 'failed':
+						failed_count += 1
+				except Exception as e:
+					status = 'failed'
 					failed_count += 1
-			except Exception as e:
-				failed_count += 1
-				logger.error(f'Error checking in account {acc["name"]}: {e}')
+					logger.error(f'Error checking in account {acc["name"]}: {e}')
+				if job is not None:
+					job.finish_account(acc['name'], status)
+					await persist_job(job)
+
+			# 运行期间有新的签到请求并入：补上之后启用、本次尚未处理的账号，已完成的直接复用
+			if job is None or not job.take_rescan():
+				break
+			pending = [acc for acc in await get_enabled_accounts() if acc['id'] not in processed]
+			job.extend(len(pending))
+			total_count += len(pending)
+		if job is not None:
+			# 与最后一次 take_rescan() 之间没有 await：此后的请求会另起新任务，不会并入一个不再补跑的任务
+			job.complete()
 
 		# Send notification only when there are real failures
 		if failed_count > 0:
 			try:
-				from utils.notify import notify
+				# 只写入通知队列，由 web.outbox 的后台任务投递（失败自动重试），不拖慢签到
+				from web.outbox import enqueue_notification
 				content = f'签到完成: {success_count}/{total_count} 成功'
-				notify.push_message('AnyRouter Check-in', content, msg_type='text')
+				await enqueue_notification('AnyRouter Check-in', content, msg_type='text')
 			except Exception as e:
 				logger.error(f'Notification failed: {e}')
 
+		merged_triggers = job.merged_triggers if job is not None else []
+		merged_note = f' (merged: {", ".join(merged_triggers)})' if merged_triggers else ''
 		logger.info(
-			f'Check-in completed: success={success_count}, failed={failed_count}, total={total_count}'
+			f'Check-in completed: success={success_count}, failed={failed_count}, total={total_count}, '
+			f'triggered_by={triggered_by}{merged_note}'
 		)
+		broker.publish('run_finished', {
+			'triggered_by': triggered_by,
+			'merged_triggers': merged_triggers,
+			'success_count': success_count,
+			'failed_count': failed_count,
+			'total_count': total_count,
+		})
+		if job is not None:
+			await persist_job(job)
 		return {
 			'success_count': success_count,
 			'total_count': total_count,
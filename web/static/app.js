@@ -14,29 +14,65 @@ function showToast(message, type = 'success') {
 	setTimeout(() => toast.remove(), 3000);
 }
 
-// Check-in all accounts
+// Check-in all accounts: the server enqueues a job, progress is polled until it finishes
+const CHECKIN_ALL_IDLE_HTML = '<svg class="w-5 h-5 mr-2" fill="none" stroke="currentColor" stroke-width="3" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" d="M5 13l4 4L19 7"/></svg>立即全部签到';
+const SPINNER_HTML = '<svg class="animate-spin w-5 h-5 mr-2" fill="none" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle><path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4z"></path></svg>';
+const JOB_POLL_INTERVAL_MS = 1500;
+
+function formatJobProgress(job) {
+	if (job.status === 'queued') return '排队中...';
+	let text = `签到中 ${job.done}/${job.total}`;
+	if (job.eta_seconds != null) {
+		const eta = Math.round(job.eta_seconds);
+		text += eta >= 60 ? ` · 约 ${Math.ceil(eta / 60)} 分钟` : ` · 约 ${eta} 秒`;
+	}
+	return text;
+}
+
 async function runCheckinAll() {
 	const btn = document.getElementById('btn-checkin-all');
-	if (btn) {
-		btn.disabled = true;
-		btn.innerHTML = '<svg class="animate-spin w-5 h-5 mr-2" fill="none" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle><path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4z"></path></svg>签到中...';
-	}
+	const setButton = (html, disabled) => {
+		if (!btn) return;
+		btn.disabled = disabled;
+		btn.innerHTML = html;
+	};
+	setButton(SPINNER_HTML + '签到中...', true);
 	try {
 		const res = await fetch('/api/checkin/all', { method: 'POST' });
 		const result = await res.json();
-		if (result.success) {
-			showToast(`签到完成: ${result.success_count}/${result.total_count} 成功`, 'success');
+		if (!result.success) {
+			showToast(result.message || '签到失败', 'error');
+			setButton(CHECKIN_ALL_IDLE_HTML, false);
+			return;
+		}
+		if (result.merged) showToast('已有签到任务进行中，已合并到该任务', 'info');
+		const job = await pollCheckinJob(result.job_id, (job) => {
+			setButton(SPINNER_HTML + formatJobProgress(job), true);
+			if (btn && job.current.length) btn.title = '当前: ' + job.current.join(', ');
+		});
+		if (job.status === 'completed') {
+			const ok = (job.counts.success || 0) + (job.counts.already_checked_in || 0);
+			showToast(`签到完成: ${ok}/${job.total} 成功`, 'success');
 			setTimeout(() => location.reload(), 1500);
 		} else {
-			showToast(result.message || '签到失败', 'error');
+			showToast(job.error || '签到失败', 'error');
 		}
 	} catch (e) {
 		showToast('请求失败: ' + e.message, 'error');
-	} finally {
-		if (btn) {
-			btn.disabled = false;
-			btn.innerHTML = '<svg class="w-5 h-5 mr-2" fill="none" stroke="currentColor" stroke-width="3" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" d="M5 13l4 4L19 7"/></svg>立即全部签到';
-		}
+	}
+	setButton(CHECKIN_ALL_IDLE_HTML, false);
+	if (btn) btn.title = '';
+}
+
+async function pollCheckinJob(jobId, onProgress) {
+	while (true) {
+		const res = await fetch(`/api/checkin/jobs/${jobId}`);
+		const result = await res.json();
+		if (!result.success) throw new Error(result.message || '任务不存在');
+		const job = result.job;
+		if (job.status === 'completed' || job.status === 'failed') return job;
+		onProgress(job);
+		await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
 	}
 }
 
@@ -59,3 +95,50 @@ async function runCheckinSingle(accountId) {
 		showToast('请求失败: ' + e.message, 'error');
 	}
 }
+
+// Live check-in progress: /api/events pushes one event per finished account, the matching
+// dashboard card / accounts row is patched in place instead of reloading the page
+const LIVE_STATUS = {
+	success: { label: '成功', classes: ['bg-[#1dd1a1]', 'text-black'] },
+	already_checked_in: { label: '今日已签到', classes: ['bg-[#feca57]', 'text-black'] },
+	failed: { label: '失败', classes: ['bg-[#ff6b6b]', 'text-white'] },
+};
+const LIVE_STATUS_CLASSES = ['bg-[#1dd1a1]', 'bg-[#feca57]', 'bg-[#ff6b6b]', 'bg-white', 'text-black', 'text-white'];
+
+function applyAccountResult(event) {
+	const el = document.getElementById(`card-${event.account_id}`) || document.getElementById(`row-${event.account_id}`);
+	if (!el) return;
+	const set = (name, text) => {
+		const target = el.querySelector(`[data-live="${name}"]`);
+		if (target) target.textContent = text;
+	};
+	const badge = el.querySelector('[data-live="status"]');
+	const status = LIVE_STATUS[event.status];
+	if (badge && status) {
+		badge.classList.remove(...LIVE_STATUS_CLASSES);
+		badge.classList.add(...status.classes);
+		badge.textContent = status.label;
+		badge.title = event.category_label || '';
+	}
+	if (event.balance != null) set('balance', `$${event.balance.toFixed(2)}`);
+	if (event.used_quota != null) set('used', `$${event.used_quota.toFixed(2)}`);
+	set('last_checkin', event.at.slice(0, 16));
+}
+
+function connectLiveEvents() {
+	if (!window.EventSource || !document.querySelector('[id^="card-"], [id^="row-"]')) return;
+	const source = new EventSource('/api/events');
+	let missed = false;
+	source.addEventListener('account_result', (e) => applyAccountResult(JSON.parse(e.data)));
+	// The server dropped events for this tab (it fell behind); the page is resynced after the run
+	source.addEventListener('dropped', () => { missed = true; });
+	source.addEventListener('run_finished', (e) => {
+		const run = JSON.parse(e.data);
+		if (run.triggered_by === 'schedule') {
+			showToast(`定时签到完成: ${run.success_count}/${run.total_count} 成功`, run.failed_count ? 'info' : 'success');
+		}
+		if (missed) setTimeout(() => location.reload(), 1500);
+	});
+}
+
+document.addEventListener('DOMContentLoaded', connectLiveEvents);